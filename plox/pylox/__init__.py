@@ -0,0 +1 @@
+from pylox.program import compile, Program, Result
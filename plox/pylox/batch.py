@@ -0,0 +1,325 @@
+"""
+Batch evaluation: runs one Lox program over many records at once.
+
+    result = run_batch(statements, {"price": prices, "quantity": quantities})
+
+Globals are pre-bound to NumPy arrays holding one element per record, and the program is
+evaluated once with every operator applied elementwise; comparisons produce boolean masks. The
+result is the same as running the program once per record with its globals bound to that record's
+values, which is what happens when the program cannot be vectorized: when an operand is not a
+number array (e.g. strings or mixed types), or when an operation would raise a runtime error for
+some record (division by zero, a type error, an undefined variable). Number arrays are float64,
+so integers are vectorized as floats, and the scalar fallback returns its integers as floats too.
+
+NumPy is an optional dependency, only needed for this module.
+"""
+import logging
+
+from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Print, Expression, Var, Variable, Assign
+from pylox.quicken import with_variants
+from pylox.tokens import TokenType
+from pylox.environment import Environment, UNDEFINED
+from pylox.interpreter import Interpreter
+from pylox.rope import STRING_TYPES
+from pylox.number import NUMBER_TYPES
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger("pylox.batch")
+
+ARITHMETIC = {
+    TokenType.MINUS: lambda a, b: a - b,
+    TokenType.STAR: lambda a, b: a * b,
+    TokenType.PLUS: lambda a, b: a + b,
+    TokenType.SLASH: lambda a, b: a / b,
+    TokenType.GREATER: lambda a, b: a > b,
+    TokenType.GREATER_EQUAL: lambda a, b: a >= b,
+    TokenType.LESS: lambda a, b: a < b,
+    TokenType.LESS_EQUAL: lambda a, b: a <= b,
+}
+
+
+class Unvectorizable(Exception):
+    pass
+
+
+class BatchResult(object):
+    """
+    Outcome of a batch run, as arrays with one element per record: the final value of every global
+    variable, the values printed by each print statement in order, and the error which stopped each
+    record (None for records which ran to the end).
+    """
+    def __init__(self, values, output, errors, vectorized):
+        self.values = values
+        self.output = output
+        self.errors = errors
+        self.vectorized = vectorized
+
+    def __repr__(self):
+        return "BatchResult(values={}, output={}, vectorized={})".format(self.values, self.output, self.vectorized)
+
+
+class BatchInterpreter(object):
+    """
+    Engine for batch runs. Like the other engines it has globals and interpret(), so statements
+    are resolved against it with the Resolver; the bound inputs are defined as globals first.
+    """
+    def __init__(self, bindings):
+        if numpy is None:
+            raise ImportError("Batch evaluation requires NumPy")
+        self.globals = Environment()
+        self.size = None
+        for name, value in bindings.items():
+            value = _as_input(value)
+            if isinstance(value, numpy.ndarray):
+                if self.size is not None and len(value) != self.size:
+                    raise ValueError("Input '{}' has {} records, expected {}.".format(name, len(value), self.size))
+                self.size = len(value)
+            self.globals.define(name, value)
+        if self.size is None:
+            self.size = 1
+        self.inputs = list(self.globals.slots)
+        self.result = None
+        # evaluates operations on single values
+        self._interpreter = Interpreter()
+        self._evaluators = with_variants({
+            BinaryExpr: self._evaluate_binary_expr,
+            UnaryExpr: self._evaluate_unary_expr,
+            LiteralExpr: self._evaluate_literal_expr,
+            GroupingExpr: self._evaluate_grouping_expr,
+            Variable: self._evaluate_variable_expr,
+            Assign: self._evaluate_assign_expr,
+        })
+
+    def interpret(self, statements):
+        statements = list(statements)
+        try:
+            self.result = self._run_vectorized(statements)
+        except Unvectorizable as e:
+            logger.debug("Falling back to scalar execution: {}".format(e))
+            self.result = self._run_scalar(statements)
+        return self.result
+
+    # vectorized execution: values are Python scalars (the same for every record) or arrays
+
+    def _run_vectorized(self, statements):
+        slots = self.globals.slots
+        slots[:] = self.inputs + [UNDEFINED] * (len(slots) - len(self.inputs))
+        output = []
+        with numpy.errstate(all="ignore"):
+            for stmt in statements:
+                stmt_type = type(stmt)
+                if stmt_type is Print:
+                    output.append(self._broadcast(self._evaluate(stmt.expression)))
+                elif stmt_type is Expression:
+                    self._evaluate(stmt.expression)
+                elif stmt_type is Var:
+                    value = None if stmt.initializer is None else self._evaluate(stmt.initializer)
+                    slots[self._slot(stmt.slot, stmt.name)] = value
+                else:
+                    raise Unvectorizable("unsupported statement {}".format(stmt))
+        values = {name: self._broadcast(slots[slot]) for name, slot in self.globals.names.items()
+                  if slots[slot] is not UNDEFINED}
+        return BatchResult(values, output, numpy.full(self.size, None, dtype=object), True)
+
+    def _evaluate(self, expr):
+        evaluator = self._evaluators.get(type(expr))
+        if evaluator is None:
+            raise Unvectorizable("unsupported expression {}".format(expr))
+        return evaluator(expr)
+
+    def _slot(self, slot, name):
+        return self.globals.slot(name.lexeme) if slot is None else slot
+
+    def _evaluate_literal_expr(self, expr):
+        return expr.value
+
+    def _evaluate_grouping_expr(self, expr):
+        return self._evaluate(expr.expression)
+
+    def _evaluate_variable_expr(self, expr):
+        if expr.depth:
+            raise Unvectorizable("local variable '{}'".format(expr.name.lexeme))
+        value = self.globals.slots[self._slot(expr.slot, expr.name)]
+        if value is UNDEFINED:
+            raise Unvectorizable("undefined variable '{}'".format(expr.name.lexeme))
+        return value
+
+    def _evaluate_assign_expr(self, expr):
+        if expr.depth:
+            raise Unvectorizable("local variable '{}'".format(expr.name.lexeme))
+        value = self._evaluate(expr.value)
+        slot = self._slot(expr.slot, expr.name)
+        if self.globals.slots[slot] is UNDEFINED:
+            raise Unvectorizable("undefined variable '{}'".format(expr.name.lexeme))
+        self.globals.slots[slot] = value
+        return value
+
+    def _evaluate_unary_expr(self, expr):
+        right = self._evaluate(expr.right)
+        if not isinstance(right, numpy.ndarray):
+            return self._scalar(self._interpreter._unary, expr.operator, right)
+        token_type = expr.operator.token_type
+        if token_type == TokenType.MINUS and right.dtype == numpy.float64:
+            return -right
+        if token_type == TokenType.BANG and right.dtype == numpy.bool_:
+            return ~right
+        if token_type == TokenType.BANG and right.dtype == numpy.float64:
+            return numpy.zeros(self.size, dtype=numpy.bool_)
+        raise Unvectorizable("'{}' on {} values".format(expr.operator.lexeme, right.dtype))
+
+    def _evaluate_binary_expr(self, expr):
+        left = self._evaluate(expr.left)
+        right = self._evaluate(expr.right)
+        if not isinstance(left, numpy.ndarray) and not isinstance(right, numpy.ndarray):
+            return self._scalar(self._interpreter._binary, expr.operator, left, right)
+        token_type = expr.operator.token_type
+        if token_type in (TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL):
+            equal = self._equal(left, right)
+            return equal if token_type == TokenType.EQUAL_EQUAL else ~equal
+        operation = ARITHMETIC.get(token_type)
+        if operation is None or not _is_number(left) or not _is_number(right):
+            raise Unvectorizable("'{}' on a non-number".format(expr.operator.lexeme))
+        if token_type == TokenType.SLASH and numpy.any(right == 0):
+            raise Unvectorizable("division by zero")
+        return operation(left, right)
+
+    def _scalar(self, operation, *args):
+        """Applies the Interpreter's own operation to values which are the same for every record."""
+        try:
+            return operation(*args)
+        except Exception as e:
+            # the error is raised for every record, which the scalar execution reports
+            raise Unvectorizable(str(e))
+
+    def _equal(self, left, right):
+        for value in (left, right):
+            if isinstance(value, numpy.ndarray) and value.dtype not in (numpy.float64, numpy.bool_):
+                raise Unvectorizable("'==' on mixed values")
+        # numbers and booleans compare like Python's ==, and are never equal to nil or a string
+        for value in (left, right):
+            if value is None or type(value) in STRING_TYPES:
+                return numpy.zeros(self.size, dtype=numpy.bool_)
+        return numpy.asarray(left == right)
+
+    def _broadcast(self, value):
+        if isinstance(value, numpy.ndarray):
+            return value
+        array = numpy.empty(self.size, dtype=_dtype_of(value))
+        array[:] = [value] * self.size if array.dtype == object else value
+        return array
+
+    # scalar fallback: the program runs once per record on the tree-walking Interpreter
+
+    def _run_scalar(self, statements):
+        interpreter = _RecordingInterpreter()
+        interpreter.globals = interpreter.environment = self.globals
+        slots = self.globals.slots
+        records = []
+        for index in range(self.size):
+            slots[:] = [_element(value, index) for value in self.inputs] + \
+                [UNDEFINED] * (len(slots) - len(self.inputs))
+            interpreter.printed = []
+            interpreter.interpret(statements)
+            values = {name: slots[slot] for name, slot in self.globals.names.items()}
+            records.append((values, interpreter.printed, interpreter.runtime_error))
+        prints = max(len(printed) for _, printed, _ in records) if records else 0
+        output = [_as_array([printed[i] if i < len(printed) else None for _, printed, _ in records])
+                  for i in range(prints)]
+        values = {}
+        for name in self.globals.names:
+            column = [record[name] for record, _, _ in records]
+            if all(value is UNDEFINED for value in column):
+                continue
+            values[name] = _as_array([None if value is UNDEFINED else value for value in column])
+        errors = numpy.empty(self.size, dtype=object)
+        errors[:] = [error for _, _, error in records]
+        return BatchResult(values, output, errors, False)
+
+
+class _RecordingInterpreter(Interpreter):
+    """Collects printed values instead of writing them, and keeps runtime errors quiet."""
+    def _visit_print_stmt(self, stmt):
+        self.printed.append(self.evaluate(stmt.expression))
+
+    def interpret(self, statements):
+        self.runtime_error = None
+        try:
+            for stmt in statements:
+                self._execute(stmt)
+        except Exception as e:
+            self.runtime_error = e
+
+
+def run_batch(statements, bindings):
+    """Resolves and runs parsed statements over the records in bindings, returning a BatchResult."""
+    from pylox.resolver import Resolver
+    interpreter = BatchInterpreter(bindings)
+    Resolver(interpreter).resolve(statements)
+    return interpreter.interpret(statements)
+
+
+def _is_number_array(value):
+    return isinstance(value, numpy.ndarray) and value.dtype == numpy.float64
+
+
+def _is_number(value):
+    return type(value) in NUMBER_TYPES or _is_number_array(value)
+
+
+def _dtype_of(value):
+    if type(value) in NUMBER_TYPES:
+        return numpy.float64
+    if type(value) is bool:
+        return numpy.bool_
+    return object
+
+
+def _as_input(value):
+    """Converts an input binding to an array of Lox values, or leaves a single Lox value as it is."""
+    if value is None or type(value) in (float, bool, str):
+        return value
+    if type(value) is int:
+        return float(value)
+    array = numpy.asarray(value)
+    if array.ndim != 1:
+        raise ValueError("Inputs must be one-dimensional.")
+    if array.dtype.kind in "iuf":
+        return array.astype(numpy.float64)
+    if array.dtype.kind == "b":
+        return array
+    return _as_array(array.tolist())
+
+
+def _lox_value(value):
+    return float(value) if type(value) is int else value
+
+
+def _as_array(values):
+    """
+    Packs Lox values into a number or boolean array when they allow it, and an object array otherwise.
+    Integers become floats either way, as in the vectorized path's number arrays.
+    """
+    values = [_lox_value(v) for v in values]
+    if values and all(type(v) is float for v in values):
+        return numpy.array(values, dtype=numpy.float64)
+    if values and all(type(v) is bool for v in values):
+        return numpy.array(values, dtype=numpy.bool_)
+    array = numpy.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _element(value, index):
+    """Python value of one record's element, as the scalar Interpreter expects it."""
+    if not isinstance(value, numpy.ndarray):
+        return value
+    element = value[index]
+    if value.dtype == numpy.float64:
+        return float(element)
+    if value.dtype == numpy.bool_:
+        return bool(element)
+    return element
@@ -0,0 +1,218 @@
+"""
+Benchmark harness for the lox/benchmark suite.
+
+    python -m pylox.bench [names or paths ...] [-n RUNS] [--warmup N] [--engine ENGINE]
+                          [--output results.json] [--baseline baseline.json] [--threshold 0.1]
+
+Each benchmark is run in-process with a fresh interpreter per run. Wall and CPU time are recorded
+for every run, and peak memory is measured with tracemalloc in one extra run so that tracing does
+not distort the timings. Benchmarks which plox cannot parse or which stop with a runtime error are
+reported as unsupported. Results can be written as JSON and compared against a previous results
+file; a benchmark whose best wall time got slower than the threshold is flagged as a regression,
+and the exit status is 1 when there are any.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.interpreter import Interpreter
+from pylox.resolver import Resolver
+from pylox.vm import VM
+from pylox.transpile import TranspilingInterpreter
+from pylox.exceptions import CompileException
+from pylox.output import NullSink
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "lox", "benchmark")
+
+RESULTS_VERSION = 1
+
+# engine factories, taking the output sink for printed values
+ENGINES = {
+    "tree": Interpreter,
+    "closures": lambda output=None: Interpreter(compiled=True, output=output),
+    "quickened": lambda output=None: Interpreter(quicken=True, output=output),
+    "stackless": lambda output=None: Interpreter(stackless=True, output=output),
+    "vm": VM,
+    "python": TranspilingInterpreter,
+}
+
+
+class Unsupported(Exception):
+    pass
+
+
+def find_benchmarks(selected, directory=BENCHMARK_DIR):
+    """Maps benchmark names to paths; selections may be names from the directory or paths to .lox files."""
+    available = {os.path.splitext(os.path.basename(p))[0]: p for p in glob.glob(os.path.join(directory, "*.lox"))}
+    if not selected:
+        return dict(sorted(available.items()))
+    benchmarks = {}
+    for item in selected:
+        if item in available:
+            benchmarks[item] = available[item]
+        elif os.path.isfile(item):
+            benchmarks[os.path.splitext(os.path.basename(item))[0]] = item
+        else:
+            raise ValueError("Unknown benchmark '{}'.".format(item))
+    return benchmarks
+
+
+def run_once(source, engine):
+    """Runs a program once with a fresh engine, raising Unsupported if plox cannot run it."""
+    parser = Parser(RegexScanner(source).scan_tokens())
+    statements = parser.parse()
+    if parser.errors:
+        raise Unsupported("parse error: {}".format(parser.errors[0]))
+    # printed values are discarded without being formatted, so benchmarks time the engine only
+    runtime = ENGINES[engine](output=NullSink())
+    Resolver(runtime).resolve(statements)
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            runtime.interpret(statements)
+        except CompileException as e:
+            raise Unsupported("compile error: {}".format(e))
+    if runtime.runtime_error is not None:
+        raise Unsupported("runtime error: {}".format(runtime.runtime_error))
+
+
+def run_benchmark(path, runs=5, warmup=1, engine="tree"):
+    with open(path) as f:
+        source = f.read()
+    try:
+        for _ in range(warmup):
+            run_once(source, engine)
+        wall = []
+        cpu = []
+        for _ in range(runs):
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            run_once(source, engine)
+            cpu.append(time.process_time() - cpu_start)
+            wall.append(time.perf_counter() - wall_start)
+        tracemalloc.start()
+        try:
+            run_once(source, engine)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    except Unsupported as e:
+        return {"status": "unsupported", "reason": str(e)}
+    return {
+        "status": "ok",
+        "wall": summarize(wall),
+        "cpu": summarize(cpu),
+        "peak_memory": peak_memory,
+    }
+
+
+def summarize(timings):
+    return {
+        "min": min(timings),
+        "mean": sum(timings) / len(timings),
+        "max": max(timings),
+        "runs": timings,
+    }
+
+
+def run_suite(benchmarks, runs=5, warmup=1, engine="tree"):
+    return {
+        "version": RESULTS_VERSION,
+        "engine": engine,
+        "python": platform.python_version(),
+        "runs": runs,
+        "warmup": warmup,
+        "benchmarks": {name: run_benchmark(path, runs, warmup, engine) for name, path in benchmarks.items()},
+    }
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compares best wall times with a baseline results dict. Returns (name, baseline, current, ratio,
+    regressed) for every benchmark which ran successfully in both.
+    """
+    comparisons = []
+    for name, result in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if result["status"] != "ok" or not previous or previous.get("status") != "ok":
+            continue
+        before = previous["wall"]["min"]
+        after = result["wall"]["min"]
+        ratio = after / before if before else float("inf")
+        comparisons.append((name, before, after, ratio, ratio > 1 + threshold))
+    return comparisons
+
+
+def format_results(results):
+    lines = ["{:<20} {:>10} {:>10} {:>10} {:>12}".format("benchmark", "wall min", "wall mean", "cpu mean",
+                                                        "peak memory")]
+    for name, result in results["benchmarks"].items():
+        if result["status"] != "ok":
+            lines.append("{:<20} unsupported ({})".format(name, result["reason"]))
+            continue
+        lines.append("{:<20} {:>9.4f}s {:>9.4f}s {:>9.4f}s {:>10.1f}KB".format(
+            name, result["wall"]["min"], result["wall"]["mean"], result["cpu"]["mean"],
+            result["peak_memory"] / 1024))
+    return "\n".join(lines)
+
+
+def format_comparison(comparisons, threshold):
+    lines = ["compared with baseline (threshold {:.0%}):".format(threshold)]
+    for name, before, after, ratio, regressed in comparisons:
+        lines.append("{:<20} {:>9.4f}s -> {:>9.4f}s  {:+7.1%}{}".format(
+            name, before, after, ratio - 1, "  REGRESSION" if regressed else ""))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pylox.bench", description="Run the lox benchmark suite")
+    parser.add_argument("benchmarks", nargs="*", help="benchmark names or .lox paths (default: all)")
+    parser.add_argument("-n", "--runs", dest="runs", type=int, default=5)
+    parser.add_argument("--warmup", dest="warmup", type=int, default=1)
+    parser.add_argument("--engine", dest="engine", choices=sorted(ENGINES), default="tree")
+    parser.add_argument("--dir", dest="directory", default=BENCHMARK_DIR)
+    parser.add_argument("--output", "-o", dest="output", help="write results as JSON")
+    parser.add_argument("--baseline", "-b", dest="baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", dest="threshold", type=float, default=0.1,
+                        help="slowdown ratio flagged as a regression (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    try:
+        benchmarks = find_benchmarks(args.benchmarks, args.directory)
+    except ValueError as e:
+        parser.error(str(e))
+    # runtime errors are reported in the results, not logged
+    logger = logging.getLogger("pylox")
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    try:
+        results = run_suite(benchmarks, args.runs, args.warmup, args.engine)
+    finally:
+        logger.setLevel(level)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparisons = compare(results, baseline, args.threshold)
+        print(format_comparison(comparisons, args.threshold))
+        if any(regressed for *_, regressed in comparisons):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
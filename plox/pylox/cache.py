@@ -0,0 +1,273 @@
+import collections
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import tempfile
+import zlib
+
+from pylox.expressions import Assign, BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Variable, Expression, Print, \
+    Var, Import, KIND_COUNT
+from pylox.tokens import Token
+from pylox.parser import PARSER_VERSION
+from pylox.quicken import BASE_KINDS
+
+logger = logging.getLogger("pylox.cache")
+
+# bump when the serialized format changes; 2 drops the entries parsed before number literals
+# could be ints, which PARSER_VERSION did not cover yet
+CACHE_VERSION = 2
+
+MAGIC = b"LOXC"
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# larger scripts are streamed instead, so that memory use stays flat
+MAX_SOURCE_SIZE = 1024 * 1024
+
+NODE_TYPES = [None] * KIND_COUNT
+for _node_type in (Assign, BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Variable, Expression, Print, Var, Import):
+    NODE_TYPES[_node_type.kind] = _node_type
+
+# regenerating the AST classes changes their layout, which must invalidate the cache
+LAYOUT = repr([(t.__name__, t.__slots__) for t in NODE_TYPES]).encode()
+
+
+def default_directory():
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache")), "pylox")
+
+
+def dumps(statements):
+    """
+    Serializes parsed statements as nested tuples with marshal: a node becomes (kind, *fields) and a
+    token (token_type, lexeme, literal, line). The result is compressed, since the tuples are highly
+    repetitive. Only the parsed fields are kept; resolved slots depend on the interpreter which runs
+    the program, so it has to be resolved again after loading.
+    """
+    return zlib.compress(marshal.dumps([_encode(stmt) for stmt in statements]), 1)
+
+
+def _dumps_or_none(statements):
+    # marshal has a nesting limit of its own, so the most deeply nested programs are not cached
+    try:
+        return dumps(statements)
+    except (RecursionError, ValueError) as e:
+        logger.info("Not caching a program which cannot be serialized: {}".format(e))
+        return None
+
+
+def loads(data):
+    return [_decode(node) for node in marshal.loads(zlib.decompress(data))]
+
+
+def _encode(root):
+    # nodes are encoded from an explicit stack rather than by recursion, like the Resolver visits
+    # them: a node with children is pushed again as (node,), to be built from the encoded children
+    # on top of the encoded stack
+    encoded = []
+    push = encoded.append
+    take = encoded.pop
+    work = [root]
+    pop = work.pop
+    extend = work.extend
+    while work:
+        node = pop()
+        if node is None:
+            push(None)
+            continue
+        if type(node) is tuple:
+            node = node[0]
+            # quickened nodes are stored as the nodes they specialize
+            kind = BASE_KINDS[node.kind]
+            if kind == BINARY:
+                right = take()
+                push((kind, take(), _token(node.operator), right))
+            elif kind == UNARY:
+                push((kind, _token(node.operator), take()))
+            elif kind == ASSIGN or kind == VAR:
+                push((kind, _token(node.name), take()))
+            else:
+                push((kind, take()))
+            continue
+        kind = BASE_KINDS[node.kind]
+        if kind == LITERAL:
+            push((kind, node.value))
+        elif kind == VARIABLE:
+            push((kind, _token(node.name)))
+        elif kind == IMPORT:
+            push((kind, _token(node.path)))
+        elif kind == BINARY:
+            extend(((node,), node.right, node.left))
+        elif kind == UNARY:
+            extend(((node,), node.right))
+        elif kind == ASSIGN:
+            extend(((node,), node.value))
+        elif kind == VAR:
+            extend(((node,), node.initializer))
+        else:
+            extend(((node,), node.expression))
+    return encoded[0]
+
+
+def _token(token):
+    return token.token_type, token.lexeme, token.literal, token.line
+
+
+def _decode(root):
+    # the inverse of _encode, from an explicit stack as well: a node with children is pushed again
+    # as (node,), to be built from the decoded children on top of the decoded stack
+    decoded = []
+    push = decoded.append
+    take = decoded.pop
+    work = [root]
+    pop = work.pop
+    extend = work.extend
+    while work:
+        node = pop()
+        if node is None:
+            push(None)
+            continue
+        kind = node[0]
+        if len(node) == 1:
+            node = node[0]
+            kind = node[0]
+            if kind == BINARY:
+                right = take()
+                push(BinaryExpr(take(), Token(*node[2]), right))
+            elif kind == UNARY:
+                push(UnaryExpr(Token(*node[1]), take()))
+            elif kind == ASSIGN:
+                push(Assign(Token(*node[1]), take()))
+            elif kind == VAR:
+                push(Var(Token(*node[1]), take()))
+            else:
+                push(NODE_TYPES[kind](take()))
+        elif kind == LITERAL:
+            push(LiteralExpr(node[1]))
+        elif kind == VARIABLE:
+            push(Variable(Token(*node[1])))
+        elif kind == IMPORT:
+            push(Import(Token(*node[1])))
+        elif kind == BINARY:
+            extend(((node,), node[3], node[1]))
+        elif kind == UNARY or kind == ASSIGN or kind == VAR:
+            extend(((node,), node[2]))
+        else:
+            extend(((node,), node[1]))
+    return decoded[0]
+
+
+LITERAL, BINARY, VARIABLE, UNARY, ASSIGN, VAR, IMPORT = (LiteralExpr.kind, BinaryExpr.kind, Variable.kind,
+                                                         UnaryExpr.kind, Assign.kind, Var.kind, Import.kind)
+
+
+class ProgramCache(object):
+    """
+    Directory of serialized programs, keyed by a hash of the source text, the cache format, the
+    parser version and the AST layout, so that scanning and parsing can be skipped for scripts
+    which have not changed.
+    Entries are written atomically, and the least recently used ones are evicted once the directory
+    grows beyond max_size bytes.
+    """
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory or default_directory()
+        self.max_size = max_size
+
+    def key(self, source, variant=""):
+        digest = hashlib.sha256()
+        for part in (MAGIC, str(CACHE_VERSION).encode(), str(PARSER_VERSION).encode(),
+                     sys.implementation.cache_tag.encode(), LAYOUT, variant.encode(), source.encode()):
+            digest.update(part)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".loxc")
+
+    def load(self, key):
+        """Returns the cached statements, or None if there is no (readable) entry."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            if not data.startswith(MAGIC):
+                return None
+            statements = loads(data[len(MAGIC):])
+            # the access time is not reliable, so hits refresh the modification time used for eviction
+            os.utime(path)
+        except (OSError, ValueError, EOFError, TypeError, IndexError, RecursionError, zlib.error):
+            return None
+        return statements
+
+    def store(self, key, statements):
+        data = _dumps_or_none(statements)
+        if data is None:
+            return
+        data = MAGIC + data
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temporary, self.path(key))
+            except BaseException:
+                os.unlink(temporary)
+                raise
+            self.evict()
+        except OSError as e:
+            logger.warning("Could not write to the program cache: {}".format(e))
+
+    def evict(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".loxc"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+
+class MemoryCache(object):
+    """
+    In-memory counterpart of ProgramCache for long-running processes: keeps the parsed statements
+    of the max_size most recently used programs, under the same keys. Entries are kept serialized
+    and every load decodes fresh statements, since running a program changes its nodes (resolved
+    slots, quickened classes), which must not carry over to the next request.
+    """
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    key = ProgramCache.key
+
+    def load(self, key):
+        data = self._entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return loads(data)
+
+    def store(self, key, statements):
+        data = _dumps_or_none(statements)
+        if data is None:
+            return
+        self._entries[key] = data
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
@@ -0,0 +1,237 @@
+from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Print, Expression, Var, Variable, Assign
+from pylox.quicken import with_variants
+from pylox.tokens import TokenType
+from pylox.exceptions import RuntimeException
+from pylox.environment import UNDEFINED
+from pylox.rope import STRING_TYPES, concat
+from pylox.number import NUMBER_TYPES
+from pylox import number
+
+# binary operators defined on numbers only, computed by pylox.number.OPERATORS
+_NUMBER_OPERATORS = frozenset((TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL,
+                               TokenType.MINUS, TokenType.SLASH, TokenType.STAR))
+
+
+class ClosureCompiler(object):
+    """
+    Compiles parsed statements into nested Python closures. Node kinds and operators are
+    resolved once at compile time, so executing a compiled statement does no type tests or
+    token type comparisons. Semantics mirror the tree-walking Interpreter exactly.
+
+    Closures are bound to the interpreter's current environment; resolved variables capture
+    their environment's slot list directly.
+    """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self._statement_compilers = {
+            Print: self._compile_print_stmt,
+            Expression: self._compile_expression_stmt,
+            Var: self._compile_var_stmt,
+        }
+        self._expression_compilers = with_variants({
+            BinaryExpr: self._compile_binary_expr,
+            UnaryExpr: self._compile_unary_expr,
+            LiteralExpr: self._compile_literal_expr,
+            GroupingExpr: self._compile_grouping_expr,
+            Variable: self._compile_variable_expr,
+            Assign: self._compile_assign_expr,
+        })
+
+    def compile(self, statements):
+        return [self.compile_stmt(stmt) for stmt in statements]
+
+    def compile_iter(self, statements):
+        """Compiles statements one at a time, for programs which are executed while being parsed."""
+        for stmt in statements:
+            yield self.compile((stmt,))[0]
+
+    def compile_stmt(self, stmt):
+        compiler = self._statement_compilers.get(type(stmt))
+        if compiler is None:
+            # unknown (or unparseable) statements are handed back to the tree-walker
+            execute = self.interpreter._execute
+
+            def fallback():
+                return execute(stmt)
+            return fallback
+        return compiler(stmt)
+
+    def compile_expr(self, expr):
+        compiler = self._expression_compilers.get(type(expr))
+        if compiler is None:
+            evaluate = self.interpreter.evaluate
+
+            def fallback():
+                return evaluate(expr)
+            return fallback
+        return compiler(expr)
+
+    def _compile_print_stmt(self, stmt):
+        expression = self.compile_expr(stmt.expression)
+        interpreter = self.interpreter
+
+        def print_stmt():
+            interpreter.output.print(expression())
+        return print_stmt
+
+    def _compile_expression_stmt(self, stmt):
+        expression = self.compile_expr(stmt.expression)
+
+        def expression_stmt():
+            expression()
+        return expression_stmt
+
+    def _compile_var_stmt(self, stmt):
+        environment = self.interpreter.environment
+        initializer = None
+        if stmt.initializer is not None:
+            initializer = self.compile_expr(stmt.initializer)
+
+        if stmt.slot is None:
+            name = stmt.name.lexeme
+            define = environment.define
+            if initializer is None:
+                def var_stmt():
+                    define(name, None)
+                return var_stmt
+
+            def var_initializer_stmt():
+                define(name, initializer())
+            return var_initializer_stmt
+
+        slots = environment.slots
+        slot = stmt.slot
+        if initializer is None:
+            def var_slot_stmt():
+                slots[slot] = None
+            return var_slot_stmt
+
+        def var_slot_initializer_stmt():
+            slots[slot] = initializer()
+        return var_slot_initializer_stmt
+
+    def _compile_literal_expr(self, expr):
+        value = expr.value
+
+        def literal():
+            return value
+        return literal
+
+    def _compile_grouping_expr(self, expr):
+        # groupings only exist for precedence, the inner closure is used directly
+        return self.compile_expr(expr.expression)
+
+    def _compile_variable_expr(self, expr):
+        environment = self.interpreter.environment
+        name = expr.name
+        if expr.slot is None:
+            get = environment.get
+
+            def variable():
+                return get(name)
+            return variable
+
+        slots = environment.ancestor(expr.depth).slots
+        slot = expr.slot
+
+        def slot_variable():
+            value = slots[slot]
+            if value is UNDEFINED:
+                raise RuntimeException(name.lexeme, "Undefined variable '{}'.".format(name.lexeme), line=name.line)
+            return value
+        return slot_variable
+
+    def _compile_assign_expr(self, expr):
+        environment = self.interpreter.environment
+        name = expr.name
+        value_expr = self.compile_expr(expr.value)
+        if expr.slot is None:
+            assign = environment.assign
+
+            def assign_expr():
+                value = value_expr()
+                assign(name, value)
+                return value
+            return assign_expr
+
+        slots = environment.ancestor(expr.depth).slots
+        slot = expr.slot
+
+        def assign_slot_expr():
+            value = value_expr()
+            if slots[slot] is UNDEFINED:
+                raise RuntimeException(name.lexeme, "Undefined variable '{}'.".format(name.lexeme), line=name.line)
+            slots[slot] = value
+            return value
+        return assign_slot_expr
+
+    def _compile_unary_expr(self, expr):
+        operator = expr.operator
+        right = self.compile_expr(expr.right)
+        if operator.token_type == TokenType.MINUS:
+            def negate():
+                value = right()
+                if type(value) in NUMBER_TYPES:
+                    return number.negate(value)
+                raise RuntimeException(operator, "Operand must be a number.")
+            return negate
+        if operator.token_type == TokenType.BANG:
+            is_truthy = self.interpreter._is_truthy
+
+            def bang():
+                return not is_truthy(right())
+            return bang
+
+        def unknown():
+            right()
+        return unknown
+
+    def _compile_binary_expr(self, expr):
+        operator = expr.operator
+        left = self.compile_expr(expr.left)
+        right = self.compile_expr(expr.right)
+        if operator.token_type == TokenType.EQUAL_EQUAL:
+            is_equal = self.interpreter._is_equal
+
+            def equal():
+                return is_equal(left(), right())
+            return equal
+        if operator.token_type == TokenType.BANG_EQUAL:
+            is_equal = self.interpreter._is_equal
+
+            def not_equal():
+                return not is_equal(left(), right())
+            return not_equal
+
+        if operator.token_type == TokenType.PLUS:
+            return _add(operator, left, right)
+        if operator.token_type in _NUMBER_OPERATORS:
+            return _number_operation(number.OPERATORS[operator.token_type], operator, left, right)
+
+        def unknown():
+            left()
+            right()
+        return unknown
+
+
+def _number_operation(operation, operator, left, right):
+    def number_operation():
+        a = left()
+        b = right()
+        if type(a) in NUMBER_TYPES and type(b) in NUMBER_TYPES:
+            return operation(a, b)
+        raise RuntimeException(operator, "Operands must be numbers.")
+    return number_operation
+
+
+def _add(operator, left, right):
+    def add():
+        a = left()
+        b = right()
+        if type(a) in NUMBER_TYPES and type(b) in NUMBER_TYPES:
+            return a + b
+        if type(a) in STRING_TYPES and type(b) in STRING_TYPES:
+            return concat(a, b)
+        raise RuntimeException(operator, "Operands must be two numbers or two strings.")
+    return add
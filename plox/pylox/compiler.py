@@ -0,0 +1,257 @@
+import bisect
+from array import array
+
+from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Print, Expression, Var, Variable, \
+    Assign, Import
+from pylox.quicken import with_variants
+from pylox.tokens import TokenType
+from pylox.exceptions import CompileException
+
+
+class OpCode(object):
+    CONSTANT = 0                # CONSTANT index:u8
+    CONSTANT_LONG = 1           # CONSTANT_LONG index:u24
+    NIL = 2
+    TRUE = 3
+    FALSE = 4
+    POP = 5
+    GET_GLOBAL = 6              # GET_GLOBAL slot:u16
+    DEFINE_GLOBAL = 7           # DEFINE_GLOBAL slot:u16
+    SET_GLOBAL = 8              # SET_GLOBAL slot:u16
+    EQUAL = 9
+    NOT_EQUAL = 10
+    GREATER = 11
+    GREATER_EQUAL = 12
+    LESS = 13
+    LESS_EQUAL = 14
+    ADD = 15
+    SUBTRACT = 16
+    MULTIPLY = 17
+    DIVIDE = 18
+    NOT = 19
+    NEGATE = 20
+    PRINT = 21
+    RETURN = 22
+    IMPORT = 23                 # pops the module path
+    GET_GLOBAL_NAMED = 24       # GET_GLOBAL_NAMED name:u24, for globals the Resolver left unresolved
+    SET_GLOBAL_NAMED = 25       # SET_GLOBAL_NAMED name:u24
+
+
+OP_NAMES = {value: "OP_" + name for name, value in vars(OpCode).items() if not name.startswith("_")}
+
+BINARY_OPS = {
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.SLASH: OpCode.DIVIDE,
+}
+
+UNARY_OPS = {
+    TokenType.BANG: OpCode.NOT,
+    TokenType.MINUS: OpCode.NEGATE,
+}
+
+MAX_CONSTANTS = 1 << 24
+MAX_GLOBALS = 1 << 16
+
+
+class Chunk(object):
+    """
+    A compiled sequence of bytecode. Instructions are packed into a byte array, with literal values
+    kept in a constant pool and source lines stored run-length encoded as (offset, line) pairs.
+    """
+    def __init__(self):
+        self.code = array('B')
+        self.constants = []
+        self.line_offsets = []
+        self.line_numbers = []
+        self._constant_index = {}
+
+    def write(self, byte, line):
+        if not self.line_numbers or self.line_numbers[-1] != line:
+            self.line_offsets.append(len(self.code))
+            self.line_numbers.append(line)
+        self.code.append(byte)
+
+    def add_constant(self, value):
+        # keyed by type as well, since 1.0 == True would otherwise share a slot
+        key = (type(value), value)
+        index = self._constant_index.get(key)
+        if index is None:
+            if len(self.constants) == MAX_CONSTANTS:
+                raise CompileException("Too many constants in one chunk.")
+            index = len(self.constants)
+            self.constants.append(value)
+            self._constant_index[key] = index
+        return index
+
+    def line_at(self, offset):
+        index = bisect.bisect_right(self.line_offsets, offset) - 1
+        return self.line_numbers[index] if index >= 0 else None
+
+    def disassemble(self, name="chunk"):
+        lines = ["== {} ==".format(name)]
+        offset = 0
+        while offset < len(self.code):
+            text, offset = self.disassemble_instruction(offset)
+            lines.append(text)
+        return "\n".join(lines)
+
+    def disassemble_instruction(self, offset):
+        line = self.line_at(offset)
+        prefix = "{:04d} ".format(offset)
+        if offset > 0 and self.line_at(offset - 1) == line:
+            prefix += "   | "
+        else:
+            prefix += "{:4} ".format(line)
+
+        op = self.code[offset]
+        name = OP_NAMES.get(op, "Unknown opcode {}".format(op))
+        if op == OpCode.CONSTANT:
+            index = self.code[offset + 1]
+            return "{}{:<16} {:4d} '{}'".format(prefix, name, index, self.constants[index]), offset + 2
+        if op in (OpCode.CONSTANT_LONG, OpCode.GET_GLOBAL_NAMED, OpCode.SET_GLOBAL_NAMED):
+            index = self.code[offset + 1] << 16 | self.code[offset + 2] << 8 | self.code[offset + 3]
+            return "{}{:<16} {:4d} '{}'".format(prefix, name, index, self.constants[index]), offset + 4
+        if op in (OpCode.GET_GLOBAL, OpCode.DEFINE_GLOBAL, OpCode.SET_GLOBAL):
+            slot = self.code[offset + 1] << 8 | self.code[offset + 2]
+            return "{}{:<16} {:4d}".format(prefix, name, slot), offset + 3
+        return prefix + name, offset + 1
+
+
+class Compiler(object):
+    """
+    Lowers resolved statements into a single Chunk for the VM. Nodes must have been passed
+    through the Resolver, since declared global variables are addressed by slot; the globals it
+    left unresolved are addressed by name.
+    """
+    def __init__(self):
+        self.chunk = None
+        self.line = 0
+        self._compilers = with_variants({
+            Print: self._compile_print_stmt,
+            Expression: self._compile_expression_stmt,
+            Var: self._compile_var_stmt,
+            BinaryExpr: self._compile_binary_expr,
+            UnaryExpr: self._compile_unary_expr,
+            LiteralExpr: self._compile_literal_expr,
+            GroupingExpr: self._compile_grouping_expr,
+            Variable: self._compile_variable_expr,
+            Assign: self._compile_assign_expr,
+            Import: self._compile_import_stmt,
+        })
+
+    def compile(self, statements):
+        self.chunk = Chunk()
+        for stmt in statements:
+            self._compile(stmt)
+        self._emit(OpCode.RETURN)
+        return self.chunk
+
+    def _compile(self, node):
+        compiler = self._compilers.get(type(node))
+        if compiler is None:
+            raise CompileException("Cannot compile {}.".format(node))
+        compiler(node)
+
+    def _emit(self, byte):
+        self.chunk.write(byte, self.line)
+
+    def _emit_slot(self, op, slot):
+        if slot is None:
+            raise CompileException("Cannot compile unresolved variable.")
+        if slot >= MAX_GLOBALS:
+            raise CompileException("Too many global variables.")
+        self._emit(op)
+        self._emit(slot >> 8)
+        self._emit(slot & 0xff)
+
+    def _emit_named(self, op, name):
+        index = self.chunk.add_constant(name.lexeme)
+        self._emit(op)
+        self._emit(index >> 16)
+        self._emit((index >> 8) & 0xff)
+        self._emit(index & 0xff)
+
+    def _emit_constant(self, value):
+        index = self.chunk.add_constant(value)
+        if index < 256:
+            self._emit(OpCode.CONSTANT)
+            self._emit(index)
+        else:
+            self._emit(OpCode.CONSTANT_LONG)
+            self._emit(index >> 16)
+            self._emit((index >> 8) & 0xff)
+            self._emit(index & 0xff)
+
+    def _compile_print_stmt(self, stmt):
+        self._compile(stmt.expression)
+        self._emit(OpCode.PRINT)
+
+    def _compile_expression_stmt(self, stmt):
+        self._compile(stmt.expression)
+        self._emit(OpCode.POP)
+
+    def _compile_var_stmt(self, stmt):
+        self.line = stmt.name.line
+        if stmt.initializer is None:
+            self._emit(OpCode.NIL)
+        else:
+            self._compile(stmt.initializer)
+        self._emit_slot(OpCode.DEFINE_GLOBAL, stmt.slot)
+
+    def _compile_import_stmt(self, stmt):
+        self.line = stmt.path.line
+        self._emit_constant(stmt.path.literal)
+        self._emit(OpCode.IMPORT)
+
+    def _compile_binary_expr(self, expr):
+        self._compile(expr.left)
+        self._compile(expr.right)
+        self.line = expr.operator.line
+        self._emit(BINARY_OPS[expr.operator.token_type])
+
+    def _compile_unary_expr(self, expr):
+        self._compile(expr.right)
+        self.line = expr.operator.line
+        self._emit(UNARY_OPS[expr.operator.token_type])
+
+    def _compile_literal_expr(self, expr):
+        if expr.value is None:
+            self._emit(OpCode.NIL)
+        elif expr.value is True:
+            self._emit(OpCode.TRUE)
+        elif expr.value is False:
+            self._emit(OpCode.FALSE)
+        else:
+            self._emit_constant(expr.value)
+
+    def _compile_grouping_expr(self, expr):
+        self._compile(expr.expression)
+
+    def _compile_variable_expr(self, expr):
+        self.line = expr.name.line
+        self._check_global(expr)
+        if expr.slot is None:
+            self._emit_named(OpCode.GET_GLOBAL_NAMED, expr.name)
+        else:
+            self._emit_slot(OpCode.GET_GLOBAL, expr.slot)
+
+    def _compile_assign_expr(self, expr):
+        self._compile(expr.value)
+        self.line = expr.name.line
+        self._check_global(expr)
+        if expr.slot is None:
+            self._emit_named(OpCode.SET_GLOBAL_NAMED, expr.name)
+        else:
+            self._emit_slot(OpCode.SET_GLOBAL, expr.slot)
+
+    def _check_global(self, expr):
+        if expr.depth:
+            raise CompileException("Local variables are not supported by the VM.")
@@ -0,0 +1,231 @@
+"""
+Conformance runner for the Lox test corpus.
+
+    python -m pylox.conformance [paths ...] [-j JOBS] [--timeout SECONDS] [--engine ENGINE] [--slowest N]
+
+Every script is checked against the annotations it carries, following the book's test runner:
+
+    print 1;        // expect: 1
+    nil.foo;        // expect runtime error: Only instances have properties.
+    (a) = "value";  // Error at '=': Invalid assignment target.
+
+Scripts are run in-process by a pool of long-lived worker processes, so the interpreter is only
+imported once per worker rather than once per script, and each script is stopped after a timeout.
+A script passes when its output and errors match, and is unsupported when it fails to parse
+although it expects no compile errors, i.e. it uses a part of Lox which plox does not implement.
+The exit status is 1 when any script fails.
+"""
+import argparse
+import collections
+import contextlib
+import glob
+import io
+import logging
+import multiprocessing
+import os
+import re
+import signal
+import sys
+import time
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.bench import ENGINES
+from pylox.exceptions import CompileException
+
+LOX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "lox")
+
+EXPECTED_OUTPUT = re.compile(r"// expect: ?(.*)")
+EXPECTED_RUNTIME_ERROR = re.compile(r"// expect runtime error: (.+)")
+# compile errors may be tagged for one implementation; plox follows jlox
+EXPECTED_ERROR = re.compile(r"// (?:\[(?:java )?line \d+\] )?Error(?: at (?:'.*'|end))?: (.+)")
+
+PASS = "pass"
+FAIL = "fail"
+UNSUPPORTED = "unsupported"
+
+Expectations = collections.namedtuple("Expectations", ["output", "runtime_error", "errors"])
+Result = collections.namedtuple("Result", ["path", "status", "reason", "elapsed"])
+
+
+class Timeout(Exception):
+    pass
+
+
+def parse_expectations(source):
+    output = []
+    runtime_error = None
+    errors = []
+    for line in source.splitlines():
+        match = EXPECTED_OUTPUT.search(line)
+        if match:
+            output.append(match.group(1))
+            continue
+        match = EXPECTED_RUNTIME_ERROR.search(line)
+        if match:
+            runtime_error = match.group(1)
+            continue
+        match = EXPECTED_ERROR.search(line)
+        if match:
+            errors.append(match.group(1))
+    return Expectations(output, runtime_error, errors)
+
+
+def find_scripts(paths):
+    """Expands directories into the .lox files below them, skipping the benchmarks."""
+    scripts = []
+    for path in paths:
+        if os.path.isdir(path):
+            scripts.extend(p for p in glob.glob(os.path.join(path, "**", "*.lox"), recursive=True)
+                           if "benchmark" not in os.path.relpath(p, path).split(os.sep))
+        else:
+            scripts.append(path)
+    return sorted(scripts)
+
+
+def check(source, engine="tree"):
+    """Runs a script and checks it against its annotations, returning (status, reason)."""
+    expected = parse_expectations(source)
+    scanner = RegexScanner(source)
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser = Parser(scanner.scan_tokens())
+        statements = parser.parse()
+    errors = scanner.errors + [str(e) for e in parser.errors]
+    if errors:
+        if not expected.errors:
+            return UNSUPPORTED, "compile error: {}".format(errors[0])
+        missing = [e for e in expected.errors if e not in errors]
+        if missing:
+            # plox reports the right kind of error, but not for the construct the script tests
+            return UNSUPPORTED, "expected compile error: {}".format(missing[0])
+        return PASS, None
+    if expected.errors:
+        return FAIL, "expected compile error: {}".format(expected.errors[0])
+
+    runtime = ENGINES[engine]()
+    Resolver(runtime).resolve(statements)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        try:
+            runtime.interpret(statements)
+        except CompileException as e:
+            return UNSUPPORTED, "compile error: {}".format(e)
+    lines = output.getvalue().splitlines()
+    runtime_error = runtime.runtime_error
+    if runtime_error is not None:
+        # the engines report runtime errors on stdout as well
+        lines = lines[:-1]
+        if expected.runtime_error is None:
+            return FAIL, "unexpected runtime error: {}".format(runtime_error)
+        if str(runtime_error) != expected.runtime_error:
+            return FAIL, "expected runtime error '{}', got '{}'".format(expected.runtime_error, runtime_error)
+    elif expected.runtime_error is not None:
+        return FAIL, "expected runtime error: {}".format(expected.runtime_error)
+    for number, (want, got) in enumerate(zip(expected.output, lines), 1):
+        if want != got:
+            return FAIL, "output line {}: expected '{}', got '{}'".format(number, want, got)
+    if len(lines) != len(expected.output):
+        return FAIL, "expected {} lines of output, got {}".format(len(expected.output), len(lines))
+    return PASS, None
+
+
+def _raise_timeout(signum, frame):
+    raise Timeout()
+
+
+def run_script(path, engine="tree", timeout=5.0):
+    with open(path) as f:
+        source = f.read()
+    start = time.perf_counter()
+    alarm = hasattr(signal, "setitimer")
+    if alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        status, reason = check(source, engine)
+    except Timeout:
+        status, reason = FAIL, "timed out after {}s".format(timeout)
+    except Exception as e:
+        status, reason = FAIL, "{}: {}".format(type(e).__name__, e)
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return Result(path, status, reason, time.perf_counter() - start)
+
+
+def _init_worker():
+    # failures are reported in the results, not logged
+    logging.getLogger("pylox").setLevel(logging.CRITICAL)
+
+
+def _run_job(job):
+    return run_script(*job)
+
+
+def run_suite(scripts, jobs=None, engine="tree", timeout=5.0):
+    """Runs scripts across a pool of worker processes, returning their Results in path order."""
+    work = [(path, engine, timeout) for path in scripts]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(work) <= 1:
+        logger = logging.getLogger("pylox")
+        level = logger.level
+        _init_worker()
+        try:
+            return [_run_job(job) for job in work]
+        finally:
+            logger.setLevel(level)
+    # forked workers start with pylox already imported
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with context.Pool(jobs, initializer=_init_worker) as pool:
+        results = list(pool.imap_unordered(_run_job, work, chunksize=max(1, len(work) // (jobs * 8))))
+    return sorted(results, key=lambda r: r.path)
+
+
+def format_report(results, slowest=10, root=None):
+    def name(path):
+        return os.path.relpath(path, root) if root else path
+
+    counts = collections.Counter(r.status for r in results)
+    lines = []
+    for result in results:
+        if result.status == FAIL:
+            lines.append("FAIL {}: {}".format(name(result.path), result.reason))
+    if slowest:
+        lines.append("slowest scripts:")
+        for result in sorted(results, key=lambda r: r.elapsed, reverse=True)[:slowest]:
+            lines.append("  {:>8.4f}s {}".format(result.elapsed, name(result.path)))
+    lines.append("{} passed, {} failed, {} unsupported".format(counts[PASS], counts[FAIL], counts[UNSUPPORTED]))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pylox.conformance", description="Run the Lox test corpus")
+    parser.add_argument("paths", nargs="*", help="scripts or directories (default: the lox/ corpus)")
+    parser.add_argument("-j", "--jobs", dest="jobs", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument("--timeout", dest="timeout", type=float, default=5.0, help="seconds allowed per script")
+    parser.add_argument("--engine", dest="engine", choices=sorted(ENGINES), default="tree")
+    parser.add_argument("--slowest", dest="slowest", type=int, default=10, help="number of slowest scripts to list")
+    parser.add_argument("--unsupported", dest="unsupported", action="store_true",
+                        help="also list unsupported scripts and why")
+    args = parser.parse_args(argv)
+
+    scripts = find_scripts(args.paths or [LOX_DIR])
+    start = time.perf_counter()
+    results = run_suite(scripts, args.jobs, args.engine, args.timeout)
+    elapsed = time.perf_counter() - start
+    root = None if args.paths else LOX_DIR
+    if args.unsupported:
+        for result in results:
+            if result.status == UNSUPPORTED:
+                print("UNSUPPORTED {}: {}".format(os.path.relpath(result.path, root) if root else result.path,
+                                                  result.reason))
+    print(format_report(results, args.slowest, root))
+    print("ran {} scripts in {:.2f}s".format(len(results), elapsed))
+    return 1 if any(r.status == FAIL for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
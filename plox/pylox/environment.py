@@ -1,30 +1,69 @@
-import logging
-
 from pylox.exceptions import RuntimeException
 
 
-logger = logging.getLogger("pylox.environment")
+# marks a slot whose variable has been resolved but not yet defined at runtime
+UNDEFINED = object()
 
 
 class Environment(object):
-    """Runtime environment which stores/updates named variables throughout the lifetime of a lox execution."""
-    def __init__(self):
-        self.values = {}
+    """
+    Runtime environment which stores/updates variables throughout the lifetime of a lox execution.
+
+    Values live in a list indexed by the slots the Resolver assigns. Local environments are created
+    with a fixed number of slots, while the global environment grows as new names are declared and
+    keeps a name -> slot map for lookups on unresolved nodes.
+    """
+    def __init__(self, enclosing=None, size=0):
+        self.enclosing = enclosing
+        self.slots = [UNDEFINED] * size
+        self.names = {}
+
+    def slot(self, name):
+        """Returns the slot bound to the given lexeme, allocating a new one if needed."""
+        slot = self.names.get(name)
+        if slot is None:
+            slot = len(self.slots)
+            self.names[name] = slot
+            self.slots.append(UNDEFINED)
+        return slot
 
     def define(self, name, value):
-        logger.debug("Defining var '{}' := {}".format(name, value))
-        self.values[name] = value
+        self.slots[self.slot(name)] = value
 
     def get(self, name):
-        if name.lexeme in self.values:
-            return self.values[name.lexeme]
-        raise RuntimeException(name.lexeme, "Undefined variable '{}'.".format(name.lexeme))
+        slot = self.names.get(name.lexeme)
+        if slot is not None and self.slots[slot] is not UNDEFINED:
+            return self.slots[slot]
+        raise RuntimeException(name.lexeme, "Undefined variable '{}'.".format(name.lexeme), line=name.line)
 
     def assign(self, name, value):
-        if name.lexeme in self.values:
-            self.values[name.lexeme] = value
+        slot = self.names.get(name.lexeme)
+        if slot is not None and self.slots[slot] is not UNDEFINED:
+            self.slots[slot] = value
             return
-        raise RuntimeError("Undefined variable '{}'".format(name.lexeme))
+        raise RuntimeException(name.lexeme, "Undefined variable '{}'.".format(name.lexeme), line=name.line)
+
+    def ancestor(self, depth):
+        environment = self
+        for _ in range(depth):
+            environment = environment.enclosing
+        return environment
+
+    def get_at(self, depth, slot, name):
+        value = self.ancestor(depth).slots[slot]
+        if value is UNDEFINED:
+            raise RuntimeException(name.lexeme, "Undefined variable '{}'.".format(name.lexeme), line=name.line)
+        return value
+
+    def assign_at(self, depth, slot, name, value):
+        slots = self.ancestor(depth).slots
+        if slots[slot] is UNDEFINED:
+            raise RuntimeException(name.lexeme, "Undefined variable '{}'.".format(name.lexeme), line=name.line)
+        slots[slot] = value
+
+    @property
+    def values(self):
+        return {name: self.slots[slot] for name, slot in self.names.items() if self.slots[slot] is not UNDEFINED}
 
     def __repr__(self):
         return "Environment({})".format(self.values)
@@ -1,4 +1,20 @@
 class RuntimeException(Exception):
-    def __init__(self, token, message):
+    def __init__(self, token, message, line=None):
         super().__init__(message)
         self.token = token
+        self.line = line if line is not None else getattr(token, "line", None)
+
+
+def as_lox_error(error):
+    """Returns the error to report for an exception raised by a running program."""
+    # the recursive engines run out of Python stack where the stackless one reports a stack overflow
+    if type(error) is RecursionError:
+        return RuntimeException(None, "Stack overflow.")
+    return error
+
+
+class CompileException(Exception):
+    def __init__(self, message, errors=()):
+        super().__init__(message)
+        # the individual errors, e.g. every syntax error of a program
+        self.errors = list(errors)
@@ -1,85 +1,211 @@
 class Expr(object):
+    __slots__ = ()
+
     def accept(self, visitor):
         return visitor.visit(self)
 
 
 class Stmt(object):
+    __slots__ = ()
+
     def accept(self, visitor):
         return visitor.visit(self)
 
 
 class Assign(Expr):
+    __slots__ = ("name", "value", "depth", "slot")
+    kind = 0
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
+        self.depth = None
+        self.slot = None
+
+    def __eq__(self, other):
+        return (isinstance(other, Assign) and
+                self.name == other.name and
+                self.value == other.value)
+
+    def __hash__(self):
+        return hash((Assign, self.name, self.value))
 
     def __repr__(self):
         return "Assign({}, {})".format(self.name, self.value)
 
 
 class BinaryExpr(Expr):
+    __slots__ = ("left", "operator", "right")
+    kind = 1
+
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
         self.right = right
 
+    def __eq__(self, other):
+        return (isinstance(other, BinaryExpr) and
+                self.left == other.left and
+                self.operator == other.operator and
+                self.right == other.right)
+
+    def __hash__(self):
+        return hash((BinaryExpr, self.left, self.operator, self.right))
+
     def __repr__(self):
         return "BinaryExpr({}, {}, {})".format(self.left, self.operator, self.right)
 
 
 class UnaryExpr(Expr):
+    __slots__ = ("operator", "right")
+    kind = 2
+
     def __init__(self, operator, right):
         self.operator = operator
         self.right = right
 
+    def __eq__(self, other):
+        return (isinstance(other, UnaryExpr) and
+                self.operator == other.operator and
+                self.right == other.right)
+
+    def __hash__(self):
+        return hash((UnaryExpr, self.operator, self.right))
+
     def __repr__(self):
         return "UnaryExpr({}, {})".format(self.operator, self.right)
 
 
 class LiteralExpr(Expr):
+    __slots__ = ("value",)
+    kind = 3
+
     def __init__(self, value):
         self.value = value
 
+    def __eq__(self, other):
+        return (isinstance(other, LiteralExpr) and
+                self.value == other.value)
+
+    def __hash__(self):
+        return hash((LiteralExpr, self.value))
+
     def __repr__(self):
         return "LiteralExpr({})".format(self.value)
 
 
 class GroupingExpr(Expr):
+    __slots__ = ("expression",)
+    kind = 4
+
     def __init__(self, expression):
         self.expression = expression
 
+    def __eq__(self, other):
+        return (isinstance(other, GroupingExpr) and
+                self.expression == other.expression)
+
+    def __hash__(self):
+        return hash((GroupingExpr, self.expression))
+
     def __repr__(self):
         return "GroupingExpr({})".format(self.expression)
 
 
 class Variable(Expr):
+    __slots__ = ("name", "depth", "slot")
+    kind = 5
+
     def __init__(self, name):
         self.name = name
+        self.depth = None
+        self.slot = None
+
+    def __eq__(self, other):
+        return (isinstance(other, Variable) and
+                self.name == other.name)
+
+    def __hash__(self):
+        return hash((Variable, self.name))
 
     def __repr__(self):
         return "Variable({})".format(self.name)
 
 
 class Expression(Stmt):
+    __slots__ = ("expression",)
+    kind = 6
+
     def __init__(self, expression):
         self.expression = expression
 
+    def __eq__(self, other):
+        return (isinstance(other, Expression) and
+                self.expression == other.expression)
+
+    def __hash__(self):
+        return hash((Expression, self.expression))
+
     def __repr__(self):
         return "Expression({})".format(self.expression)
 
 
 class Print(Stmt):
+    __slots__ = ("expression",)
+    kind = 7
+
     def __init__(self, expression):
         self.expression = expression
 
+    def __eq__(self, other):
+        return (isinstance(other, Print) and
+                self.expression == other.expression)
+
+    def __hash__(self):
+        return hash((Print, self.expression))
+
     def __repr__(self):
         return "Print({})".format(self.expression)
 
 
 class Var(Stmt):
+    __slots__ = ("name", "initializer", "slot")
+    kind = 8
+
     def __init__(self, name, initializer):
         self.name = name
         self.initializer = initializer
+        self.slot = None
+
+    def __eq__(self, other):
+        return (isinstance(other, Var) and
+                self.name == other.name and
+                self.initializer == other.initializer)
+
+    def __hash__(self):
+        return hash((Var, self.name, self.initializer))
 
     def __repr__(self):
         return "Var({}, {})".format(self.name, self.initializer)
+
+
+class Import(Stmt):
+    __slots__ = ("path",)
+    kind = 9
+
+    def __init__(self, path):
+        self.path = path
+
+    def __eq__(self, other):
+        return (isinstance(other, Import) and
+                self.path == other.path)
+
+    def __hash__(self):
+        return hash((Import, self.path))
+
+    def __repr__(self):
+        return "Import({})".format(self.path)
+
+
+# number of node kinds, for tables indexed by kind
+KIND_COUNT = 10
@@ -0,0 +1,301 @@
+"""
+Flat, struct-of-arrays representation of parsed programs, for very large (e.g. machine-generated)
+scripts.
+
+A FlatProgram keeps every node as an index into parallel array columns instead of an object:
+
+    kinds       node kind, as in pylox.expressions (BinaryExpr.kind, ...)
+    left        first child: left operand, operand, grouped expression, assigned value, statement
+                expression or variable initializer; -1 for none
+    right       right operand of a binary expression; -1 for none
+    tokens      operator, variable name or module path token; -1 for none
+    constants   index of a literal's value or module path in the values list; -1 for none
+
+Only the tokens referred to by nodes are kept, in columns of their own (token type, line and the
+index of the lexeme in a list of distinct lexemes). A node takes 17 bytes and a token 9, against
+several hundred bytes for node objects and their Tokens.
+
+    program = FlatParser(tokens).parse()
+    interpreter.interpret_flat(program)
+
+The Interpreter walks the columns directly. A FlatProgram is also a sequence of object
+statements, built on demand from the columns, for tooling and tests; those statements are
+unresolved, so they look up globals by name.
+"""
+from array import array
+
+from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Print, Expression, Var, Variable, \
+    Assign, Import, KIND_COUNT
+from pylox.parser import Parser
+from pylox.tokens import Token, TokenType
+from pylox.exceptions import RuntimeException
+from pylox.environment import UNDEFINED
+from pylox.number import NUMBER_TYPES, OPERATORS as NUMBER_OPERATORS, negate
+
+NONE = -1
+
+
+class FlatProgram(object):
+    """Parsed statements as node columns; see the module documentation."""
+    def __init__(self):
+        self.kinds = array("B")
+        self.left = array("i")
+        self.right = array("i")
+        self.tokens = array("i")
+        self.constants = array("i")
+        # top-level statements, as node indices
+        self.statements = array("i")
+        self.token_types = array("B")
+        self.token_lines = array("i")
+        self.token_lexemes = array("i")
+        self.lexemes = []
+        self.values = []
+
+    def add(self, kind, left=NONE, right=NONE, token=NONE, constant=NONE):
+        """Appends a node, returning its index."""
+        self.kinds.append(kind)
+        self.left.append(left)
+        self.right.append(right)
+        self.tokens.append(token)
+        self.constants.append(constant)
+        return len(self.kinds) - 1
+
+    def add_token(self, token_type, lexeme, line):
+        """Appends a token whose lexeme is lexemes[lexeme], returning its index."""
+        self.token_types.append(token_type)
+        self.token_lines.append(line)
+        self.token_lexemes.append(lexeme)
+        return len(self.token_types) - 1
+
+    def token(self, index):
+        """Builds the Token stored at index."""
+        return Token(self.token_types[index], self.lexemes[self.token_lexemes[index]], None, self.token_lines[index])
+
+    @property
+    def node_count(self):
+        return len(self.kinds)
+
+    def node(self, index):
+        """Builds the object AST of the node at index."""
+        kind = self.kinds[index]
+        if kind == BinaryExpr.kind:
+            return BinaryExpr(self.node(self.left[index]), self.token(self.tokens[index]),
+                              self.node(self.right[index]))
+        if kind == UnaryExpr.kind:
+            return UnaryExpr(self.token(self.tokens[index]), self.node(self.left[index]))
+        if kind == LiteralExpr.kind:
+            return LiteralExpr(self.values[self.constants[index]])
+        if kind == GroupingExpr.kind:
+            return GroupingExpr(self.node(self.left[index]))
+        if kind == Variable.kind:
+            return Variable(self.token(self.tokens[index]))
+        if kind == Assign.kind:
+            return Assign(self.token(self.tokens[index]), self.node(self.left[index]))
+        if kind == Print.kind:
+            return Print(self.node(self.left[index]))
+        if kind == Expression.kind:
+            return Expression(self.node(self.left[index]))
+        if kind == Var.kind:
+            initializer = self.left[index]
+            return Var(self.token(self.tokens[index]), None if initializer == NONE else self.node(initializer))
+        if kind == Import.kind:
+            path = self.token(self.tokens[index])
+            path.literal = self.values[self.constants[index]]
+            return Import(path)
+        raise ValueError("Unknown node kind {}".format(kind))
+
+    def __len__(self):
+        return len(self.statements)
+
+    def __getitem__(self, index):
+        return self.node(self.statements[index])
+
+    def __iter__(self):
+        for stmt in self.statements:
+            yield self.node(stmt)
+
+
+class FlatParser(Parser):
+    """Parser building a FlatProgram; its nodes are indices into the program's columns."""
+    def __init__(self, tokens, verbose=False):
+        super().__init__(tokens, verbose)
+        self.program = FlatProgram()
+        # indices of the distinct lexemes and literal values, which only the parser needs
+        self._lexemes = {}
+        self._values = {}
+
+    def parse(self):
+        """Returns the FlatProgram; statements which failed to parse are left out, see errors."""
+        for stmt in self.parse_iter():
+            if stmt is not None:
+                self.program.statements.append(stmt)
+        return self.program
+
+    def _token(self, token):
+        lexeme = self._lexemes.get(token.lexeme)
+        if lexeme is None:
+            lexeme = self._lexemes[token.lexeme] = len(self.program.lexemes)
+            self.program.lexemes.append(token.lexeme)
+        return self.program.add_token(token.token_type, lexeme, token.line)
+
+    def _value(self, value):
+        # keyed by type as well, since 1 == 1.0 == True would otherwise share a constant
+        key = (type(value), value)
+        index = self._values.get(key)
+        if index is None:
+            index = self._values[key] = len(self.program.values)
+            self.program.values.append(value)
+        return index
+
+    def _binary(self, left, operator, right):
+        return self.program.add(BinaryExpr.kind, left, right, self._token(operator))
+
+    def _unary(self, operator, right):
+        return self.program.add(UnaryExpr.kind, right, token=self._token(operator))
+
+    def _literal(self, value):
+        return self.program.add(LiteralExpr.kind, constant=self._value(value))
+
+    def _grouping(self, expr):
+        return self.program.add(GroupingExpr.kind, expr)
+
+    def _variable(self, name):
+        return self.program.add(Variable.kind, token=self._token(name))
+
+    def _assignment_target(self, expr):
+        # the variable node itself, which _assign turns into the assignment
+        return expr if type(expr) is int and self.program.kinds[expr] == Variable.kind else None
+
+    def _assign(self, target, value):
+        # the variable node becomes the assignment, keeping its name token
+        self.program.kinds[target] = Assign.kind
+        self.program.left[target] = value
+        return target
+
+    def _print(self, expr):
+        return self.program.add(Print.kind, expr)
+
+    def _expression(self, expr):
+        return self.program.add(Expression.kind, expr)
+
+    def _var(self, name, initializer):
+        return self.program.add(Var.kind, NONE if initializer is None else initializer,
+                                token=self._token(name))
+
+    def _import(self, path):
+        return self.program.add(Import.kind, token=self._token(path), constant=self._value(path.literal))
+
+
+def _undefined(name, line):
+    return RuntimeException(name, "Undefined variable '{}'.".format(name), line=line)
+
+
+def walk(interpreter, program):
+    """
+    Executes a FlatProgram's statements in the interpreter's global environment. Numbers take a
+    fast path; everything else, including every runtime error, goes through the Interpreter's
+    own operators, with the node's token built on demand.
+    """
+    kinds = program.kinds
+    left = program.left
+    right = program.right
+    tokens = program.tokens
+    constants = program.constants
+    values = program.values
+    token_types = program.token_types
+    token_lexemes = program.token_lexemes
+    lexemes = program.lexemes
+    environment = interpreter.globals
+    slots = environment.slots
+    output = interpreter.output
+    importer = interpreter.importer
+    token_lines = program.token_lines
+    binary_operator = interpreter._binary
+    unary_operator = interpreter._unary
+    number_operators = NUMBER_OPERATORS
+
+    # global slot of every lexeme used as a variable name: declared names get theirs up front, others
+    # once they are found defined (e.g. by an import), so undefined names never grow the globals
+    lexeme_slots = [NONE] * len(lexemes)
+    for node, kind in enumerate(kinds):
+        if kind == Var.kind:
+            lexeme = token_lexemes[tokens[node]]
+            if lexeme_slots[lexeme] == NONE:
+                lexeme_slots[lexeme] = environment.slot(lexemes[lexeme])
+
+    def slot(lexeme):
+        index = lexeme_slots[lexeme]
+        if index == NONE:
+            index = environment.names.get(lexemes[lexeme], NONE)
+            lexeme_slots[lexeme] = index
+        return index
+
+    def evaluate(node):
+        return visitors[kinds[node]](node)
+
+    def binary(node):
+        a = evaluate(left[node])
+        b = evaluate(right[node])
+        token = tokens[node]
+        operation = number_operators[token_types[token]]
+        if type(a) in NUMBER_TYPES and type(b) in NUMBER_TYPES and operation is not None:
+            return operation(a, b)
+        return binary_operator(program.token(token), a, b)
+
+    def unary(node):
+        value = evaluate(left[node])
+        token = tokens[node]
+        if token_types[token] == TokenType.MINUS and type(value) in NUMBER_TYPES:
+            return negate(value)
+        return unary_operator(program.token(token), value)
+
+    def literal(node):
+        return values[constants[node]]
+
+    def grouping(node):
+        return evaluate(left[node])
+
+    def variable(node):
+        lexeme = token_lexemes[tokens[node]]
+        index = slot(lexeme)
+        value = UNDEFINED if index == NONE else slots[index]
+        if value is UNDEFINED:
+            raise _undefined(lexemes[lexeme], token_lines[tokens[node]])
+        return value
+
+    def assign(node):
+        value = evaluate(left[node])
+        lexeme = token_lexemes[tokens[node]]
+        index = slot(lexeme)
+        if index == NONE or slots[index] is UNDEFINED:
+            raise _undefined(lexemes[lexeme], token_lines[tokens[node]])
+        slots[index] = value
+        return value
+
+    def print_stmt(node):
+        output.print(evaluate(left[node]))
+
+    def expression_stmt(node):
+        evaluate(left[node])
+
+    def var_stmt(node):
+        initializer = left[node]
+        slots[lexeme_slots[token_lexemes[tokens[node]]]] = None if initializer == NONE else evaluate(initializer)
+
+    def import_stmt(node):
+        importer.import_into(environment, values[constants[node]], output, token_lines[tokens[node]])
+
+    visitors = [None] * KIND_COUNT
+    visitors[BinaryExpr.kind] = binary
+    visitors[UnaryExpr.kind] = unary
+    visitors[LiteralExpr.kind] = literal
+    visitors[GroupingExpr.kind] = grouping
+    visitors[Variable.kind] = variable
+    visitors[Assign.kind] = assign
+    visitors[Print.kind] = print_stmt
+    visitors[Expression.kind] = expression_stmt
+    visitors[Var.kind] = var_stmt
+    visitors[Import.kind] = import_stmt
+
+    for stmt in program.statements:
+        visitors[kinds[stmt]](stmt)
@@ -1,47 +1,165 @@
+import asyncio
+import collections
 import logging
 
-from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Print, Expression, Var, Variable, Assign
+from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Print, Expression, Var, Variable, \
+    Assign, Import
+from pylox import quicken as quickening
+from pylox import flat
 from pylox.tokens import TokenType
-from pylox.exceptions import RuntimeException
-from pylox.environment import Environment
+from pylox.exceptions import RuntimeException, as_lox_error
+from pylox.environment import Environment, UNDEFINED
+from pylox.closure_compiler import ClosureCompiler
+from pylox.output import BufferedSink
+from pylox.rope import STRING_TYPES, concat
+from pylox.number import NUMBER_TYPES, OPERATORS as NUMBER_OPERATORS, negate
+from pylox.module import Importer
+from pylox.parser import StacklessParser
 
 logger = logging.getLogger("pylox.interpreter")
 
+# statements interpret_async executes between yields to the event loop
+DEFAULT_QUANTUM = 100
+
+# operators stackless evaluation may leave waiting for their operands at once
+DEFAULT_MAX_DEPTH = 1000000
+
+# marks, on the stackless evaluator's work stack, that the node below it has its operands
+_APPLY = object()
+
 
 class Interpreter(object):
-    def __init__(self):
-        self.environment = Environment()
+    """
+    Tree-walking interpreter. With quicken, binary and unary expressions rewrite themselves on
+    their first evaluation into variants specialized for the operand types they saw; see
+    pylox.quicken. This only pays off for nodes which are evaluated many times: the first
+    evaluation gets slower. The number of nodes specialized to each variant, and of specialized
+    nodes whose guard later failed, are counted in specializations and deoptimizations.
+
+    Printed values go to the output sink (see pylox.output), by default a BufferedSink writing to
+    sys.stdout. The sink is flushed whenever interpret returns or raises.
+
+    Import statements run modules through the importer (see pylox.module), which keeps every
+    module this interpreter has imported.
+
+    With stackless, expressions are evaluated from an explicit work stack instead of by recursion,
+    so their nesting is only limited by max_depth, the number of operators which may be waiting
+    for their operands at once; beyond it evaluation stops with "Stack overflow.". Parse such
+    programs with pylox.parser.StacklessParser; the default importer parses and runs modules that
+    way too. The recursive modes report running out of Python stack with the same error.
+    """
+    def __init__(self, compiled=False, quicken=False, output=None, importer=None, stackless=False,
+                 max_depth=DEFAULT_MAX_DEPTH):
+        if stackless and (compiled or quicken):
+            raise ValueError("stackless evaluation cannot be combined with compiled or quicken")
+        self.globals = Environment()
+        self.environment = self.globals
+        self.compiled = compiled
+        self.compiler = ClosureCompiler(self)
+        self.quicken = quicken
+        self.stackless = stackless
+        self.max_depth = max_depth
+        self.output = BufferedSink() if output is None else output
+        if importer is None and stackless:
+            # modules are parsed and evaluated the same way as the program importing them
+            importer = Importer(parser_class=StacklessParser,
+                                interpreter_options={"stackless": True, "max_depth": max_depth})
+        self.importer = Importer() if importer is None else importer
+        self.specializations = collections.Counter()
+        self.deoptimizations = collections.Counter()
+        # the error which stopped the last call to interpret, if any
+        self.runtime_error = None
+        # visit methods indexed by node kind
+        self._visitors = [None] * quickening.KIND_COUNT
+        self._visitors[BinaryExpr.kind] = self._visit_binary_expr
+        self._visitors[UnaryExpr.kind] = self._visit_unary_expr
+        self._visitors[LiteralExpr.kind] = self._visit_literal_expr
+        self._visitors[GroupingExpr.kind] = self._visit_grouping_expr
+        self._visitors[Print.kind] = self._visit_print_stmt
+        self._visitors[Expression.kind] = self._visit_expression_stmt
+        self._visitors[Var.kind] = self._visit_var_stmt
+        self._visitors[Variable.kind] = self._visit_variable_expr
+        self._visitors[Assign.kind] = self._visit_assign_expr
+        self._visitors[Import.kind] = self._visit_import_stmt
+        self._visitors[quickening.PolymorphicBinaryExpr.kind] = self._visit_polymorphic_binary_expr
+        self._visitors[quickening.PolymorphicUnaryExpr.kind] = self._visit_polymorphic_unary_expr
+        for kind, visitor in quickening.binary_visitors(self).items():
+            self._visitors[kind] = visitor
+        for kind, visitor in quickening.unary_visitors(self).items():
+            self._visitors[kind] = visitor
+
+    def instrument(self, wrapper):
+        """
+        Replaces every visit method with wrapper(method), e.g. to profile or trace execution. Only
+        the tree-walker is instrumented; compiled statements fall back to it for unknown nodes only.
+        """
+        # updated in place, since specialized visitors hold on to the table
+        self._visitors[:] = [None if visitor is None else wrapper(visitor) for visitor in self._visitors]
 
     def interpret(self, statements):
+        self.runtime_error = None
+        try:
+            if self.compiled:
+                for stmt in self.compiler.compile_iter(statements):
+                    stmt()
+            else:
+                execute = self._execute_stackless if self.stackless else self._execute
+                for stmt in statements:
+                    execute(stmt)
+        except Exception as e:
+            self._report(e)
+        finally:
+            self.output.flush()
+
+    def interpret_flat(self, program):
+        """Runs a FlatProgram (see pylox.flat) by walking its node columns, without building node objects."""
+        self.runtime_error = None
         try:
-            for stmt in statements:
-                self._execute(stmt)
+            flat.walk(self, program)
         except Exception as e:
-            logger.error("Runtime Exception: {}".format(e))
-            print("Runtime Exception: {}".format(e))
+            self._report(e)
+        finally:
+            self.output.flush()
+
+    async def interpret_async(self, statements, quantum=DEFAULT_QUANTUM):
+        """
+        Like interpret, but yields to the event loop after every quantum statements, so that many
+        programs can take turns in one thread. See pylox.scheduler.
+        """
+        self.runtime_error = None
+        steps = 0
+        try:
+            if self.compiled:
+                for stmt in self.compiler.compile_iter(statements):
+                    stmt()
+                    steps += 1
+                    if steps == quantum:
+                        steps = 0
+                        await asyncio.sleep(0)
+            else:
+                execute = self._execute_stackless if self.stackless else self._execute
+                for stmt in statements:
+                    execute(stmt)
+                    steps += 1
+                    if steps == quantum:
+                        steps = 0
+                        await asyncio.sleep(0)
+        except Exception as e:
+            self._report(e)
+        finally:
+            self.output.flush()
+
+    def _report(self, error):
+        error = as_lox_error(error)
+        self.runtime_error = error
+        logger.error("Runtime Exception: {}".format(error))
+        self.output.write("Runtime Exception: {}\n".format(error))
 
     def evaluate(self, expr):
         return expr.accept(self)
 
     def visit(self, expr):
-        if isinstance(expr, BinaryExpr):
-            return self._visit_binary_expr(expr)
-        elif isinstance(expr, UnaryExpr):
-            return self._visit_unary_expr(expr)
-        elif isinstance(expr, LiteralExpr):
-            return self._visit_literal_expr(expr)
-        elif isinstance(expr, GroupingExpr):
-            return self._visit_grouping_expr(expr)
-        elif isinstance(expr, Print):
-            return self._visit_print_stmt(expr)
-        elif isinstance(expr, Expression):
-            return self._visit_expression_stmt(expr)
-        elif isinstance(expr, Var):
-            return self._visit_var_stmt(expr)
-        elif isinstance(expr, Variable):
-            return self._visit_variable_expr(expr)
-        elif isinstance(expr, Assign):
-            return self._visit_assign_expr(expr)
+        return self._visitors[expr.kind](expr)
 
     def _visit_literal_expr(self, expr):
         return expr.value
@@ -51,41 +169,76 @@ class Interpreter(object):
 
     def _visit_unary_expr(self, expr):
         right = self.evaluate(expr.right)
-        if expr.operator.token_type == TokenType.MINUS:
-            self._check_number_operand(expr.operator, right)
-            return -1 * right
-        if expr.operator.token_type == TokenType.BANG:
+        value = self._unary(expr.operator, right)
+        if self.quicken:
+            self.specializations[quickening.specialize_unary(expr, right).__name__] += 1
+        return value
+
+    def _visit_polymorphic_unary_expr(self, expr):
+        return self._unary(expr.operator, self.evaluate(expr.right))
+
+    def _deoptimize_unary(self, expr, right):
+        """Called by a specialized unary expression whose guard failed."""
+        self.deoptimizations[type(expr).__name__] += 1
+        expr.__class__ = quickening.PolymorphicUnaryExpr
+        return self._unary(expr.operator, right)
+
+    def _unary(self, operator, right):
+        if operator.token_type == TokenType.MINUS:
+            self._check_number_operand(operator, right)
+            return negate(right)
+        if operator.token_type == TokenType.BANG:
             return not self._is_truthy(right)
         return None
 
     def _visit_binary_expr(self, expr):
         left = self.evaluate(expr.left)
         right = self.evaluate(expr.right)
-        operator_type = expr.operator.token_type
+        value = self._binary(expr.operator, left, right)
+        # specialized only once the operation succeeded, so errors are always raised on the generic path
+        if self.quicken:
+            self.specializations[quickening.specialize_binary(expr, left, right).__name__] += 1
+        return value
+
+    def _visit_polymorphic_binary_expr(self, expr):
+        left = self.evaluate(expr.left)
+        return self._binary(expr.operator, left, self.evaluate(expr.right))
+
+    def _deoptimize_binary(self, expr, left, right):
+        """Called by a specialized binary expression whose guard failed."""
+        self.deoptimizations[type(expr).__name__] += 1
+        expr.__class__ = quickening.PolymorphicBinaryExpr
+        return self._binary(expr.operator, left, right)
+
+    def _binary(self, operator, left, right):
+        operator_type = operator.token_type
         if operator_type == TokenType.GREATER:
-            self._check_number_operands(expr.operator, left, right)
+            self._check_number_operands(operator, left, right)
             return left > right
         if operator_type == TokenType.GREATER_EQUAL:
-            self._check_number_operands(expr.operator, left, right)
+            self._check_number_operands(operator, left, right)
             return left >= right
         if operator_type == TokenType.LESS:
-            self._check_number_operands(expr.operator, left, right)
+            self._check_number_operands(operator, left, right)
             return left < right
         if operator_type == TokenType.LESS_EQUAL:
-            self._check_number_operands(expr.operator, left, right)
+            self._check_number_operands(operator, left, right)
             return left <= right
         if operator_type == TokenType.MINUS:
-            self._check_number_operands(expr.operator, left, right)
+            self._check_number_operands(operator, left, right)
             return left - right
         if operator_type == TokenType.SLASH:
-            self._check_number_operands(expr.operator, left, right)
+            self._check_number_operands(operator, left, right)
             return left / right
         if operator_type == TokenType.STAR:
-            self._check_number_operands(expr.operator, left, right)
+            self._check_number_operands(operator, left, right)
             return left * right
         if operator_type == TokenType.PLUS:
-            self._check_number_operands(expr.operator, left, right)
-            return left + right
+            if type(left) in NUMBER_TYPES and type(right) in NUMBER_TYPES:
+                return left + right
+            if type(left) in STRING_TYPES and type(right) in STRING_TYPES:
+                return concat(left, right)
+            raise RuntimeException(operator, "Operands must be two numbers or two strings.")
         if operator_type == TokenType.EQUAL_EQUAL:
             return self._is_equal(left, right)
         if operator_type == TokenType.BANG_EQUAL:
@@ -97,8 +250,7 @@ class Interpreter(object):
         return None
 
     def _visit_print_stmt(self, stmt):
-        value = self.evaluate(stmt.expression)
-        print(value)
+        self.output.print(self.evaluate(stmt.expression))
         return None
 
     def _visit_var_stmt(self, stmt):
@@ -106,25 +258,122 @@ class Interpreter(object):
             value = self.evaluate(stmt.initializer)
         else:
             value = None
-        self.environment.define(stmt.name.lexeme, value)
+        self._define(stmt, value)
+        return None
+
+    def _define(self, stmt, value):
+        if stmt.slot is None:
+            self.environment.define(stmt.name.lexeme, value)
+        else:
+            self.environment.slots[stmt.slot] = value
+
+    def _visit_import_stmt(self, stmt):
+        self.importer.import_into(self.globals, stmt.path.literal, self.output, stmt.path.line)
         return None
 
     def _visit_variable_expr(self, expr):
-        return self.environment.get(expr.name)
+        if expr.slot is None:
+            return self.environment.get(expr.name)
+        return self.environment.get_at(expr.depth, expr.slot, expr.name)
 
     def _visit_assign_expr(self, expr):
         value = self.evaluate(expr.value)
-        self.environment.assign(expr.name, value)
+        self._assign(expr, value)
         return value
 
+    def _assign(self, expr, value):
+        if expr.slot is None:
+            self.environment.assign(expr.name, value)
+        else:
+            self.environment.assign_at(expr.depth, expr.slot, expr.name, value)
+
     def _execute(self, stmt):
         return stmt.accept(self)
 
+    def _execute_stackless(self, stmt):
+        kind = stmt.kind
+        if kind == Print.kind:
+            self.output.print(self._evaluate_stackless(stmt.expression))
+        elif kind == Expression.kind:
+            self._evaluate_stackless(stmt.expression)
+        elif kind == Var.kind:
+            self._define(stmt, None if stmt.initializer is None else self._evaluate_stackless(stmt.initializer))
+        else:
+            self._execute(stmt)
+
+    def _evaluate_stackless(self, expr):
+        """
+        Evaluates expr without recursion. Nodes are popped from a work stack: leaves push their
+        value, and operators push themselves under an _APPLY mark and then their operands, so that
+        they are applied to the operand values once those have been computed.
+        """
+        work = [expr]
+        take = work.pop
+        values = []
+        push = values.append
+        pop = values.pop
+        # operators waiting for their operands
+        depth = 0
+        max_depth = self.max_depth
+        slots = self.environment.slots
+        number_operators = NUMBER_OPERATORS
+        BINARY = BinaryExpr.kind
+        UNARY = UnaryExpr.kind
+        LITERAL = LiteralExpr.kind
+        GROUPING = GroupingExpr.kind
+        VARIABLE = Variable.kind
+        ASSIGN = Assign.kind
+
+        while work:
+            node = take()
+            if node is _APPLY:
+                node = take()
+                depth -= 1
+                kind = node.kind
+                if kind == BINARY:
+                    right = pop()
+                    left = values[-1]
+                    operator = node.operator
+                    operation = number_operators[operator.token_type]
+                    if type(left) in NUMBER_TYPES and type(right) in NUMBER_TYPES and operation is not None:
+                        values[-1] = operation(left, right)
+                    else:
+                        values[-1] = self._binary(operator, left, right)
+                elif kind == UNARY:
+                    values[-1] = self._unary(node.operator, values[-1])
+                else:
+                    self._assign(node, values[-1])
+                continue
+
+            kind = node.kind
+            if kind == LITERAL:
+                push(node.value)
+            elif kind == VARIABLE:
+                # variables of the current environment are read directly, others (and errors) as usual
+                value = slots[node.slot] if node.depth == 0 else UNDEFINED
+                push(self._visit_variable_expr(node) if value is UNDEFINED else value)
+            elif kind == GROUPING:
+                work.append(node.expression)
+            else:
+                if kind == BINARY:
+                    work += (node, _APPLY, node.right, node.left)
+                elif kind == UNARY:
+                    work += (node, _APPLY, node.right)
+                elif kind == ASSIGN:
+                    work += (node, _APPLY, node.value)
+                else:
+                    push(self.evaluate(node))
+                    continue
+                depth += 1
+                if depth > max_depth:
+                    raise RuntimeException(node.name if kind == ASSIGN else node.operator, "Stack overflow.")
+        return values[0]
+
     def _is_truthy(self, obj):
         if obj is None:
             return False
         if isinstance(obj, bool):
-            return
+            return obj
         return True
 
     def _is_equal(self, obj1, obj2):
@@ -135,11 +384,11 @@ class Interpreter(object):
         return obj1 == obj2
 
     def _check_number_operand(self, operator, operand):
-        if type(operand) == float:
+        if type(operand) in NUMBER_TYPES:
             return
         raise RuntimeException(operator, "Operand must be a number.")
 
     def _check_number_operands(self, operator, left, right):
-        if type(left) == float and type(right) == float:
+        if type(left) in NUMBER_TYPES and type(right) in NUMBER_TYPES:
             return
         raise RuntimeException(operator, "Operands must be numbers.")
@@ -0,0 +1,176 @@
+"""
+Lox modules.
+
+    import "util/constants.lox";
+
+runs the module file once per interpreter, in a global environment of its own, the module's
+namespace, and then defines the module's top-level variables in the importing program's globals.
+plox has no property access, so the namespace itself cannot be named from Lox; importing the
+module again in the same interpreter copies the values from its namespace again, without
+running it.
+
+A module path is looked up relative to the directory of the importing module (for the main
+program, the Importer's directory, if any), then in each directory of the search path: the
+current directory and those listed in $LOXPATH by default. A module which imports itself,
+directly or through other modules, is an error.
+
+Modules are parsed and resolved once per process: the module cache keeps them by absolute path
+(and parser class), and reloads a module only when its file's modification time or size changes.
+Importing a cached module costs a stat of its file and running its statements.
+
+Modules are parsed and run like the importing program: a stackless Interpreter creates an Importer
+which parses modules with the StacklessParser and runs them stackless too, so their expressions
+can be nested as deeply as the program's.
+"""
+import os
+import threading
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.environment import Environment, UNDEFINED
+from pylox.exceptions import RuntimeException
+
+SEARCH_PATH_VARIABLE = "LOXPATH"
+
+
+def default_search_path():
+    return [os.curdir] + [d for d in os.environ.get(SEARCH_PATH_VARIABLE, "").split(os.pathsep) if d]
+
+
+class Module(object):
+    """
+    A parsed module, resolved against a template of its namespace like a pylox.program.Program,
+    so that its statements can be shared by every interpreter which imports it.
+    """
+    def __init__(self, path, source, parser_class=Parser):
+        self.path = path
+        scanner = RegexScanner(source)
+        parser = parser_class(scanner.scan_tokens())
+        statements = parser.parse()
+        self.errors = scanner.errors + [str(e) for e in parser.errors]
+        # the Resolver allocates global slots in self.globals
+        self.globals = Environment()
+        self.statements = Resolver(self).resolve(statements)
+
+    def namespace(self):
+        """Returns a fresh global environment for running the module's statements."""
+        environment = Environment()
+        environment.names = dict(self.globals.names)
+        environment.slots = [UNDEFINED] * len(self.globals.slots)
+        return environment
+
+    def __repr__(self):
+        return "Module({!r})".format(self.path)
+
+
+class ModuleCache(object):
+    """
+    Parsed modules by absolute path and parser class, each with the modification time and size it
+    was read at.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._modules = {}
+        self._lock = threading.Lock()
+
+    def load(self, path, parser_class=Parser):
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        key = (path, parser_class)
+        with self._lock:
+            entry = self._modules.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        with open(path, encoding="utf-8") as f:
+            module = Module(path, f.read(), parser_class)
+        with self._lock:
+            self._modules[key] = (version, module)
+        return module
+
+    def clear(self):
+        with self._lock:
+            self._modules.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._modules)
+
+    def __repr__(self):
+        return "ModuleCache(hits={}, misses={}, size={})".format(self.hits, self.misses, len(self._modules))
+
+
+cache = ModuleCache()
+
+
+class Importer(object):
+    """
+    Imports modules for one interpreter, keeping the namespace of every module it has run. Modules
+    are parsed by parser_class and run by a tree-walking Interpreter created with
+    interpreter_options (e.g. stackless and max_depth) and sharing this Importer, so imports within
+    modules are also run once.
+    """
+    def __init__(self, search_path=None, directory=None, module_cache=None, parser_class=Parser,
+                 interpreter_options=None):
+        self.search_path = default_search_path() if search_path is None else list(search_path)
+        # directory of the main program, searched first by its imports
+        self.directory = directory
+        self.cache = cache if module_cache is None else module_cache
+        self.parser_class = parser_class
+        self.interpreter_options = {} if interpreter_options is None else dict(interpreter_options)
+        # namespaces of the modules run so far, by absolute path
+        self.modules = {}
+        # absolute paths of the modules being run, innermost last
+        self._running = []
+
+    def import_into(self, environment, name, output, line=None):
+        """Defines the top-level variables of module name in environment, running the module if needed."""
+        for variable, value in self.load(name, output, line).values.items():
+            environment.define(variable, value)
+
+    def load(self, name, output, line=None):
+        """Returns the namespace of module name, running the module the first time."""
+        path = self.find(name, line)
+        namespace = self.modules.get(path)
+        if namespace is not None:
+            return namespace
+        if path in self._running:
+            cycle = self._running[self._running.index(path):] + [path]
+            raise RuntimeException(name, "Import cycle: {}.".format(" -> ".join(map(os.path.basename, cycle))),
+                                   line=line)
+        module = self.cache.load(path, self.parser_class)
+        if module.errors:
+            raise RuntimeException(name, "Error in module '{}': {}".format(name, "; ".join(module.errors)), line=line)
+        self._running.append(path)
+        try:
+            namespace = self._run(module, output)
+        finally:
+            self._running.pop()
+        self.modules[path] = namespace
+        return namespace
+
+    def find(self, name, line=None):
+        """Returns the absolute path of module name."""
+        if os.path.isabs(name):
+            directories = [""]
+        else:
+            importing = os.path.dirname(self._running[-1]) if self._running else self.directory
+            directories = ([importing] if importing is not None else []) + self.search_path
+        for directory in directories:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return os.path.abspath(path)
+        raise RuntimeException(name, "Could not find module '{}'.".format(name), line=line)
+
+    def _run(self, module, output):
+        # imported here, since the Interpreter itself imports modules through this class
+        from pylox.interpreter import Interpreter
+        interpreter = Interpreter(output=output, importer=self, **self.interpreter_options)
+        namespace = interpreter.globals = interpreter.environment = module.namespace()
+        execute = interpreter._execute_stackless if interpreter.stackless else interpreter._execute
+        for stmt in module.statements:
+            execute(stmt)
+        return namespace
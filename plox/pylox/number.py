@@ -0,0 +1,39 @@
+"""
+Lox number values.
+
+Number literals without a '.' are Python ints, others are floats. Arithmetic on two ints stays
+exact, with no rounding beyond 2^53, mixing in a float gives a float, and '/' always divides like
+floats do. Numbers are tested with 'type(x) in NUMBER_TYPES' rather than isinstance, since bools
+are ints in Python; int comes first, so the common case of two ints is the fastest.
+"""
+import operator
+
+from pylox.tokens import TokenType
+
+# the types of Lox number values
+NUMBER_TYPES = (int, float)
+
+# the Python operator computing each binary operator on two numbers, indexed by token type
+OPERATORS = [None] * (TokenType.EOF + 1)
+OPERATORS[TokenType.PLUS] = operator.add
+OPERATORS[TokenType.MINUS] = operator.sub
+OPERATORS[TokenType.STAR] = operator.mul
+OPERATORS[TokenType.SLASH] = operator.truediv
+OPERATORS[TokenType.LESS] = operator.lt
+OPERATORS[TokenType.LESS_EQUAL] = operator.le
+OPERATORS[TokenType.GREATER] = operator.gt
+OPERATORS[TokenType.GREATER_EQUAL] = operator.ge
+OPERATORS[TokenType.EQUAL_EQUAL] = operator.eq
+OPERATORS[TokenType.BANG_EQUAL] = operator.ne
+
+
+def parse(text):
+    """Returns the value of a number literal."""
+    return float(text) if "." in text else int(text)
+
+
+def negate(value):
+    """Negates a number. Negating the int 0 gives the float -0.0, which Lox prints as -0."""
+    if type(value) is int and value == 0:
+        return -0.0
+    return -value
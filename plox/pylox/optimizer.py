@@ -0,0 +1,131 @@
+import sys
+
+from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Print, Expression, Var, Variable, Assign
+from pylox.quicken import with_variants
+from pylox.tokens import Token, TokenType
+from pylox.interpreter import Interpreter
+from pylox.rope import Rope
+
+# operators whose result is always a boolean
+BOOLEAN_OPERATORS = (TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL, TokenType.GREATER, TokenType.GREATER_EQUAL,
+                     TokenType.LESS, TokenType.LESS_EQUAL)
+
+NEGATED_EQUALITY = {
+    TokenType.EQUAL_EQUAL: (TokenType.BANG_EQUAL, "!="),
+    TokenType.BANG_EQUAL: (TokenType.EQUAL_EQUAL, "=="),
+}
+
+
+class Optimizer(object):
+    """
+    Rewrites parsed statements in place before they are resolved:
+
+    * operators whose operands are all literals are folded into a single literal,
+    * groupings are dropped, since the tree already encodes precedence,
+    * negated equality tests become the opposite test (!(a == b) -> a != b), and double negations
+      of boolean expressions are removed (!!(a < b) -> a < b).
+
+    Folding evaluates the operator with the tree-walking Interpreter, so folded values are exactly
+    what would have been computed at runtime. An operation which raises (e.g. -"a", or 1 / 0) is
+    left in the tree, so the error is still raised when and where it would have been.
+    """
+
+    def __init__(self):
+        self.evaluator = Interpreter()
+        # nodes seen, and nodes removed from the tree
+        self.visited = 0
+        self.eliminated = 0
+        self._optimizers = with_variants({
+            Print: self._optimize_expression_stmt,
+            Expression: self._optimize_expression_stmt,
+            Var: self._optimize_var_stmt,
+            BinaryExpr: self._optimize_binary_expr,
+            UnaryExpr: self._optimize_unary_expr,
+            LiteralExpr: self._optimize_leaf,
+            GroupingExpr: self._optimize_grouping_expr,
+            Variable: self._optimize_leaf,
+            Assign: self._optimize_assign_expr,
+        })
+
+    def optimize(self, statements):
+        return [self._optimize(stmt) for stmt in statements]
+
+    def optimize_iter(self, statements):
+        """Optimizes statements lazily, for programs which are executed while being parsed."""
+        for stmt in statements:
+            yield self._optimize(stmt)
+
+    def report(self):
+        return "optimizer: eliminated {} of {} nodes".format(self.eliminated, self.visited)
+
+    def _optimize(self, node):
+        optimizer = self._optimizers.get(type(node))
+        if optimizer is None:
+            return node
+        self.visited += 1
+        return optimizer(node)
+
+    def _fold(self, expr, operands):
+        """Replaces expr by its value, unless evaluating it raises."""
+        try:
+            value = self.evaluator.evaluate(expr)
+        except Exception:
+            return expr
+        self.eliminated += operands
+        if type(value) is Rope:
+            # literals hold plain values, which the cache can serialize
+            value = sys.intern(value.flatten())
+        return LiteralExpr(value)
+
+    def _optimize_expression_stmt(self, stmt):
+        stmt.expression = self._optimize(stmt.expression)
+        return stmt
+
+    def _optimize_var_stmt(self, stmt):
+        if stmt.initializer is not None:
+            stmt.initializer = self._optimize(stmt.initializer)
+        return stmt
+
+    def _optimize_leaf(self, expr):
+        return expr
+
+    def _optimize_grouping_expr(self, expr):
+        self.eliminated += 1
+        return self._optimize(expr.expression)
+
+    def _optimize_assign_expr(self, expr):
+        expr.value = self._optimize(expr.value)
+        return expr
+
+    def _optimize_binary_expr(self, expr):
+        expr.left = self._optimize(expr.left)
+        expr.right = self._optimize(expr.right)
+        if type(expr.left) is LiteralExpr and type(expr.right) is LiteralExpr:
+            return self._fold(expr, 2)
+        return expr
+
+    def _optimize_unary_expr(self, expr):
+        right = expr.right = self._optimize(expr.right)
+        if type(right) is LiteralExpr:
+            return self._fold(expr, 1)
+        if expr.operator.token_type != TokenType.BANG:
+            return expr
+        if isinstance(right, BinaryExpr) and right.operator.token_type in NEGATED_EQUALITY:
+            token_type, lexeme = NEGATED_EQUALITY[right.operator.token_type]
+            self.eliminated += 1
+            operator = Token(token_type, lexeme, None, right.operator.line)
+            return BinaryExpr(right.left, operator, right.right)
+        if (isinstance(right, UnaryExpr) and right.operator.token_type == TokenType.BANG and
+                _is_boolean(right.right)):
+            self.eliminated += 2
+            return right.right
+        return expr
+
+
+def _is_boolean(expr):
+    # quickened nodes (see pylox.quicken) are instances of subclasses
+    if isinstance(expr, BinaryExpr):
+        return expr.operator.token_type in BOOLEAN_OPERATORS
+    if isinstance(expr, UnaryExpr):
+        return expr.operator.token_type == TokenType.BANG
+    return type(expr) is LiteralExpr and type(expr.value) is bool
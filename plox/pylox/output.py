@@ -0,0 +1,102 @@
+"""
+Output sinks for Lox print statements.
+
+A sink has print(value), which writes a Lox value as a line, write(text) for other output such as
+runtime error messages, and flush(). Engines hand every printed value to their sink, which
+stringifies it once. Engines flush their sink whenever interpret returns or raises, including
+after a runtime error (whose message is written through the sink, after everything printed before
+it) and on KeyboardInterrupt or SystemExit, so buffered output is never lost when a run ends.
+"""
+import sys
+
+DEFAULT_BUFFER_SIZE = 8192
+
+# flush policies of BufferedSink
+FLUSH_ON_SIZE = "size"
+FLUSH_ON_LINE = "line"
+
+INFINITY = float("inf")
+
+
+def stringify(value):
+    """Returns the text Lox prints for value: nil, true and false, and numbers without a trailing .0."""
+    if value is None:
+        return "nil"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if type(value) is float:
+        if value != value:
+            return "NaN"
+        if value in (INFINITY, -INFINITY):
+            return "Infinity" if value > 0 else "-Infinity"
+        text = repr(value)
+        return text[:-2] if text.endswith(".0") else text
+    return str(value)
+
+
+class BufferedSink(object):
+    """
+    Collects printed lines and writes them to a text stream in one call per flush: when the
+    buffer holds buffer_size characters with FLUSH_ON_SIZE, or after every line with
+    FLUSH_ON_LINE. Without a stream, sys.stdout is looked up at every flush.
+    """
+    def __init__(self, stream=None, buffer_size=DEFAULT_BUFFER_SIZE, policy=FLUSH_ON_SIZE):
+        if policy not in (FLUSH_ON_SIZE, FLUSH_ON_LINE):
+            raise ValueError("Unknown flush policy: {}".format(policy))
+        self.stream = stream
+        # a buffer size of 0 flushes after every line
+        self.buffer_size = 0 if policy == FLUSH_ON_LINE else buffer_size
+        self._parts = []
+        self._size = 0
+
+    def print(self, value):
+        self.write(stringify(value) + "\n")
+
+    def write(self, text):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            stream = self.stream or sys.stdout
+            stream.write("".join(self._parts))
+            stream.flush()
+            self._parts = []
+            self._size = 0
+
+
+class CaptureSink(object):
+    """Keeps printed output in memory, for embedding and tests."""
+    def __init__(self):
+        self._parts = []
+
+    def print(self, value):
+        self._parts.append(stringify(value) + "\n")
+
+    def write(self, text):
+        self._parts.append(text)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return "".join(self._parts)
+
+    def lines(self):
+        return self.getvalue().splitlines()
+
+
+class NullSink(object):
+    """Discards all output without stringifying it, for benchmarks."""
+    def print(self, value):
+        pass
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
@@ -1,31 +1,88 @@
 import logging
 
 from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, \
-    Print, Expression, Var, Variable, Assign
+    Print, Expression, Var, Variable, Assign, Import
 from pylox.tokens import TokenType
 
 logger = logging.getLogger("pylox.parser")
 
+# bump whenever the scanners or parsers produce different statements for the same source (e.g. a
+# literal's value changes type), since cached programs (see pylox.cache) are keyed by it
+PARSER_VERSION = 2
+
+# binding power of the infix operators, from loosest to tightest; 0 means not an infix operator
+NO_PRECEDENCE = 0
+ASSIGNMENT = 1
+EQUALITY = 2
+COMPARISON = 3
+TERM = 4
+FACTOR = 5
+UNARY = 6
+
 
 class Parser(object):
+    """
+    Recursive descent parser for statements, with a Pratt parser for expressions. Tokens are
+    pulled lazily from any iterable ending in an EOF token, so statements can be parsed (and
+    executed) while the source is still being scanned.
+
+    Expressions are parsed from two tables indexed by token type: the handler of the tokens which
+    can start an expression, and the (precedence, handler) of the infix operators. An operand
+    costs one _parse_precedence call instead of a walk down every precedence level.
+
+    Nodes are built through the constructors below, which subclasses can replace to produce a
+    different representation (see pylox.flat).
+    """
+    _binary = BinaryExpr
+    _unary = UnaryExpr
+    _literal = LiteralExpr
+    _grouping = GroupingExpr
+    _variable = Variable
+    _assign = Assign
+    _print = Print
+    _expression = Expression
+    _var = Var
+    _import = Import
+
     def __init__(self, tokens, verbose=False):
         self.verbose = verbose
-        self.tokens = tokens
-        self.current = 0
+        self.tokens = iter(tokens)
+        self.current = next(self.tokens)
+        self.previous = None
+        self.errors = []
+
+        self._prefix_parsers = [None] * (TokenType.EOF + 1)
+        for token_type in (TokenType.FALSE, TokenType.TRUE, TokenType.NIL, TokenType.NUMBER, TokenType.STRING):
+            self._prefix_parsers[token_type] = self._parse_literal
+        self._prefix_parsers[TokenType.LEFT_PAREN] = self._parse_grouping
+        self._prefix_parsers[TokenType.IDENTIFIER] = self._variable
+        self._prefix_parsers[TokenType.BANG] = self._parse_unary_operator
+        self._prefix_parsers[TokenType.MINUS] = self._parse_unary_operator
+
+        self._infix_parsers = [None] * (TokenType.EOF + 1)
+        self._infix_parsers[TokenType.EQUAL] = (ASSIGNMENT, self._parse_assignment_operator)
+        for precedence, token_types in ((EQUALITY, (TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL)),
+                                        (COMPARISON, (TokenType.GREATER, TokenType.GREATER_EQUAL,
+                                                      TokenType.LESS, TokenType.LESS_EQUAL)),
+                                        (TERM, (TokenType.MINUS, TokenType.PLUS)),
+                                        (FACTOR, (TokenType.SLASH, TokenType.STAR))):
+            for token_type in token_types:
+                self._infix_parsers[token_type] = (precedence, self._parse_binary_operator)
 
     def _advance(self):
         if not self._is_at_end():
-            self.current += 1
-        return self._previous()
+            self.previous = self.current
+            self.current = next(self.tokens)
+        return self.previous
 
     def _previous(self):
-        return self.tokens[self.current - 1]
+        return self.previous
 
     def _is_at_end(self):
-        return self._peek().token_type == TokenType.EOF
+        return self.current.token_type == TokenType.EOF
 
     def _peek(self):
-        return self.tokens[self.current]
+        return self.current
 
     def _check(self, token_type):
         if self._is_at_end():
@@ -48,45 +105,199 @@ class Parser(object):
         raise Exception(message)
 
     def parse(self):
-        statements = []
+        return list(self.parse_iter())
+
+    def parse_iter(self):
+        """Yields top-level declarations one at a time, as soon as each has been parsed."""
         while not self._is_at_end():
-            statements.append(self._parse_declaration())
-        return statements
+            yield self._parse_declaration()
 
     def _parse_statement(self):
-        if self._match([TokenType.PRINT]):
+        if self._match((TokenType.PRINT,)):
             return self._parse_print_statement()
         return self._parse_expression_statement()
 
     def _parse_declaration(self):
         try:
-            if self._match([TokenType.VAR]):
+            if self._match((TokenType.VAR,)):
                 return self._parse_var_declaration()
+            if self._match((TokenType.IMPORT,)):
+                return self._parse_import_declaration()
             return self._parse_statement()
         except Exception as e:
+            self.errors.append(e)
             self._synchronize()
             return None
 
     def _parse_var_declaration(self):
         name = self._consume(TokenType.IDENTIFIER, "Expected variable name.")
-        if self._match([TokenType.EQUAL]):
+        initializer = None
+        if self._match((TokenType.EQUAL,)):
             initializer = self._parse_expression()
         self._consume(TokenType.SEMICOLON, "Expect ';' after variable declaration.")
-        return Var(name, initializer)
+        return self._var(name, initializer)
+
+    def _parse_import_declaration(self):
+        path = self._consume(TokenType.STRING, "Expect module path after 'import'.")
+        self._consume(TokenType.SEMICOLON, "Expect ';' after module path.")
+        return self._import(path)
 
     def _synchronize(self):
-        # TODO
-        pass
+        """Discards tokens until the start of the next statement, so one error doesn't cascade."""
+        self._advance()
+        while not self._is_at_end():
+            if self._previous().token_type == TokenType.SEMICOLON:
+                return
+            if self._peek().token_type in (TokenType.CLASS, TokenType.FUN, TokenType.VAR, TokenType.FOR,
+                                           TokenType.IF, TokenType.WHILE, TokenType.PRINT, TokenType.RETURN,
+                                           TokenType.IMPORT):
+                return
+            self._advance()
 
     def _parse_print_statement(self):
         value = self._parse_expression()
         self._consume(TokenType.SEMICOLON, "Expect ';' after value.")
-        return Print(value)
+        return self._print(value)
 
     def _parse_expression_statement(self):
         expr = self._parse_expression()
         self._consume(TokenType.SEMICOLON, "Expect ';' after expression.")
-        return Expression(expr)
+        return self._expression(expr)
+
+    def _parse_expression(self):
+        return self._parse_precedence(ASSIGNMENT)
+
+    def _parse_precedence(self, precedence):
+        """Parses an expression whose infix operators bind at least as tightly as precedence."""
+        token = self.current
+        prefix = self._prefix_parsers[token.token_type]
+        if prefix is None:
+            self._error(token, "Expect expression.")
+        # neither prefix nor infix tokens are EOF, so advance without the _advance checks
+        self.previous = token
+        self.current = next(self.tokens)
+        expr = prefix(token)
+
+        infix_parsers = self._infix_parsers
+        while True:
+            token = self.current
+            infix = infix_parsers[token.token_type]
+            if infix is None or infix[0] < precedence:
+                return expr
+            self.previous = token
+            self.current = next(self.tokens)
+            expr = infix[1](expr, token, infix[0])
+
+    def _parse_literal(self, token):
+        token_type = token.token_type
+        if token_type == TokenType.FALSE:
+            return self._literal(False)
+        if token_type == TokenType.TRUE:
+            return self._literal(True)
+        if token_type == TokenType.NIL:
+            return self._literal(None)
+        return self._literal(token.literal)
+
+    def _parse_grouping(self, token):
+        expr = self._parse_precedence(ASSIGNMENT)
+        self._consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
+        return self._grouping(expr)
+
+    def _parse_unary_operator(self, operator):
+        return self._unary(operator, self._parse_precedence(UNARY))
+
+    def _parse_binary_operator(self, left, operator, precedence):
+        # binary operators are left-associative, so the right operand binds one level tighter
+        return self._binary(left, operator, self._parse_precedence(precedence + 1))
+
+    def _parse_assignment_operator(self, target, equals, precedence):
+        # assignment is right-associative: a = b = c assigns b = c first
+        return self._assignment(target, equals, self._parse_precedence(precedence))
+
+    def _assignment(self, target, equals, value):
+        name = self._assignment_target(target)
+        if name is None:
+            self._error(equals, "Invalid assignment target.")
+            return None
+        return self._assign(name, value)
+
+    def _assignment_target(self, expr):
+        """What _assign takes as the assigned variable: the name of a variable, or None for other expressions."""
+        return expr.name if isinstance(expr, Variable) else None
+
+
+# steps of StacklessParser, waiting for the operand being parsed
+_UNARY_STEP, _GROUPING_STEP, _BINARY_STEP, _ASSIGNMENT_STEP = range(4)
+
+
+class StacklessParser(Parser):
+    """
+    Parses the same grammar into the same nodes as Parser, but without recursion: operators and
+    parentheses waiting for an operand are kept on an explicit stack, so expressions can be
+    nested far beyond Python's recursion limit. Used for stackless evaluation (see Interpreter).
+    """
+    def _parse_precedence(self, precedence):
+        prefix_parsers = self._prefix_parsers
+        infix_parsers = self._infix_parsers
+        tokens = self.tokens
+        # (step, token, left operand, precedence to resume at) for every operand being parsed
+        pending = []
+        while True:
+            token = self.current
+            token_type = token.token_type
+            if token_type == TokenType.BANG or token_type == TokenType.MINUS:
+                self.previous = token
+                self.current = next(tokens)
+                pending.append((_UNARY_STEP, token, None, precedence))
+                precedence = UNARY
+                continue
+            if token_type == TokenType.LEFT_PAREN:
+                self.previous = token
+                self.current = next(tokens)
+                pending.append((_GROUPING_STEP, token, None, precedence))
+                precedence = ASSIGNMENT
+                continue
+            prefix = prefix_parsers[token_type]
+            if prefix is None:
+                self._error(token, "Expect expression.")
+            self.previous = token
+            self.current = next(tokens)
+            expr = prefix(token)
+
+            while True:
+                token = self.current
+                infix = infix_parsers[token.token_type]
+                if infix is not None and infix[0] >= precedence:
+                    self.previous = token
+                    self.current = next(tokens)
+                    if token.token_type == TokenType.EQUAL:
+                        # right-associative, like Parser._parse_assignment_operator
+                        pending.append((_ASSIGNMENT_STEP, token, expr, precedence))
+                        precedence = infix[0]
+                    else:
+                        pending.append((_BINARY_STEP, token, expr, precedence))
+                        precedence = infix[0] + 1
+                    break
+                if not pending:
+                    return expr
+                # expr is the operand a pending step was waiting for
+                step, token, left, precedence = pending.pop()
+                if step == _BINARY_STEP:
+                    expr = self._binary(left, token, expr)
+                elif step == _UNARY_STEP:
+                    expr = self._unary(token, expr)
+                elif step == _GROUPING_STEP:
+                    self._consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
+                    expr = self._grouping(expr)
+                else:
+                    expr = self._assignment(left, token, expr)
+
+
+class RecursiveDescentParser(Parser):
+    """
+    Parses expressions with the original ladder of one method per precedence level. It builds the
+    same nodes as Parser, and is kept as a reference for tests and tools/bench_parser.py.
+    """
 
     def _parse_expression(self):
         return self._parse_assignment()
@@ -97,10 +308,7 @@ class Parser(object):
         if self._match([TokenType.EQUAL]):
             equals = self._previous()
             value = self._parse_assignment()
-            if isinstance(expr, Variable):
-                name = expr.name
-                return Assign(name, value)
-            self._error(equals, "Invalid assignment target.")
+            return self._assignment(expr, equals, value)
 
         return expr
 
@@ -109,7 +317,7 @@ class Parser(object):
         while self._match([TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL]):
             operator = self._previous()
             right = self._parse_comparison()
-            expr = BinaryExpr(expr, operator, right)
+            expr = self._binary(expr, operator, right)
         return expr
 
     def _parse_comparison(self):
@@ -117,7 +325,7 @@ class Parser(object):
         while self._match([TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL]):
             operator = self._previous()
             right = self._parse_addition()
-            expr = BinaryExpr(expr, operator, right)
+            expr = self._binary(expr, operator, right)
         return expr
 
     def _parse_addition(self):
@@ -125,7 +333,7 @@ class Parser(object):
         while self._match([TokenType.MINUS, TokenType.PLUS]):
             operator = self._previous()
             right = self._parse_multiplication()
-            expr = BinaryExpr(expr, operator, right)
+            expr = self._binary(expr, operator, right)
         return expr
 
     def _parse_multiplication(self):
@@ -133,28 +341,29 @@ class Parser(object):
         while self._match([TokenType.SLASH, TokenType.STAR]):
             operator = self._previous()
             right = self._parse_unary()
-            expr = BinaryExpr(expr, operator, right)
+            expr = self._binary(expr, operator, right)
         return expr
 
     def _parse_unary(self):
         if self._match([TokenType.BANG, TokenType.MINUS]):
             operator = self._previous()
             right = self._parse_unary()
-            return UnaryExpr(operator, right)
+            return self._unary(operator, right)
         return self._parse_primary()
 
     def _parse_primary(self):
         if self._match([TokenType.FALSE]):
-            return LiteralExpr(False)
+            return self._literal(False)
         if self._match([TokenType.TRUE]):
-            return LiteralExpr(True)
+            return self._literal(True)
         if self._match([TokenType.NIL]):
-            return LiteralExpr(None)
+            return self._literal(None)
         if self._match([TokenType.NUMBER, TokenType.STRING]):
-            return LiteralExpr(self._previous().literal)
+            return self._literal(self._previous().literal)
         if self._match([TokenType.LEFT_PAREN]):
             expr = self._parse_expression()
             self._consume(TokenType.RIGHT_PAREN, "Expect ')' after expression.")
-            return GroupingExpr(expr)
+            return self._grouping(expr)
         if self._match([TokenType.IDENTIFIER]):
-            return Variable(self._previous())
+            return self._variable(self._previous())
+        self._error(self._peek(), "Expect expression.")
@@ -0,0 +1,120 @@
+import collections
+import time
+
+from pylox.tokens import first_line
+
+# fields holding a node's own token, whose line the node is attributed to
+TOKEN_FIELDS = ("operator", "name", "path")
+
+
+class Stats(object):
+    __slots__ = ("calls", "cumulative", "own")
+
+    def __init__(self):
+        self.calls = 0
+        self.cumulative = 0.0
+        self.own = 0.0
+
+
+class Profiler(object):
+    """
+    Records how often each AST node class and each source line is evaluated, and how long it takes.
+    It is attached with Interpreter.instrument, which wraps the interpreter's visit methods, so an
+    interpreter which is not being profiled runs exactly the same code as before.
+
+    Self time excludes the time spent in child nodes. Cumulative time includes it, and is only
+    counted for the outermost active node of a class or line, so nested nodes on the same line are
+    not counted twice. Nodes are attributed to the line of their own token (operator, name or
+    path); nodes without one (literals, groupings, ...) to the line of the node they appear in, and
+    top-level statements to the line of their first token.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.lines = collections.defaultdict(Stats)
+        self.node_types = collections.defaultdict(Stats)
+        # self time of every distinct stack of (node class, line) frames
+        self.stacks = collections.Counter()
+        self._stack = []
+        # how many frames of each node class and line are active
+        self._active_types = collections.Counter()
+        self._active_lines = collections.Counter()
+
+    def wrap(self, visitor):
+        clock = self.clock
+        stack = self._stack
+        active_types = self._active_types
+        active_lines = self._active_lines
+        # the token field of every node class seen so far, or None
+        token_fields = {}
+
+        def profiled(node):
+            cls = type(node)
+            name = cls.__name__
+            try:
+                field = token_fields[cls]
+            except KeyError:
+                field = token_fields[cls] = _token_field(cls)
+            if field is not None:
+                line = getattr(node, field).line
+            elif stack:
+                line = stack[-1][1]
+            else:
+                line = first_line(node)
+            # [name, line, time spent in children]
+            frame = [name, line, 0.0]
+            stack.append(frame)
+            active_types[name] += 1
+            active_lines[line] += 1
+            start = clock()
+            try:
+                return visitor(node)
+            finally:
+                elapsed = clock() - start
+                stack.pop()
+                active_types[name] -= 1
+                active_lines[line] -= 1
+                own = elapsed - frame[2]
+                if stack:
+                    stack[-1][2] += elapsed
+                self._record(self.node_types[name], elapsed, own, active_types[name] == 0)
+                self._record(self.lines[line], elapsed, own, active_lines[line] == 0)
+                self.stacks[tuple((f[0], f[1]) for f in stack) + ((name, line),)] += own
+        return profiled
+
+    def _record(self, stats, elapsed, own, outermost):
+        stats.calls += 1
+        stats.own += own
+        if outermost:
+            stats.cumulative += elapsed
+
+    def report(self, limit=20):
+        """Returns node classes and source lines as text tables, sorted by self time."""
+        lines = [self._table("node", self.node_types, limit), "", self._table("line", self.lines, limit)]
+        return "\n".join(lines)
+
+    def _table(self, title, stats, limit):
+        rows = ["{:<14} {:>10} {:>12} {:>12}".format(title, "calls", "cumulative", "self")]
+        for key, entry in sorted(stats.items(), key=lambda item: item[1].own, reverse=True)[:limit]:
+            rows.append("{:<14} {:>10} {:>11.6f}s {:>11.6f}s".format(
+                "?" if key is None else str(key), entry.calls, entry.cumulative, entry.own))
+        return "\n".join(rows)
+
+    def collapsed(self):
+        """
+        Returns the recorded stacks in the collapsed format read by flamegraph.pl and speedscope:
+        one 'frame;frame;frame count' line per stack, where count is self time in microseconds.
+        """
+        lines = []
+        for stack, own in sorted(self.stacks.items()):
+            frames = ";".join("{} (line {})".format(name, "?" if line is None else line) for name, line in stack)
+            lines.append("{} {}".format(frames, int(round(own * 1e6))))
+        return "\n".join(lines) + "\n"
+
+
+def _token_field(cls):
+    # specialized nodes (see pylox.quicken) inherit their fields
+    for base in cls.__mro__:
+        for field in getattr(base, "__slots__", ()):
+            if field in TOKEN_FIELDS:
+                return field
+    return None
@@ -0,0 +1,136 @@
+import collections
+import threading
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.environment import Environment, UNDEFINED
+from pylox.exceptions import CompileException
+from pylox.output import BufferedSink, CaptureSink
+from pylox.module import Importer
+
+DEFAULT_CACHE_SIZE = 128
+
+# outcome of Program.run: final global values, printed text (unless written to a given stdout), runtime error or None
+Result = collections.namedtuple("Result", ["values", "output", "error"])
+
+
+class Program(object):
+    """
+    A parsed and resolved Lox program which can be run any number of times, each run starting
+    from a fresh global environment. The statements are resolved once, against a template of the
+    global environment whose name -> slot map every run copies, so running does no parsing or
+    resolving. The statements are never modified by running them, so a Program can be shared.
+    """
+    def __init__(self, source):
+        self.source = source
+        scanner = RegexScanner(source)
+        parser = Parser(scanner.scan_tokens())
+        statements = parser.parse()
+        errors = scanner.errors + [str(e) for e in parser.errors]
+        if errors:
+            raise CompileException("; ".join(errors), errors)
+        self._template = Environment()
+        self.statements = Resolver(_Globals(self._template)).resolve(statements)
+        # building an Interpreter costs as much as running a small program, so each thread reuses one
+        self._local = threading.local()
+
+    def run(self, globals=None, stdout=None):
+        """
+        Runs the program with the given global values defined, returning a Result instead of
+        printing errors. Printed values are written to stdout if given, and returned as the
+        Result's output otherwise.
+        """
+        output = CaptureSink() if stdout is None else BufferedSink(stdout)
+        interpreter = getattr(self._local, "interpreter", None)
+        if interpreter is None:
+            interpreter = self._local.interpreter = Interpreter()
+        interpreter.output = output
+        # modules are run again by every run, like the program itself
+        interpreter.importer = Importer()
+        environment = self.environment(globals)
+        interpreter.globals = interpreter.environment = environment
+        error = None
+        try:
+            for stmt in self.statements:
+                interpreter._execute(stmt)
+        except Exception as e:
+            error = e
+        finally:
+            output.flush()
+        return Result(environment.values, output.getvalue() if stdout is None else None, error)
+
+    def environment(self, globals=None):
+        """Returns a fresh global environment for running the statements, with the given values defined."""
+        environment = Environment()
+        environment.names = dict(self._template.names)
+        environment.slots = [UNDEFINED] * len(self._template.slots)
+        for name, value in (globals or {}).items():
+            environment.slots[environment.slot(name)] = value
+        return environment
+
+    def __repr__(self):
+        return "Program({!r})".format(self.source)
+
+
+class _Globals(object):
+    """Stands in for an interpreter when resolving against a template environment."""
+    def __init__(self, environment):
+        self.globals = environment
+
+
+class CompileCache(object):
+    """
+    Least recently used cache of Programs, keyed by source text. Only successfully compiled
+    programs are cached, so syntax errors are raised again for every call.
+    """
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._programs = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, source):
+        with self._lock:
+            program = self._programs.get(source)
+            if program is not None:
+                self._programs.move_to_end(source)
+                self.hits += 1
+                return program
+            self.misses += 1
+        program = Program(source)
+        with self._lock:
+            self._programs[source] = program
+            self._evict()
+        return program
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._programs.clear()
+            self.hits = self.misses = 0
+
+    def _evict(self):
+        while len(self._programs) > self.maxsize:
+            self._programs.popitem(last=False)
+
+    def __len__(self):
+        return len(self._programs)
+
+    def __repr__(self):
+        return "CompileCache(hits={}, misses={}, size={}, maxsize={})".format(
+            self.hits, self.misses, len(self._programs), self.maxsize)
+
+
+cache = CompileCache()
+
+
+def compile(source):
+    """Returns the Program for source, from the module's cache when it has been compiled before."""
+    return cache.compile(source)
@@ -0,0 +1,212 @@
+"""
+Specialized node classes for the tree-walking Interpreter's quickening.
+
+The first time a binary or unary expression is evaluated, the Interpreter rewrites the node's
+class to a variant specialized for its operator and the operand types it saw, e.g. IntAdd for '+'
+on two ints or NumberAdd for '+' on numbers of which one is a float. The variants add no fields,
+so the class of a live node can be swapped in place, and each has its own kind so it is
+dispatched straight to its own visitor. A specialized visitor only tests that its guess still
+holds; when it doesn't, the node is deoptimized to a polymorphic class which always takes the
+generic path.
+
+Quickened nodes remain BinaryExpr and UnaryExpr instances, equal to the nodes they were. Passes
+which dispatch on a node's exact class or kind find the variants through with_variants and
+BASE_KINDS, so a quickened tree can be resolved, compiled or serialized again.
+"""
+import collections
+import operator
+
+from pylox.expressions import BinaryExpr, UnaryExpr, KIND_COUNT as BASE_KIND_COUNT
+from pylox.tokens import TokenType
+from pylox.rope import Rope, STRING_TYPES, concat
+from pylox.number import NUMBER_TYPES, OPERATORS as NUMBER_OPERATORS, negate
+
+_kinds = iter(range(BASE_KIND_COUNT, BASE_KIND_COUNT + 64))
+
+
+def _variant(name, base):
+    return type(name, (base,), {"__slots__": (), "kind": next(_kinds), "__module__": __name__})
+
+
+# generic nodes which stopped specializing, after a guard failed or for unexpected operand types
+PolymorphicBinaryExpr = _variant("PolymorphicBinaryExpr", BinaryExpr)
+PolymorphicUnaryExpr = _variant("PolymorphicUnaryExpr", UnaryExpr)
+
+IntAdd = _variant("IntAdd", BinaryExpr)
+IntSubtract = _variant("IntSubtract", BinaryExpr)
+IntMultiply = _variant("IntMultiply", BinaryExpr)
+IntLess = _variant("IntLess", BinaryExpr)
+IntLessEqual = _variant("IntLessEqual", BinaryExpr)
+IntGreater = _variant("IntGreater", BinaryExpr)
+IntGreaterEqual = _variant("IntGreaterEqual", BinaryExpr)
+IntEqual = _variant("IntEqual", BinaryExpr)
+IntNotEqual = _variant("IntNotEqual", BinaryExpr)
+NumberAdd = _variant("NumberAdd", BinaryExpr)
+NumberSubtract = _variant("NumberSubtract", BinaryExpr)
+NumberMultiply = _variant("NumberMultiply", BinaryExpr)
+NumberDivide = _variant("NumberDivide", BinaryExpr)
+NumberLess = _variant("NumberLess", BinaryExpr)
+NumberLessEqual = _variant("NumberLessEqual", BinaryExpr)
+NumberGreater = _variant("NumberGreater", BinaryExpr)
+NumberGreaterEqual = _variant("NumberGreaterEqual", BinaryExpr)
+NumberEqual = _variant("NumberEqual", BinaryExpr)
+NumberNotEqual = _variant("NumberNotEqual", BinaryExpr)
+StringAdd = _variant("StringAdd", BinaryExpr)
+StringEqual = _variant("StringEqual", BinaryExpr)
+StringNotEqual = _variant("StringNotEqual", BinaryExpr)
+NumberNegate = _variant("NumberNegate", UnaryExpr)
+# '!' works on every value, so it needs no guard
+Not = _variant("Not", UnaryExpr)
+
+# number of node kinds including the specialized ones, for tables indexed by kind
+KIND_COUNT = next(_kinds)
+
+# (operator, left operand type, right operand type) -> specialized class
+BINARY_SPECIALIZATIONS = {
+    (TokenType.PLUS, str, str): StringAdd,
+    (TokenType.PLUS, str, Rope): StringAdd,
+    (TokenType.PLUS, Rope, str): StringAdd,
+    (TokenType.PLUS, Rope, Rope): StringAdd,
+    (TokenType.EQUAL_EQUAL, str, str): StringEqual,
+    (TokenType.BANG_EQUAL, str, str): StringNotEqual,
+}
+
+# operator -> (specialization for two ints, specialization for numbers of which one is a float);
+# dividing ints gives a float, so it is not worth a variant of its own
+_NUMBER_SPECIALIZATIONS = {
+    TokenType.PLUS: (IntAdd, NumberAdd),
+    TokenType.MINUS: (IntSubtract, NumberSubtract),
+    TokenType.STAR: (IntMultiply, NumberMultiply),
+    TokenType.SLASH: (NumberDivide, NumberDivide),
+    TokenType.LESS: (IntLess, NumberLess),
+    TokenType.LESS_EQUAL: (IntLessEqual, NumberLessEqual),
+    TokenType.GREATER: (IntGreater, NumberGreater),
+    TokenType.GREATER_EQUAL: (IntGreaterEqual, NumberGreaterEqual),
+    TokenType.EQUAL_EQUAL: (IntEqual, NumberEqual),
+    TokenType.BANG_EQUAL: (IntNotEqual, NumberNotEqual),
+}
+for _operator, (_ints, _numbers) in _NUMBER_SPECIALIZATIONS.items():
+    BINARY_SPECIALIZATIONS[(_operator, int, int)] = _ints
+    BINARY_SPECIALIZATIONS[(_operator, int, float)] = _numbers
+    BINARY_SPECIALIZATIONS[(_operator, float, int)] = _numbers
+    BINARY_SPECIALIZATIONS[(_operator, float, float)] = _numbers
+
+# binary specialization -> (the types its guard accepts for both operands, the operation it applies)
+BINARY_OPERATIONS = {
+    StringAdd: (STRING_TYPES, concat),
+    StringEqual: ((str,), operator.eq),
+    StringNotEqual: ((str,), operator.ne),
+}
+for _operator, (_ints, _numbers) in _NUMBER_SPECIALIZATIONS.items():
+    BINARY_OPERATIONS[_ints] = ((int,), NUMBER_OPERATORS[_operator])
+    # after the ints, since '/' has no int variant
+    BINARY_OPERATIONS[_numbers] = (NUMBER_TYPES, NUMBER_OPERATORS[_operator])
+
+SPECIALIZED = tuple(BINARY_OPERATIONS) + (NumberNegate, Not)
+
+# every class a node can be rewritten to
+VARIANTS = SPECIALIZED + (PolymorphicBinaryExpr, PolymorphicUnaryExpr)
+
+# the kind of the node class each kind's class specializes, indexed by kind
+BASE_KINDS = list(range(KIND_COUNT))
+for _cls in VARIANTS:
+    BASE_KINDS[_cls.kind] = _cls.__base__.kind
+
+# (operator, operand type) -> specialized class; None matches any operand
+UNARY_SPECIALIZATIONS = {
+    (TokenType.MINUS, int): NumberNegate,
+    (TokenType.MINUS, float): NumberNegate,
+    (TokenType.BANG, None): Not,
+}
+
+
+def specialize_binary(expr, left, right):
+    """Rewrites a BinaryExpr for the operand types it was evaluated with, returning its new class."""
+    cls = BINARY_SPECIALIZATIONS.get((expr.operator.token_type, type(left), type(right)), PolymorphicBinaryExpr)
+    expr.__class__ = cls
+    return cls
+
+
+def specialize_unary(expr, right):
+    token_type = expr.operator.token_type
+    cls = UNARY_SPECIALIZATIONS.get((token_type, type(right))) or UNARY_SPECIALIZATIONS.get((token_type, None)) or \
+        PolymorphicUnaryExpr
+    expr.__class__ = cls
+    return cls
+
+
+def with_variants(table):
+    """
+    Returns a copy of a table keyed by node class, in which every variant has the entry of the
+    class it specializes.
+    """
+    table = dict(table)
+    for cls in VARIANTS:
+        if cls.__base__ in table:
+            table[cls] = table[cls.__base__]
+    return table
+
+
+def count_hits(interpreter):
+    """
+    Instruments an Interpreter to count, per specialized class, the evaluations whose guard held.
+    Misses are the interpreter's deoptimizations. Counting slows every evaluation down, so it is
+    meant for tuning only.
+    """
+    hits = collections.Counter()
+
+    def wrapper(visitor):
+        def counted(node):
+            cls = type(node)
+            value = visitor(node)
+            # a node whose guard failed has been deoptimized by now
+            if cls in SPECIALIZED and type(node) is cls:
+                hits[cls.__name__] += 1
+            return value
+        return counted
+    interpreter.instrument(wrapper)
+    return hits
+
+
+def binary_visitors(interpreter):
+    """Returns the visit functions of the binary specializations, indexed by kind."""
+    visitors = interpreter._visitors
+    deoptimize = interpreter._deoptimize_binary
+    return {cls.kind: _binary_visitor(visitors, deoptimize, types, operation)
+            for cls, (types, operation) in BINARY_OPERATIONS.items()}
+
+
+def _binary_visitor(visitors, deoptimize, types, operation):
+    def visit(expr):
+        left = expr.left
+        left = visitors[left.kind](left)
+        right = expr.right
+        right = visitors[right.kind](right)
+        if type(left) in types and type(right) in types:
+            return operation(left, right)
+        return deoptimize(expr, left, right)
+    return visit
+
+
+def unary_visitors(interpreter):
+    visitors = interpreter._visitors
+    deoptimize = interpreter._deoptimize_unary
+
+    def number_negate(expr):
+        right = expr.right
+        right = visitors[right.kind](right)
+        if type(right) is float:
+            return -right
+        if type(right) is int:
+            return negate(right)
+        return deoptimize(expr, right)
+
+    def bang(expr):
+        right = expr.right
+        right = visitors[right.kind](right)
+        return right is None or right is False
+
+    return {
+        NumberNegate.kind: number_negate,
+        Not.kind: bang,
+    }
@@ -0,0 +1,159 @@
+import logging
+import re
+from sys import intern
+
+from pylox.tokens import Token, TokenType, KEYWORDS
+from pylox.number import parse as parse_number
+
+logger = logging.getLogger("pylox.scanner")
+
+# Every match is one token: whitespace and comments are skipped by the leading prefix, and the
+# line number is advanced by counting newlines between tokens. Alternatives are tried in order,
+# so the closed string pattern must come before the unterminated one.
+TOKEN_PATTERN = re.compile(r"""
+    [ \r\t\n]*(?://[^\n]*[ \r\t\n]*)*
+    (?:
+        (?P<identifier>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<operator>[!=<>]=?|[(){},.\-+;*/])
+      | (?P<number>[0-9]+(?:\.[0-9]+)?)
+      | (?P<string>"[^"]*")
+      | (?P<unterminated>"[^"]*)
+      | (?P<error>.)
+      | (?P<end>\Z)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+IDENTIFIER, OPERATOR, NUMBER, STRING, UNTERMINATED, ERROR, END = range(1, 8)
+
+CHUNK_SIZE = 64 * 1024
+
+OPERATORS = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    ";": TokenType.SEMICOLON,
+    "*": TokenType.STAR,
+    "/": TokenType.SLASH,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+}
+
+
+class RegexScanner(object):
+    """
+    Drop-in replacement for Scanner which tokenizes with a single compiled regular expression
+    instead of stepping through the source one character at a time. Produces the same tokens,
+    line numbers and error reporting as Scanner.
+    """
+    def __init__(self, source):
+        self.source = source
+        self.line = 1
+        self.tokens = []
+        # messages for the lexical errors found, in order
+        self.errors = []
+
+    def scan_tokens(self):
+        """Parses all tokens until EOF for the provided source code string."""
+        source = self.source
+        tokens = self.tokens
+        append = tokens.append
+        count = source.count
+        line = self.line
+        position = 0
+        for match in TOKEN_PATTERN.finditer(source):
+            kind = match.lastindex
+            start, position_after = match.span(kind)
+            line += count("\n", position, start)
+            position = position_after
+            text = match.group(kind)
+            if kind == IDENTIFIER:
+                append(Token(KEYWORDS.get(text, TokenType.IDENTIFIER), text, None, line))
+            elif kind == OPERATOR:
+                append(Token(OPERATORS[text], text, None, line))
+            elif kind == NUMBER:
+                append(Token(TokenType.NUMBER, text, parse_number(text), line))
+            elif kind == STRING:
+                # the token is reported on the line the string ends on
+                line += count("\n", start, position)
+                # literals are interned, so equal strings in a program are one object
+                append(Token(TokenType.STRING, text, intern(text[1:-1]), line))
+            elif kind == UNTERMINATED:
+                line += count("\n", start, position)
+                self.errors.append("Unterminated string.")
+                logger.error("Unterminated string.")
+            elif kind == ERROR:
+                self.errors.append("Unexpected character.")
+                logger.error("Unexpected character: '{}'".format(text))
+        self.line = line
+        append(Token(TokenType.EOF, "", None, line))
+        return tokens
+
+
+class StreamScanner(object):
+    """
+    Tokenizes a file-like object incrementally, yielding the same tokens as RegexScanner while
+    holding only a small window of the source in memory. Input is read in chunks, and a match
+    which reaches the end of the buffered text is held back until more input arrives, since it
+    might continue in the next chunk (e.g. '12' followed by '.5', or '=' followed by '=').
+    """
+    def __init__(self, stream, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.line = 1
+        # messages for the lexical errors found so far, in order, as in RegexScanner
+        self.errors = []
+
+    def iter_tokens(self):
+        read = self.stream.read
+        line = self.line
+        buffer = ""
+        at_end = False
+        while True:
+            chunk = read(self.chunk_size)
+            if chunk:
+                buffer += chunk
+            else:
+                at_end = True
+            # a number needs two characters of lookahead ('.' and a digit) to be complete
+            limit = len(buffer) + 2 if at_end else len(buffer) - 1
+            position = 0
+            for match in TOKEN_PATTERN.finditer(buffer):
+                if match.end() >= limit:
+                    break
+                kind = match.lastindex
+                start, position_after = match.span(kind)
+                line += buffer.count("\n", position, start)
+                position = position_after
+                text = match.group(kind)
+                if kind == IDENTIFIER:
+                    yield Token(KEYWORDS.get(text, TokenType.IDENTIFIER), text, None, line)
+                elif kind == OPERATOR:
+                    yield Token(OPERATORS[text], text, None, line)
+                elif kind == NUMBER:
+                    yield Token(TokenType.NUMBER, text, parse_number(text), line)
+                elif kind == STRING:
+                    line += buffer.count("\n", start, position)
+                    yield Token(TokenType.STRING, text, intern(text[1:-1]), line)
+                elif kind == UNTERMINATED:
+                    line += buffer.count("\n", start, position)
+                    self.errors.append("Unterminated string.")
+                    logger.error("Unterminated string.")
+                elif kind == ERROR:
+                    self.errors.append("Unexpected character.")
+                    logger.error("Unexpected character: '{}'".format(text))
+                elif kind == END:
+                    self.line = line
+                    yield Token(TokenType.EOF, "", None, line)
+                    return
+            buffer = buffer[position:]
@@ -0,0 +1,125 @@
+from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Print, Expression, Var, Variable, \
+    Assign, Import
+from pylox.quicken import with_variants
+
+
+class Resolver(object):
+    """
+    Static pass run between parsing and interpreting. Binds every Var, Variable and Assign node
+    to a (depth, slot) pair: depth counts environments to walk outwards from the current one, and
+    slot indexes the variable's value in that environment.
+
+    Local scopes are tracked as name -> slot maps and assigned slots in declaration order. Names
+    which are not found in a local scope are globals; their slots are allocated in the
+    interpreter's global environment when they are declared, so they stay stable across REPL
+    lines. References to globals which have not been declared (yet) are left unresolved, with no
+    depth or slot, and are looked up by name when evaluated: allocating them a slot would grow the
+    global environment for every misspelled name, for as long as a REPL or server runs.
+    """
+
+    def __init__(self, interpreter):
+        self.globals = interpreter.globals
+        self.scopes = []
+        self._resolvers = with_variants({
+            Print: self._resolve_expression_stmt,
+            Expression: self._resolve_expression_stmt,
+            Var: self._resolve_var_stmt,
+            Import: self._resolve_import_stmt,
+            BinaryExpr: self._resolve_binary_expr,
+            UnaryExpr: self._resolve_unary_expr,
+            LiteralExpr: self._resolve_literal_expr,
+            GroupingExpr: self._resolve_grouping_expr,
+            Variable: self._resolve_variable_expr,
+            Assign: self._resolve_assign_expr,
+        })
+
+    def resolve(self, statements):
+        for stmt in statements:
+            self._resolve(stmt)
+        return statements
+
+    def resolve_iter(self, statements):
+        """Resolves statements lazily, for programs which are executed while being parsed."""
+        for stmt in statements:
+            self._resolve(stmt)
+            yield stmt
+
+    def _resolve(self, node):
+        # nodes are visited from an explicit stack rather than by recursion, so that deeply nested
+        # expressions do not run into Python's recursion limit; tuples are (step, node) to run
+        # once the node's children have been resolved
+        work = [node]
+        pop = work.pop
+        resolvers = self._resolvers
+        while work:
+            node = pop()
+            if type(node) is tuple:
+                node[0](node[1])
+                continue
+            resolver = resolvers.get(type(node))
+            if resolver is not None:
+                resolver(node, work)
+
+    def begin_scope(self):
+        self.scopes.append({})
+
+    def end_scope(self):
+        """Closes the innermost scope, returning the number of slots its environment needs."""
+        return len(self.scopes.pop())
+
+    def _declare(self, name):
+        if not self.scopes:
+            return self.globals.slot(name.lexeme)
+        scope = self.scopes[-1]
+        if name.lexeme not in scope:
+            scope[name.lexeme] = len(scope)
+        return scope[name.lexeme]
+
+    def _resolve_local(self, expr, name):
+        for depth, scope in enumerate(reversed(self.scopes)):
+            if name.lexeme in scope:
+                expr.depth = depth
+                expr.slot = scope[name.lexeme]
+                return
+        slot = self.globals.names.get(name.lexeme)
+        expr.depth = None if slot is None else len(self.scopes)
+        expr.slot = slot
+
+    def _resolve_expression_stmt(self, stmt, work):
+        work.append(stmt.expression)
+
+    def _resolve_var_stmt(self, stmt, work):
+        work.append((self._declare_var, stmt))
+        if stmt.initializer is not None:
+            work.append(stmt.initializer)
+
+    def _declare_var(self, stmt):
+        stmt.slot = self._declare(stmt.name)
+
+    def _resolve_import_stmt(self, stmt, work):
+        # imported variables are defined by name, in slots allocated for the names the program uses
+        pass
+
+    def _resolve_binary_expr(self, expr, work):
+        # pushed right first, so the left operand is resolved first
+        work.append(expr.right)
+        work.append(expr.left)
+
+    def _resolve_unary_expr(self, expr, work):
+        work.append(expr.right)
+
+    def _resolve_literal_expr(self, expr, work):
+        pass
+
+    def _resolve_grouping_expr(self, expr, work):
+        work.append(expr.expression)
+
+    def _resolve_variable_expr(self, expr, work):
+        self._resolve_local(expr, expr.name)
+
+    def _resolve_assign_expr(self, expr, work):
+        work.append((self._resolve_assign_target, expr))
+        work.append(expr.value)
+
+    def _resolve_assign_target(self, expr):
+        self._resolve_local(expr, expr.name)
@@ -0,0 +1,77 @@
+"""
+Lox string values.
+
+A Lox string is either a Python str or a Rope. String literals are interned by the scanners, so
+equal literals are the same object and comparing them short-circuits on identity. Concatenation
+with '+' copies short results into a plain str, but longer ones are built as a Rope, a list of
+pieces which is only joined the first time its text is needed (printing, equality, hashing).
+
+Ropes built from one another share their list of pieces: a Rope is the first count pieces of its
+list, so appending to the newest Rope adds a piece to the shared list instead of copying it.
+Building a long string one piece at a time therefore copies it only once, and the intermediate
+Ropes die young instead of keeping each other alive.
+"""
+
+# concatenations shorter than this are copied, since a Rope is not cheaper than a small copy
+FLATTEN_LENGTH = 64
+
+
+class Rope(object):
+    __slots__ = ("length", "_parts", "_count", "_text")
+
+    def __init__(self, parts, length):
+        self.length = length
+        self._parts = parts
+        self._count = len(parts)
+        self._text = None
+
+    def flatten(self):
+        """Returns the text of the rope as a str, joining its pieces the first time."""
+        if self._text is None:
+            parts = self._parts
+            self._text = "".join(parts if len(parts) == self._count else parts[:self._count])
+            self._parts = None
+        return self._text
+
+    def __len__(self):
+        return self.length
+
+    def __str__(self):
+        return self.flatten()
+
+    def __repr__(self):
+        return repr(self.flatten())
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if type(other) is Rope:
+            return self.length == other.length and self.flatten() == other.flatten()
+        if type(other) is str:
+            return self.length == len(other) and self.flatten() == other
+        return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.flatten())
+
+
+# the types of Lox string values
+STRING_TYPES = (str, Rope)
+
+
+def concat(left, right):
+    """Concatenates two Lox strings."""
+    length = len(left) + len(right)
+    if length < FLATTEN_LENGTH:
+        # both are short, so neither is a Rope
+        return left + right
+    if type(left) is Rope and left._text is None and len(left._parts) == left._count:
+        # nothing was appended to left's pieces since it was built, so they can be extended in place
+        parts = left._parts
+    else:
+        parts = [str(left)]
+    parts.append(str(right))
+    return Rope(parts, length)
@@ -1,6 +1,8 @@
 import logging
+import sys
 
 from pylox.tokens import Token, TokenType, KEYWORDS
+from pylox import number
 
 logger = logging.getLogger("pylox.scanner")
 
@@ -104,13 +106,13 @@ class Scanner(object):
             self._advance()
 
         if self._is_at_end():
-            # unterminated string!
-            print("ERROR! unterminated string!")
+            logger.error("Unterminated string.")
             return
 
         # move past close of string
         self._advance()
-        text = self.source[self.start + 1:self.current - 1]
+        # literals are interned, so equal strings in a program are one object
+        text = sys.intern(self.source[self.start + 1:self.current - 1])
         self._add_token(TokenType.STRING, text)
 
     def _is_digit(self, c):
@@ -129,7 +131,7 @@ class Scanner(object):
             self._advance()
         while self._is_digit(self._peek()):
             self._advance()
-        self._add_token(TokenType.NUMBER, float(self.source[self.start:self.current]))
+        self._add_token(TokenType.NUMBER, number.parse(self.source[self.start:self.current]))
 
     def _scan_identifier(self):
         while self._is_alphanumeric(self._peek()):
@@ -0,0 +1,56 @@
+import asyncio
+import itertools
+
+from pylox.interpreter import Interpreter, DEFAULT_QUANTUM
+from pylox import program as programs
+from pylox.output import CaptureSink
+
+
+class Scheduler(object):
+    """
+    Runs many Lox programs concurrently as tasks of the running asyncio event loop. Each program
+    gets its own Interpreter, global environment and output sink, and yields to the loop after
+    every quantum statements, so programs interleave fairly in a single thread.
+
+        scheduler = Scheduler()
+        task = scheduler.spawn('print "hello";', output=sink)
+        interpreters = await scheduler.gather()
+
+    Sources are compiled through pylox.compile, so spawning the same source many times parses it
+    once. A task's result is its Interpreter, whose runtime_error and globals tell how it ended.
+    """
+    def __init__(self, quantum=DEFAULT_QUANTUM, compiled=False):
+        self.quantum = quantum
+        self.compiled = compiled
+        self.tasks = set()
+        self._names = itertools.count(1)
+
+    def spawn(self, source, output=None, globals=None):
+        """
+        Starts running source and returns its asyncio.Task. Printed values go to the output sink
+        (see pylox.output), by default a CaptureSink. Raises CompileException for syntax errors.
+        """
+        program = programs.compile(source)
+        interpreter = Interpreter(compiled=self.compiled, output=CaptureSink() if output is None else output)
+        interpreter.globals = interpreter.environment = program.environment(globals)
+        task = asyncio.get_running_loop().create_task(self._run(interpreter, program.statements),
+                                                      name="lox-{}".format(next(self._names)))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def _run(self, interpreter, statements):
+        await interpreter.interpret_async(statements, self.quantum)
+        return interpreter
+
+    def cancel(self, task=None):
+        """Cancels a task, or every running task."""
+        for running in ([task] if task is not None else list(self.tasks)):
+            running.cancel()
+
+    async def gather(self, *tasks):
+        """
+        Waits for the given tasks, or every running task, returning their Interpreters; cancelled
+        tasks give their CancelledError instead.
+        """
+        return await asyncio.gather(*(tasks or list(self.tasks)), return_exceptions=True)
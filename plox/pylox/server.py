@@ -0,0 +1,266 @@
+"""
+Daemon which runs scripts in a pool of warm worker processes, so that each run skips Python's
+startup and the import of pylox.
+
+    python pylox_cli.py --serve /tmp/pylox.sock
+    python pylox_client.py --socket /tmp/pylox.sock -i script.lox
+
+Requests and replies are JSON lines on a Unix socket. A request carries the command line arguments
+of pylox_cli.py, the client's working directory and optionally the script's source; the reply
+streams {"stdout": text} and {"stderr": text} messages and ends with {"exit": code}. A request of
+{"stats": true} is answered with the server's latency statistics instead.
+"""
+import collections
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import socketserver
+import sys
+import threading
+import time
+import traceback
+
+from pylox.cache import MemoryCache
+
+logger = logging.getLogger("pylox.server")
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_REQUESTS = 1000
+DEFAULT_TIMEOUT = 60.0
+
+# exit code of runs which were killed for exceeding the timeout, as with coreutils' timeout
+TIMEOUT_EXIT_CODE = 124
+
+# output is sent to the server in chunks of this many characters
+CHUNK_SIZE = 8192
+
+# latencies kept for the percentile statistics
+LATENCY_WINDOW = 10000
+
+
+class _Stream(io.TextIOBase):
+    """Text stream which forwards what is written to a pipe, tagged with the stream's name."""
+    def __init__(self, connection, name):
+        self.connection = connection
+        self.name = name
+        self._buffer = []
+        self._size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self._buffer.append(text)
+        self._size += len(text)
+        if self._size >= CHUNK_SIZE:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self._buffer:
+            self.connection.send((self.name, "".join(self._buffer)))
+            self._buffer = []
+            self._size = 0
+
+
+def _work(connection, run, cache_size):
+    """Worker process loop: runs one request at a time until it receives None."""
+    cache = MemoryCache(cache_size)
+    # scripts run without input, rather than reading the server's
+    sys.stdin = io.StringIO()
+    while True:
+        request = connection.recv()
+        if request is None:
+            return
+        stdout = _Stream(connection, "stdout")
+        stderr = _Stream(connection, "stderr")
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                os.chdir(request.get("cwd") or os.getcwd())
+                code = run(request["argv"], source=request.get("source"), cache=cache) or 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 0 if e.code is None else 1
+                if not isinstance(e.code, (int, type(None))):
+                    print(e.code, file=stderr)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+        stdout.flush()
+        stderr.flush()
+        connection.send(("exit", code))
+
+
+class Worker(object):
+    """A worker process and the server's end of its pipe."""
+    def __init__(self, context, run, cache_size):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_work, args=(child, run, cache_size), daemon=True)
+        self.process.start()
+        child.close()
+        self.requests = 0
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class Pool(object):
+    """
+    Pool of worker processes forked from the server, so they start with everything it imported.
+    Workers are replaced after max_requests runs, and when a run exceeds the timeout.
+    """
+    def __init__(self, run, workers=DEFAULT_WORKERS, max_requests=DEFAULT_MAX_REQUESTS, timeout=DEFAULT_TIMEOUT,
+                 cache_size=128):
+        self.run = run
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.context = multiprocessing.get_context("fork")
+        self.idle = queue.Queue()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self._lock = threading.Lock()
+        self._workers = [self._start() for _ in range(workers)]
+        for worker in self._workers:
+            self.idle.put(worker)
+
+    def _start(self):
+        return Worker(self.context, self.run, self.cache_size)
+
+    def _replace(self, worker, kill=False):
+        replacement = self._start()
+        with self._lock:
+            self._workers[self._workers.index(worker)] = replacement
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+        return replacement
+
+    def execute(self, request, send):
+        """Runs a request on an idle worker, passing its messages to send; returns the exit code."""
+        start = time.perf_counter()
+        worker = self.idle.get()
+        try:
+            worker.requests += 1
+            worker.connection.send(request)
+            deadline = None if self.timeout is None else time.monotonic() + self.timeout
+            while True:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                if not worker.connection.poll(remaining):
+                    logger.warning("Request timed out after {}s: {}".format(self.timeout, request["argv"]))
+                    with self._lock:
+                        self.timeouts += 1
+                    worker = self._replace(worker, kill=True)
+                    send("stderr", "Timed out after {}s.\n".format(self.timeout))
+                    return TIMEOUT_EXIT_CODE
+                try:
+                    name, value = worker.connection.recv()
+                except EOFError:
+                    # the worker died, e.g. killed by the OS
+                    worker = self._replace(worker, kill=True)
+                    send("stderr", "Worker exited unexpectedly.\n")
+                    return 1
+                if name == "exit":
+                    return value
+                send(name, value)
+        finally:
+            with self._lock:
+                self.requests += 1
+                self.latencies.append(time.perf_counter() - start)
+            if worker.requests >= self.max_requests:
+                with self._lock:
+                    self.recycled += 1
+                worker = self._replace(worker)
+            self.idle.put(worker)
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            stats = {"requests": self.requests, "timeouts": self.timeouts, "recycled": self.recycled,
+                     "workers": len(self._workers)}
+        for percentile in (50, 90, 99):
+            stats["p{}".format(percentile)] = _percentile(latencies, percentile)
+        return stats
+
+    def close(self):
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            worker.stop()
+
+
+def _percentile(values, percentile):
+    """Nearest-rank percentile of sorted values, or None if there are none."""
+    if not values:
+        return None
+    return values[max(int(round(percentile / 100 * len(values))) - 1, 0)]
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        if request.get("stats"):
+            self._send({"stats": self.server.pool.stats()})
+            return
+        code = self.server.pool.execute(request, lambda name, value: self._send({name: value}))
+        self._send({"exit": code})
+
+    def _send(self, message):
+        try:
+            self.wfile.write(json.dumps(message).encode() + b"\n")
+        except OSError:
+            # the client went away; the run carries on so the worker stays in a known state
+            pass
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, pool):
+        if os.path.exists(path):
+            os.unlink(path)
+        self.pool = pool
+        super().__init__(path, _Handler)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.server_address)
+
+
+def _terminate(signum, frame):
+    raise SystemExit(0)
+
+
+def serve(path, run, **options):
+    """Serves requests on the Unix socket at path until interrupted; run(argv, source, cache) runs one script."""
+    server = Server(path, Pool(run, **options))
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _terminate)
+    logger.info("Serving on {}".format(path))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info("Served {} requests: {}".format(server.pool.requests, server.pool.stats()))
@@ -1,43 +1,53 @@
 class TokenType(object):
-    LEFT_PAREN = "LEFT_PAREN"           # (
-    RIGHT_PAREN = "RIGHT_PAREN"         # )
-    LEFT_BRACE = "LEFT_BRACE"           # [
-    RIGHT_BRACE = "RIGHT_BRACE"         # ]
-    COMMA = "COMMA"                     # ,
-    DOT = "DOT"                         # .
-    MINUS = "MINUS"                     # -
-    PLUS = "PLUS"                       # +
-    SEMICOLON = "SEMICOLON"             # ;
-    SLASH = "SLASH"                     # /
-    STAR = "STAR"                       # *
-    BANG = "BANG"                       # !
-    BANG_EQUAL = "BANG_EQUAL"           # !=
-    EQUAL = "EQUAL"                     # =
-    EQUAL_EQUAL = "EQUAL_EQUAL"         # ==
-    GREATER = "GREATER"                 # >
-    GREATER_EQUAL = "GREATER_EQUAL"     # >=
-    LESS = "LESS"                       # <
-    LESS_EQUAL = "LESS_EQUAL"           # <=
-    IDENTIFIER = "IDENTIFIER"           # ident
-    STRING = "STRING"                   # string
-    NUMBER = "NUMBER"                   # number
-    AND = "AND"                         # and
-    CLASS = "CLASS"                     # class
-    ELSE = "ELSE"                       # else
-    FALSE = "FALSE"                     # false
-    FUN = "FUN"                         # fun
-    FOR = "FOR"                         # for
-    IF = "IF"                           # if
-    NIL = "NIL"                         # nil
-    OR = "OR"                           # or
-    PRINT = "PRINT"                     # print
-    RETURN = "RETURN"                   # return
-    SUPER = "SUPER"                     # super
-    THIS = "THIS"                       # this
-    TRUE = "TRUE"                       # true
-    VAR = "VAR"                         # var
-    WHILE = "WHILE"                     # while
-    EOF = "EOF"                         # eof
+    """Token types are small integers, so comparing them is cheap; see token_type_name for display."""
+    LEFT_PAREN = 0                      # (
+    RIGHT_PAREN = 1                     # )
+    LEFT_BRACE = 2                      # [
+    RIGHT_BRACE = 3                     # ]
+    COMMA = 4                           # ,
+    DOT = 5                             # .
+    MINUS = 6                           # -
+    PLUS = 7                            # +
+    SEMICOLON = 8                       # ;
+    SLASH = 9                           # /
+    STAR = 10                           # *
+    BANG = 11                           # !
+    BANG_EQUAL = 12                     # !=
+    EQUAL = 13                          # =
+    EQUAL_EQUAL = 14                    # ==
+    GREATER = 15                        # >
+    GREATER_EQUAL = 16                  # >=
+    LESS = 17                           # <
+    LESS_EQUAL = 18                     # <=
+    IDENTIFIER = 19                     # ident
+    STRING = 20                         # string
+    NUMBER = 21                         # number
+    AND = 22                            # and
+    CLASS = 23                          # class
+    ELSE = 24                           # else
+    FALSE = 25                          # false
+    FUN = 26                            # fun
+    FOR = 27                            # for
+    IF = 28                             # if
+    NIL = 29                            # nil
+    OR = 30                             # or
+    PRINT = 31                          # print
+    RETURN = 32                         # return
+    SUPER = 33                          # super
+    THIS = 34                           # this
+    TRUE = 35                           # true
+    VAR = 36                            # var
+    WHILE = 37                          # while
+    IMPORT = 38                         # import
+    EOF = 39                            # eof
+
+
+TOKEN_TYPE_NAMES = sorted((name for name in vars(TokenType) if not name.startswith("_")),
+                          key=lambda name: getattr(TokenType, name))
+
+
+def token_type_name(token_type):
+    return TOKEN_TYPE_NAMES[token_type]
 
 
 KEYWORDS = {
@@ -48,6 +58,7 @@ KEYWORDS = {
     "for": TokenType.FOR,
     "fun": TokenType.FUN,
     "if": TokenType.IF,
+    "import": TokenType.IMPORT,
     "nil": TokenType.NIL,
     "or": TokenType.OR,
     "print": TokenType.PRINT,
@@ -61,11 +72,38 @@ KEYWORDS = {
 
 
 class Token(object):
+    __slots__ = ("token_type", "lexeme", "literal", "line")
+
     def __init__(self, token_type, lexeme, literal, line):
         self.token_type = token_type
         self.lexeme = lexeme
         self.literal = literal
         self.line = line
 
+    def __eq__(self, other):
+        return (isinstance(other, Token) and
+                self.token_type == other.token_type and
+                self.lexeme == other.lexeme and
+                self.literal == other.literal and
+                self.line == other.line)
+
+    def __hash__(self):
+        return hash((self.token_type, self.lexeme, self.literal, self.line))
+
     def __repr__(self):
-        return "({} {} {})".format(self.token_type, self.lexeme, self.literal)
+        return "({} {} {})".format(TOKEN_TYPE_NAMES[self.token_type], self.lexeme, self.literal)
+
+
+def first_line(node):
+    """Line of the first token within an AST node, or None for nodes (like literals) which have none."""
+    if type(node) is Token:
+        return node.line
+    # specialized nodes (see pylox.quicken) inherit their fields
+    for cls in type(node).__mro__:
+        for field in getattr(cls, "__slots__", ()):
+            value = getattr(node, field, None)
+            if value is not None and type(value) is not int:
+                line = first_line(value)
+                if line is not None:
+                    return line
+    return None
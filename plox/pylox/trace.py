@@ -0,0 +1,153 @@
+"""
+Structured tracing of a run, as one line per event, with tab-separated fields:
+
+    <microseconds since start> <event> <field> ...
+
+The events are
+
+    token   line, token type, lexeme          a token was scanned
+    node    line, node class                  the tree-walker entered a node
+    define  line, name, value                 a variable was defined
+    error   line, message                     the run stopped with a runtime error
+
+Fields are escaped so that every event is one line, and unknown lines are '-'. Nodes without
+tokens (literals, groupings) are attributed to the line of the node evaluated before them.
+Tracing is attached by wrapping the token stream and the Interpreter's visit methods
+(Interpreter.instrument), so untraced runs execute no tracing code at all.
+
+    python -m pylox.trace pylox.trace
+
+summarizes a trace file: event counts, the busiest node classes and lines, and the errors.
+"""
+import argparse
+import collections
+import sys
+import time
+
+from pylox.expressions import Var
+from pylox.tokens import first_line, token_type_name
+from pylox.environment import UNDEFINED
+
+TOKEN = "token"
+NODE = "node"
+DEFINE = "define"
+ERROR = "error"
+
+
+def _field(value):
+    if value is None:
+        return "-"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+class Tracer(object):
+    """Writes events to a text stream; attach it to a token stream with tokens() and to an Interpreter."""
+    def __init__(self, stream, clock=time.perf_counter):
+        self.stream = stream
+        self.clock = clock
+        self.start = clock()
+
+    def emit(self, event, *fields):
+        self.stream.write("{}\t{}\t{}\n".format(int((self.clock() - self.start) * 1e6), event,
+                                                 "\t".join(_field(f) for f in fields)))
+
+    def tokens(self, tokens):
+        """Yields the given tokens, emitting an event for each."""
+        for token in tokens:
+            self.emit(TOKEN, token.line, token_type_name(token.token_type), token.lexeme)
+            yield token
+
+    def attach(self, interpreter):
+        """Emits node and define events for everything the Interpreter's tree-walker evaluates."""
+        emit = self.emit
+        # nodes without tokens are attributed to the line of the last node which had one
+        last_line = [None]
+
+        def wrapper(visitor):
+            def traced(node):
+                line = first_line(node)
+                if line is None:
+                    line = last_line[0]
+                else:
+                    last_line[0] = line
+                emit(NODE, line, type(node).__name__)
+                value = visitor(node)
+                if type(node) is Var:
+                    emit(DEFINE, line, node.name.lexeme, repr(_defined(interpreter, node)))
+                return value
+            return traced
+        interpreter.instrument(wrapper)
+
+    def error(self, error):
+        self.emit(ERROR, getattr(error, "line", None), error)
+
+
+def _defined(interpreter, stmt):
+    environment = interpreter.environment
+    slot = stmt.slot if stmt.slot is not None else environment.names.get(stmt.name.lexeme)
+    value = environment.slots[slot]
+    return None if value is UNDEFINED else value
+
+
+class Summary(object):
+    def __init__(self):
+        self.events = collections.Counter()
+        self.token_types = collections.Counter()
+        self.node_types = collections.Counter()
+        self.lines = collections.Counter()
+        self.definitions = collections.Counter()
+        self.errors = []
+        self.duration = 0
+
+    def add(self, line):
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) < 2:
+            return
+        self.duration = max(self.duration, int(fields[0]))
+        event = fields[1]
+        self.events[event] += 1
+        if event == TOKEN:
+            self.token_types[fields[3]] += 1
+        elif event == NODE:
+            self.node_types[fields[3]] += 1
+            self.lines[fields[2]] += 1
+        elif event == DEFINE:
+            self.definitions[fields[3]] += 1
+        elif event == ERROR:
+            self.errors.append("[line {}] {}".format(fields[2], fields[3]))
+
+    def report(self, limit=10):
+        rows = ["{} events in {:.6f}s".format(sum(self.events.values()), self.duration / 1e6)]
+        for title, counter in (("events", self.events), ("token types", self.token_types),
+                               ("node classes", self.node_types), ("lines (node events)", self.lines),
+                               ("variables defined", self.definitions)):
+            if counter:
+                rows.append("")
+                rows.append(title)
+                rows.extend("  {:<24} {:>10}".format(key, count) for key, count in counter.most_common(limit))
+        if self.errors:
+            rows.append("")
+            rows.append("errors")
+            rows.extend("  " + error for error in self.errors)
+        return "\n".join(rows)
+
+
+def summarize(lines):
+    summary = Summary()
+    for line in lines:
+        summary.add(line)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a pylox trace")
+    parser.add_argument("trace", help="trace file written by pylox_cli.py --trace")
+    parser.add_argument("-n", dest="limit", type=int, default=10, help="entries per table")
+    args = parser.parse_args()
+    with open(args.trace) as f:
+        print(summarize(f).report(args.limit))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+import itertools
+import logging
+import math
+
+from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, GroupingExpr, Print, Expression, Var, Variable, Assign
+from pylox.quicken import with_variants
+from pylox.tokens import TokenType, first_line
+from pylox.exceptions import RuntimeException, as_lox_error
+from pylox.environment import Environment, UNDEFINED
+from pylox.interpreter import Interpreter
+from pylox.output import BufferedSink
+from pylox.rope import STRING_TYPES, concat
+from pylox.number import NUMBER_TYPES, negate
+
+logger = logging.getLogger("pylox.transpile")
+
+# statements translated into one Python function at a time, so streamed programs start running early
+BATCH_SIZE = 1000
+
+FILENAME = "<lox>"
+
+# CPython's parser gives up on deeply nested parentheses, so deeper subexpressions are interpreted
+MAX_NESTING = 40
+
+NUMERIC_OPERATORS = {
+    TokenType.GREATER: ">",
+    TokenType.GREATER_EQUAL: ">=",
+    TokenType.LESS: "<",
+    TokenType.LESS_EQUAL: "<=",
+    TokenType.MINUS: "-",
+    TokenType.SLASH: "/",
+    TokenType.STAR: "*",
+    TokenType.PLUS: "+",
+}
+
+# the Interpreter's _is_equal is Python equality for every Lox value
+EQUALITY_OPERATORS = {
+    TokenType.EQUAL_EQUAL: "==",
+    TokenType.BANG_EQUAL: "!=",
+}
+
+
+class Translation(object):
+    """Python source for a batch of statements, with the tables its helpers index into."""
+    def __init__(self):
+        self.lines = ["def program(S=S, U=U, K=K, N=N, P=P, F=F, _operand=_operand, _operands=_operands, "
+                      "_add=_add, _negate=_negate, _undefined=_undefined, "
+                      "_assign=_assign, _evaluate=_evaluate, _execute=_execute):"]
+        # Lox line of every Python line, for errors raised by Python itself (e.g. division by zero)
+        self.line_table = [None, None]
+        # tokens and nodes referred to by index from the generated code, and non-literal constants
+        self.tokens = []
+        self.nodes = []
+        self.constants = []
+        self.temporaries = itertools.count()
+        self.nesting = 0
+
+    @property
+    def source(self):
+        return "\n".join(self.lines) + "\n    pass\n"
+
+    def emit(self, line, lox_line):
+        self.lines.append("    " + line)
+        self.line_table.append(lox_line)
+
+    def token(self, token):
+        self.tokens.append(token)
+        return len(self.tokens) - 1
+
+    def node(self, node):
+        self.nodes.append(node)
+        return len(self.nodes) - 1
+
+    def temporary(self):
+        return "t{}".format(next(self.temporaries))
+
+
+class Transpiler(object):
+    """
+    Translates resolved statements into the source of a Python function, so that Lox arithmetic
+    and variable access run as CPython bytecode instead of being interpreted node by node.
+
+    Lox semantics are kept inline: operands are bound to temporaries with ':=' so they are
+    evaluated exactly once and in order, number checks are 'type(x) in F' tests against the number
+    types, and truthiness is 'x is None or x is False' negated. Errors are raised through small
+    helpers which receive the index of the token to report. Nodes which cannot be translated
+    (unresolved variables, locals, imports, statements which failed to parse) are handed to the
+    tree-walking Interpreter by index.
+    """
+
+    def __init__(self):
+        self._statement_translators = {
+            Print: self._translate_print_stmt,
+            Expression: self._translate_expression_stmt,
+            Var: self._translate_var_stmt,
+        }
+        self._expression_translators = with_variants({
+            BinaryExpr: self._translate_binary_expr,
+            UnaryExpr: self._translate_unary_expr,
+            LiteralExpr: self._translate_literal_expr,
+            GroupingExpr: self._translate_grouping_expr,
+            Variable: self._translate_variable_expr,
+            Assign: self._translate_assign_expr,
+        })
+
+    def translate(self, statements):
+        translation = Translation()
+        for stmt in statements:
+            # temporaries are reused by every statement, since each one is a local of the function
+            translation.temporaries = itertools.count()
+            translator = self._statement_translators.get(type(stmt))
+            line = first_line(stmt)
+            if translator is None:
+                translation.emit("_execute({})".format(translation.node(stmt)), line)
+            else:
+                translator(translation, stmt, line)
+        return translation
+
+    def _translate(self, translation, expr):
+        translator = self._expression_translators.get(type(expr))
+        if translator is None or translation.nesting >= MAX_NESTING:
+            return "_evaluate({})".format(translation.node(expr))
+        translation.nesting += 1
+        try:
+            return translator(translation, expr)
+        finally:
+            translation.nesting -= 1
+
+    def _translate_print_stmt(self, translation, stmt, line):
+        translation.emit("P({})".format(self._translate(translation, stmt.expression)), line)
+
+    def _translate_expression_stmt(self, translation, stmt, line):
+        expr = stmt.expression
+        if type(expr) is Assign and expr.slot is not None and expr.depth == 0:
+            # assignment statements are by far the most common, so they get plain Python statements
+            value = translation.temporary()
+            translation.emit("{} = {}".format(value, self._translate(translation, expr.value)), line)
+            translation.emit("if S[{}] is U: _undefined({})".format(expr.slot, translation.token(expr.name)), line)
+            translation.emit("S[{}] = {}".format(expr.slot, value), line)
+            return
+        translation.emit(self._translate(translation, expr), line)
+
+    def _translate_var_stmt(self, translation, stmt, line):
+        if stmt.slot is None:
+            translation.emit("_execute({})".format(translation.node(stmt)), line)
+            return
+        value = "None" if stmt.initializer is None else self._translate(translation, stmt.initializer)
+        translation.emit("S[{}] = {}".format(stmt.slot, value), line)
+
+    def _translate_literal_expr(self, translation, expr):
+        value = expr.value
+        if value is None or type(value) in (bool, str, int) or (type(value) is float and math.isfinite(value)):
+            return repr(value)
+        translation.constants.append(value)
+        return "K[{}]".format(len(translation.constants) - 1)
+
+    def _translate_grouping_expr(self, translation, expr):
+        return self._translate(translation, expr.expression)
+
+    def _translate_variable_expr(self, translation, expr):
+        if expr.slot is None or expr.depth != 0:
+            return "_evaluate({})".format(translation.node(expr))
+        value = translation.temporary()
+        return "({0} if ({0} := S[{1}]) is not U else _undefined({2}))".format(
+            value, expr.slot, translation.token(expr.name))
+
+    def _translate_assign_expr(self, translation, expr):
+        if expr.slot is None or expr.depth != 0:
+            return "_evaluate({})".format(translation.node(expr))
+        return "_assign({}, {}, {})".format(expr.slot, self._translate(translation, expr.value),
+                                            translation.token(expr.name))
+
+    def _translate_unary_expr(self, translation, expr):
+        right = self._translate(translation, expr.right)
+        value = translation.temporary()
+        if expr.operator.token_type == TokenType.MINUS:
+            # the int 0 is negated by _negate, since -0 is a float
+            return "(-{0} if type({0} := {1}) is float or type({0}) is int and {0} else _negate({0}, {2}))".format(
+                value, right, translation.token(expr.operator))
+        if expr.operator.token_type == TokenType.BANG:
+            return "(({0} := {1}) is None or {0} is False)".format(value, right)
+        return "({}, None)[1]".format(right)
+
+    def _translate_binary_expr(self, translation, expr):
+        left = self._translate(translation, expr.left)
+        right = self._translate(translation, expr.right)
+        token_type = expr.operator.token_type
+        if token_type in EQUALITY_OPERATORS:
+            return "({} {} {})".format(left, EQUALITY_OPERATORS[token_type], right)
+        if token_type not in NUMERIC_OPERATORS:
+            return "({}, {}, None)[2]".format(left, right)
+        operator = NUMERIC_OPERATORS[token_type]
+        token = translation.token(expr.operator)
+        # '+' on anything but two numbers is handed to _add, which concatenates strings
+        fallback = "_add({a}, {b}, {token})" if token_type == TokenType.PLUS else "_operands({token})"
+        # number literals need no type test
+        if _is_number(expr.right) and not _is_number(expr.left):
+            a = translation.temporary()
+            return ("({a} {op} {b} if type({a} := {left}) in F else " + fallback + ")").format(
+                a=a, b=right, op=operator, left=left, token=token)
+        if _is_number(expr.left) and not _is_number(expr.right):
+            b = translation.temporary()
+            return ("({a} {op} {b} if type({b} := {right}) in F else " + fallback + ")").format(
+                a=left, b=b, op=operator, right=right, token=token)
+        a = translation.temporary()
+        b = translation.temporary()
+        # '&' rather than 'and', so the right operand is evaluated even when the left is no number
+        return ("({a} {op} {b} if (type({a} := {left}) in F) & (type({b} := {right}) in F) "
+                "else " + fallback + ")").format(a=a, b=b, op=operator, left=left, right=right, token=token)
+
+
+def _is_number(expr):
+    return type(expr) is LiteralExpr and type(expr.value) in NUMBER_TYPES
+
+
+class TranspilingInterpreter(object):
+    """
+    Runs statements by transpiling them to Python with the Transpiler and executing the result.
+    Shares the Interpreter's interface (globals, interpret, runtime_error), so it can be used as a
+    drop-in replacement behind the Resolver.
+    """
+    def __init__(self, output=None, importer=None):
+        self.globals = Environment()
+        self.transpiler = Transpiler()
+        # sink for printed values, see pylox.output
+        self.output = BufferedSink() if output is None else output
+        # evaluates whatever the transpiler hands back, in the same global environment
+        self.fallback = Interpreter(output=self.output, importer=importer)
+        self.fallback.globals = self.fallback.environment = self.globals
+        # import statements are among them, so modules are run by the fallback's importer
+        self.importer = self.fallback.importer
+        # the error which stopped the last call to interpret, if any
+        self.runtime_error = None
+
+    def interpret(self, statements):
+        self.runtime_error = None
+        try:
+            for translation in self.compile_iter(statements):
+                self.run(translation)
+        except Exception as e:
+            e = self.runtime_error = as_lox_error(e)
+            logger.error("Runtime Exception: {}".format(e))
+            self.output.write("Runtime Exception: {}\n".format(e))
+        finally:
+            self.output.flush()
+
+    def compile(self, statements):
+        """Returns the Translation of statements, with its compiled Python function as .program."""
+        translation = self.transpiler.translate(statements)
+        namespace = self._namespace(translation)
+        exec(compile(translation.source, FILENAME, "exec"), namespace)
+        translation.program = namespace["program"]
+        return translation
+
+    def compile_iter(self, statements):
+        """Compiles statements in batches of BATCH_SIZE, for programs which are executed while being parsed."""
+        statements = iter(statements)
+        while True:
+            batch = list(itertools.islice(statements, BATCH_SIZE))
+            if not batch:
+                return
+            yield self.compile(batch)
+
+    def run(self, translation):
+        try:
+            translation.program()
+        except Exception as e:
+            if getattr(e, "line", None) is None:
+                e.line = self._lox_line(e, translation)
+            raise
+
+    def _lox_line(self, error, translation):
+        code = translation.program.__code__
+        traceback = error.__traceback__
+        line = None
+        while traceback is not None:
+            if traceback.tb_frame.f_code is code:
+                line = translation.line_table[traceback.tb_lineno]
+            traceback = traceback.tb_next
+        return line
+
+    def _namespace(self, translation):
+        slots = self.globals.slots
+        tokens = translation.tokens
+        nodes = translation.nodes
+
+        def _operand(n):
+            raise RuntimeException(tokens[n], "Operand must be a number.")
+
+        def _operands(n):
+            raise RuntimeException(tokens[n], "Operands must be numbers.")
+
+        def _negate(value, n):
+            if type(value) is int:
+                return negate(value)
+            _operand(n)
+
+        def _add(a, b, n):
+            if type(a) in STRING_TYPES and type(b) in STRING_TYPES:
+                return concat(a, b)
+            raise RuntimeException(tokens[n], "Operands must be two numbers or two strings.")
+
+        def _undefined(n):
+            name = tokens[n].lexeme
+            raise RuntimeException(name, "Undefined variable '{}'.".format(name), line=tokens[n].line)
+
+        def _assign(slot, value, n):
+            if slots[slot] is UNDEFINED:
+                _undefined(n)
+            slots[slot] = value
+            return value
+
+        return {
+            "S": slots,
+            "U": UNDEFINED,
+            "K": translation.constants,
+            "N": nodes,
+            "P": self.output.print,
+            "F": NUMBER_TYPES,
+            "_operand": _operand,
+            "_operands": _operands,
+            "_add": _add,
+            "_negate": _negate,
+            "_undefined": _undefined,
+            "_assign": _assign,
+            "_evaluate": lambda n: self.fallback.evaluate(nodes[n]),
+            "_execute": lambda n: self.fallback._execute(nodes[n]),
+        }
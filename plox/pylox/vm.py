@@ -0,0 +1,216 @@
+import logging
+
+from pylox.compiler import Compiler, OpCode
+from pylox.environment import Environment, UNDEFINED
+from pylox.exceptions import RuntimeException, CompileException, as_lox_error
+from pylox.output import BufferedSink
+from pylox.rope import STRING_TYPES, concat
+from pylox.number import NUMBER_TYPES, negate
+from pylox.module import Importer
+
+logger = logging.getLogger("pylox.vm")
+
+
+class VM(object):
+    """
+    Stack based virtual machine executing Chunks produced by the Compiler. Shares the Interpreter's
+    interface (globals, interpret) so it can be used as a drop-in replacement behind the Resolver.
+    """
+    def __init__(self, output=None, importer=None):
+        self.globals = Environment()
+        self.compiler = Compiler()
+        # sink for printed values, see pylox.output
+        self.output = BufferedSink() if output is None else output
+        # runs imported modules, see pylox.module
+        self.importer = Importer() if importer is None else importer
+        # the error which stopped the last call to interpret, if any
+        self.runtime_error = None
+
+    def interpret(self, statements):
+        """
+        Compiles and runs each statement in turn, so statements can be streamed in. Runtime errors
+        stop execution and are reported; compile errors are raised to the caller.
+        """
+        self.runtime_error = None
+        try:
+            for stmt in statements:
+                self.run(self.compiler.compile((stmt,)))
+        except CompileException:
+            raise
+        except Exception as e:
+            e = self.runtime_error = as_lox_error(e)
+            logger.error("Runtime Exception: {}".format(e))
+            self.output.write("Runtime Exception: {}\n".format(e))
+        finally:
+            self.output.flush()
+
+    def run(self, chunk):
+        code = chunk.code
+        constants = chunk.constants
+        slots = self.globals.slots
+        names = self.globals.names
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        output = self.output.print
+        ip = 0
+        # a local, for the number checks of every arithmetic opcode
+        NUMBERS = NUMBER_TYPES
+
+        # opcodes are bound to locals, since attribute lookups in the dispatch chain are expensive
+        ADD = OpCode.ADD
+        CONSTANT = OpCode.CONSTANT
+        CONSTANT_LONG = OpCode.CONSTANT_LONG
+        DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL
+        DIVIDE = OpCode.DIVIDE
+        EQUAL = OpCode.EQUAL
+        FALSE = OpCode.FALSE
+        GET_GLOBAL = OpCode.GET_GLOBAL
+        GET_GLOBAL_NAMED = OpCode.GET_GLOBAL_NAMED
+        GREATER = OpCode.GREATER
+        GREATER_EQUAL = OpCode.GREATER_EQUAL
+        IMPORT = OpCode.IMPORT
+        LESS = OpCode.LESS
+        LESS_EQUAL = OpCode.LESS_EQUAL
+        MULTIPLY = OpCode.MULTIPLY
+        NEGATE = OpCode.NEGATE
+        NIL = OpCode.NIL
+        NOT = OpCode.NOT
+        NOT_EQUAL = OpCode.NOT_EQUAL
+        POP = OpCode.POP
+        PRINT = OpCode.PRINT
+        RETURN = OpCode.RETURN
+        SET_GLOBAL = OpCode.SET_GLOBAL
+        SET_GLOBAL_NAMED = OpCode.SET_GLOBAL_NAMED
+        SUBTRACT = OpCode.SUBTRACT
+        TRUE = OpCode.TRUE
+
+        # opcodes are tested roughly in order of frequency
+        while True:
+            op = code[ip]
+            ip += 1
+            if op == CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == GET_GLOBAL:
+                value = slots[code[ip] << 8 | code[ip + 1]]
+                if value is UNDEFINED:
+                    name = self._global_name(code[ip] << 8 | code[ip + 1])
+                    raise self._error(chunk, ip, "Undefined variable '{}'.".format(name))
+                push(value)
+                ip += 2
+            elif op == ADD:
+                b = pop()
+                a = stack[-1]
+                if type(a) in NUMBERS and type(b) in NUMBERS:
+                    stack[-1] = a + b
+                elif type(a) in STRING_TYPES and type(b) in STRING_TYPES:
+                    stack[-1] = concat(a, b)
+                else:
+                    raise self._error(chunk, ip, "Operands must be two numbers or two strings.")
+            elif op == SUBTRACT:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBERS or type(b) not in NUMBERS:
+                    raise self._error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = a - b
+            elif op == MULTIPLY:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBERS or type(b) not in NUMBERS:
+                    raise self._error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = a * b
+            elif op == DIVIDE:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBERS or type(b) not in NUMBERS:
+                    raise self._error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = a / b
+            elif op == SET_GLOBAL:
+                slot = code[ip] << 8 | code[ip + 1]
+                if slots[slot] is UNDEFINED:
+                    raise self._error(chunk, ip, "Undefined variable '{}'.".format(self._global_name(slot)))
+                slots[slot] = stack[-1]
+                ip += 2
+            elif op == POP:
+                pop()
+            elif op == LESS:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBERS or type(b) not in NUMBERS:
+                    raise self._error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = a < b
+            elif op == LESS_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBERS or type(b) not in NUMBERS:
+                    raise self._error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = a <= b
+            elif op == GREATER:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBERS or type(b) not in NUMBERS:
+                    raise self._error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = a > b
+            elif op == GREATER_EQUAL:
+                b = pop()
+                a = stack[-1]
+                if type(a) not in NUMBERS or type(b) not in NUMBERS:
+                    raise self._error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = a >= b
+            elif op == EQUAL:
+                b = pop()
+                stack[-1] = stack[-1] == b
+            elif op == NOT_EQUAL:
+                b = pop()
+                stack[-1] = stack[-1] != b
+            elif op == NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+            elif op == NEGATE:
+                if type(stack[-1]) not in NUMBERS:
+                    raise self._error(chunk, ip, "Operand must be a number.")
+                stack[-1] = negate(stack[-1])
+            elif op == NIL:
+                push(None)
+            elif op == TRUE:
+                push(True)
+            elif op == FALSE:
+                push(False)
+            elif op == DEFINE_GLOBAL:
+                slots[code[ip] << 8 | code[ip + 1]] = pop()
+                ip += 2
+            elif op == PRINT:
+                output(pop())
+            elif op == CONSTANT_LONG:
+                push(constants[code[ip] << 16 | code[ip + 1] << 8 | code[ip + 2]])
+                ip += 3
+            elif op == RETURN:
+                return
+            elif op == IMPORT:
+                self.importer.import_into(self.globals, pop(), self.output, chunk.line_at(ip - 1))
+            elif op == GET_GLOBAL_NAMED:
+                name = constants[code[ip] << 16 | code[ip + 1] << 8 | code[ip + 2]]
+                slot = names.get(name)
+                if slot is None or slots[slot] is UNDEFINED:
+                    raise self._error(chunk, ip, "Undefined variable '{}'.".format(name))
+                push(slots[slot])
+                ip += 3
+            elif op == SET_GLOBAL_NAMED:
+                name = constants[code[ip] << 16 | code[ip + 1] << 8 | code[ip + 2]]
+                slot = names.get(name)
+                if slot is None or slots[slot] is UNDEFINED:
+                    raise self._error(chunk, ip, "Undefined variable '{}'.".format(name))
+                slots[slot] = stack[-1]
+                ip += 3
+            else:
+                raise self._error(chunk, ip, "Unknown opcode {}.".format(op))
+
+    def _global_name(self, slot):
+        for name, index in self.globals.names.items():
+            if index == slot:
+                return name
+        return "<slot {}>".format(slot)
+
+    def _error(self, chunk, ip, message):
+        return RuntimeException(None, message, line=chunk.line_at(ip - 1))
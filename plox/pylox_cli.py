@@ -1,7 +1,20 @@
 import argparse
-from pylox.scanner import Scanner
-from pylox.parser import Parser
-from pylox.interpreter import Interpreter
+import io
+import logging
+import os
+import sys
+from pylox.regex_scanner import RegexScanner, StreamScanner
+from pylox.parser import Parser, StacklessParser
+from pylox.interpreter import Interpreter, DEFAULT_MAX_DEPTH
+from pylox.resolver import Resolver
+from pylox.optimizer import Optimizer
+from pylox.cache import ProgramCache, MAX_SOURCE_SIZE
+from pylox.profiler import Profiler
+from pylox.trace import Tracer
+from pylox.vm import VM
+from pylox.transpile import TranspilingInterpreter
+from pylox.exceptions import CompileException
+from pylox import server
 
 
 PYLOX_PROMPT = "> "
@@ -13,9 +26,39 @@ class PyLox(object):
     to run as REPL prompt or on a pylox source file.
     """
 
-    def __init__(self, verbose=False):
+    def __init__(self, verbose=False, compiled=False, vm=False, optimize=False, cache=None, transpile=False,
+                 profile=False, quicken=False, trace=None, output=None, search_path=(), stackless=False,
+                 max_depth=DEFAULT_MAX_DEPTH):
         self.verbose = verbose
-        self.interpreter = Interpreter()
+        self.vm = vm
+        self.transpile = transpile
+        # output is a sink for printed values (see pylox.output), by default buffered to stdout
+        if vm:
+            self.interpreter = VM(output=output)
+        elif transpile:
+            self.interpreter = TranspilingInterpreter(output=output)
+        else:
+            self.interpreter = Interpreter(compiled=compiled, quicken=quicken, output=output, stackless=stackless,
+                                           max_depth=max_depth)
+        # stackless evaluation is for expressions nested too deeply for the recursive parser
+        self.parser_class = StacklessParser if stackless else Parser
+        # directories searched by import statements before the default search path (see pylox.module)
+        self.interpreter.importer.search_path[:0] = search_path
+        # profiling hooks into the tree-walker's visit methods
+        self.profiler = None
+        if profile:
+            self.profiler = Profiler()
+            self.interpreter.instrument(self.profiler.wrap)
+        # tracing, to the given text stream, also hooks into the tree-walker
+        self.tracer = None
+        if trace is not None:
+            self.tracer = Tracer(trace)
+            self.tracer.attach(self.interpreter)
+        self.resolver = Resolver(self.interpreter)
+        self.optimizer = Optimizer() if optimize else None
+        # a ProgramCache, used by run_file to skip scanning and parsing of unchanged scripts; its
+        # serialized form is nested like the program, so deeply nested programs are not cached
+        self.cache = None if stackless else cache
 
     def run_prompt(self):
         while True:
@@ -23,34 +66,208 @@ class PyLox(object):
             self.try_read_and_evaluate(source)
 
     def run_file(self, path):
+        # the script's imports are looked up next to it first
+        self.interpreter.importer.directory = os.path.dirname(os.path.abspath(path))
         with open(path) as f:
-            source = f.read()
+            if self.verbose:
+                self.try_read_and_evaluate(f.read())
+            elif self.cache is not None and os.fstat(f.fileno()).st_size <= MAX_SOURCE_SIZE:
+                self.run_cached(f.read())
+            else:
+                self.run_stream(f)
+
+    def run_source(self, source):
+        if self.verbose:
             self.try_read_and_evaluate(source)
+        elif self.cache is not None and len(source) <= MAX_SOURCE_SIZE:
+            self.run_cached(source)
+        else:
+            self.run_stream(io.StringIO(source))
+
+    def run_cached(self, source):
+        """Executes source, loading its parsed statements from the cache when it has been run before."""
+        key = self.cache.key(source, "optimized" if self.optimizer is not None else "")
+        statements = self.cache.load(key)
+        if statements is None:
+            parser = self.parser_class(self._traced(RegexScanner(source).scan_tokens()))
+            statements = parser.parse()
+            # programs with syntax errors are not cached, so the errors are reported every time
+            if parser.errors:
+                self._report_parse_errors(parser)
+                return
+            if self.optimizer is not None:
+                statements = self.optimizer.optimize(statements)
+            self.cache.store(key, statements)
+        self.resolver.resolve(statements)
+        try:
+            self._interpret(statements)
+        except CompileException as e:
+            print("Error compiling statements: {}".format(e))
+
+    def run_stream(self, stream):
+        """
+        Scans, parses and executes a file-like object incrementally: each top-level declaration
+        runs as soon as it has been parsed, so memory use does not grow with the script's length.
+        A syntax error is reported and stops execution, like a runtime error does.
+        """
+        tokens = self._traced(StreamScanner(stream).iter_tokens())
+        parser = self.parser_class(tokens)
+        statements = self._until_parse_error(parser, parser.parse_iter())
+        if self.optimizer is not None:
+            statements = self.optimizer.optimize_iter(statements)
+        try:
+            self._interpret(self.resolver.resolve_iter(statements))
+        except CompileException as e:
+            print("Error compiling statements: {}".format(e))
+            return
+        # reported once the statements before the error have run, which engines running statements in
+        # batches (--transpile) only do after parsing further; unless a runtime error stopped them first
+        if parser.errors and self.interpreter.runtime_error is None:
+            self._report_parse_errors(parser)
 
     def try_read_and_evaluate(self, source):
-        tokens = Scanner(source).scan_tokens()
+        tokens = RegexScanner(source).scan_tokens()
+        if self.tracer is not None:
+            tokens = list(self.tracer.tokens(tokens))
         if self.verbose:
             print(" tokens -> {}".format(tokens))
-        parser = Parser(tokens)
+        parser = self.parser_class(tokens)
         try:
             statements = parser.parse()
         except Exception as e:
             print("Error parsing statements: {}".format(e))
             return
+        if parser.errors:
+            self._report_parse_errors(parser)
+            return
 
+        if self.optimizer is not None:
+            statements = self.optimizer.optimize(statements)
         if self.verbose:
             print(" statements -> {}".format(statements))
+        self.resolver.resolve(statements)
+        try:
+            if self.vm and self.verbose:
+                print(self.interpreter.compiler.compile(statements).disassemble())
+            if self.transpile and self.verbose:
+                print(self.interpreter.transpiler.translate(statements).source)
+            self._interpret(statements)
+        except CompileException as e:
+            print("Error compiling statements: {}".format(e))
+
+    def _report_parse_errors(self, parser):
+        # through the output sink, so that they come after any output of statements streamed before them
+        output = self.interpreter.output
+        for error in parser.errors:
+            output.write("Error parsing statements: {}\n".format(error))
+        output.flush()
+
+    def _until_parse_error(self, parser, statements):
+        for stmt in statements:
+            if parser.errors:
+                return
+            yield stmt
+
+    def _traced(self, tokens):
+        return tokens if self.tracer is None else self.tracer.tokens(tokens)
+
+    def _interpret(self, statements):
         self.interpreter.interpret(statements)
+        if self.tracer is not None and self.interpreter.runtime_error is not None:
+            self.tracer.error(self.interpreter.runtime_error)
 
 
-if __name__ == "__main__":
+def build_parser():
     parser = argparse.ArgumentParser(description="Pylox interpreter")
     parser.add_argument("--verbose", "-v", dest="verbose", action="store_true")
-    parser.add_argument("-i", dest="input", required=False)
-    args = parser.parse_args()
-
-    pl = PyLox(verbose=args.verbose)
-    if args.input:
-        pl.run_file(args.input)
-    else:
-        pl.run_prompt()
+    parser.add_argument("--compiled", "-c", dest="compiled", action="store_true",
+                        help="compile statements to closures before executing them")
+    parser.add_argument("--vm", dest="vm", action="store_true",
+                        help="compile statements to bytecode and run them on the VM")
+    parser.add_argument("--quicken", dest="quicken", action="store_true",
+                        help="let operators specialize themselves for the operand types they see")
+    parser.add_argument("--transpile", dest="transpile", action="store_true",
+                        help="translate statements to Python and run them as CPython bytecode")
+    parser.add_argument("--stackless", dest="stackless", action="store_true",
+                        help="evaluate expressions from an explicit stack, so they can be nested arbitrarily deep")
+    parser.add_argument("--max-depth", dest="max_depth", type=int, default=DEFAULT_MAX_DEPTH,
+                        help="operators --stackless may leave waiting for operands before 'Stack overflow.' "
+                             "(default: %(default)s)")
+    parser.add_argument("-O", dest="optimize", action="store_true",
+                        help="fold constant expressions before executing them")
+    parser.add_argument("--profile", dest="profile", action="store_true",
+                        help="report time and counts per AST node class and source line on stderr")
+    parser.add_argument("--profile-output", dest="profile_output", default="pylox.folded",
+                        help="collapsed stacks file for flamegraph tools (default: pylox.folded)")
+    parser.add_argument("--trace", dest="trace", metavar="FILE", default=None,
+                        help="write tokens, nodes, definitions and errors to FILE; see python -m pylox.trace")
+    parser.add_argument("--path", "-I", dest="search_path", metavar="DIR", action="append", default=[],
+                        help="search DIR for imported modules before the current directory and $LOXPATH (repeatable)")
+    parser.add_argument("--no-cache", dest="cache", action="store_false",
+                        help="always scan and parse the script instead of using the program cache")
+    parser.add_argument("--cache-dir", dest="cache_dir", default=None,
+                        help="program cache directory (default: $XDG_CACHE_HOME/pylox)")
+    parser.add_argument("--serve", dest="serve", metavar="SOCKET", default=None,
+                        help="run scripts sent by pylox_client.py to this Unix socket in warm worker processes")
+    parser.add_argument("--workers", dest="workers", type=int, default=server.DEFAULT_WORKERS,
+                        help="worker processes of --serve (default: %(default)s)")
+    parser.add_argument("--max-requests", dest="max_requests", type=int, default=server.DEFAULT_MAX_REQUESTS,
+                        help="requests after which a --serve worker is replaced (default: %(default)s)")
+    parser.add_argument("--timeout", dest="timeout", type=float, default=server.DEFAULT_TIMEOUT,
+                        help="seconds after which a --serve request is killed (default: %(default)s)")
+    parser.add_argument("-i", dest="input", required=False,
+                        help="script to run, or - to read it from stdin (default: start a prompt)")
+    return parser
+
+
+def main(argv=None, source=None, cache=None):
+    """
+    Runs the command line. The server's workers pass the source of scripts sent with -i -, and
+    their in-memory program cache, which is used instead of the cache directory.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.profile and (args.compiled or args.vm or args.transpile):
+        parser.error("--profile requires the tree-walking interpreter")
+    if args.trace and (args.compiled or args.vm or args.transpile):
+        parser.error("--trace requires the tree-walking interpreter")
+    if args.stackless and (args.compiled or args.vm or args.transpile or args.quicken or args.profile or args.trace):
+        parser.error("--stackless cannot be combined with other execution modes, --profile or --trace")
+    if args.serve:
+        # only the server's own messages; runtime errors are logged to the clients' stderr
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s: %(message)s"))
+        server.logger.addHandler(handler)
+        server.logger.setLevel(logging.INFO)
+        server.serve(args.serve, main, workers=args.workers, max_requests=args.max_requests, timeout=args.timeout)
+        return 0
+
+    if not args.cache:
+        cache = None
+    elif cache is None:
+        cache = ProgramCache(args.cache_dir)
+    trace = open(args.trace, "w") if args.trace else None
+    pl = PyLox(verbose=args.verbose, compiled=args.compiled, vm=args.vm, optimize=args.optimize, cache=cache,
+               transpile=args.transpile, profile=args.profile, quicken=args.quicken, trace=trace,
+               search_path=args.search_path, stackless=args.stackless, max_depth=args.max_depth)
+    try:
+        if args.input == "-":
+            pl.run_source(sys.stdin.read() if source is None else source)
+        elif args.input:
+            pl.run_file(args.input)
+        else:
+            pl.run_prompt()
+        if args.input and pl.optimizer is not None:
+            print(pl.optimizer.report(), file=sys.stderr)
+    finally:
+        if pl.profiler is not None:
+            print(pl.profiler.report(), file=sys.stderr)
+            with open(args.profile_output, "w") as f:
+                f.write(pl.profiler.collapsed())
+        if trace is not None:
+            trace.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
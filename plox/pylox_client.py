@@ -0,0 +1,79 @@
+"""
+Thin client for `pylox_cli.py --serve`, taking the same arguments as pylox_cli.py:
+
+    python pylox_client.py --socket /tmp/pylox.sock -i script.lox
+
+The script runs in one of the server's warm workers, and its output and exit code are passed
+through. Without a server listening on the socket, or without -i (the interactive prompt), the
+script runs in this process instead. --stats prints the server's latency statistics.
+"""
+import argparse
+import io
+import json
+import os
+import socket
+import sys
+import pylox_cli
+
+DEFAULT_SOCKET = os.environ.get("PYLOX_SOCKET") or "/tmp/pylox.sock"
+
+
+def request(path, message, stdout, stderr):
+    """Sends a request to the server at path, writing the streamed output; returns the final message."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(json.dumps(message).encode() + b"\n")
+        with connection.makefile("rb") as replies:
+            for line in replies:
+                reply = json.loads(line)
+                if "stdout" in reply:
+                    stdout.write(reply["stdout"])
+                    stdout.flush()
+                elif "stderr" in reply:
+                    stderr.write(reply["stderr"])
+                    stderr.flush()
+                else:
+                    return reply
+    raise ConnectionError("The server closed the connection.")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--stats", action="store_true")
+    parser.add_argument("-i", dest="input")
+    args, _ = parser.parse_known_args(argv)
+    cli_argv = _without_client_options(argv)
+
+    if args.stats:
+        print(json.dumps(request(args.socket, {"stats": True}, sys.stdout, sys.stderr)["stats"], indent=2))
+        return 0
+    message = {"argv": cli_argv, "cwd": os.getcwd()}
+    if args.input == "-":
+        message["source"] = sys.stdin.read()
+    if args.input:
+        try:
+            return request(args.socket, message, sys.stdout, sys.stderr)["exit"]
+        except (FileNotFoundError, ConnectionRefusedError):
+            pass
+    if "source" in message:
+        sys.stdin = io.StringIO(message["source"])
+    return pylox_cli.main(cli_argv)
+
+
+def _without_client_options(argv):
+    result = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg == "--socket":
+            skip = True
+        elif not arg.startswith("--socket=") and arg != "--stats":
+            result.append(arg)
+    return result
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import contextlib
+import io
+import unittest
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox import batch
+from pylox.output import stringify
+
+numpy = batch.numpy
+
+
+def parse(source):
+    return Parser(RegexScanner(source).scan_tokens()).parse()
+
+
+def run_records(source, records):
+    """Runs source once per record on the Interpreter, returning the printed lines, globals and errors."""
+    results = []
+    for record in records:
+        interpreter = Interpreter()
+        for name, value in record.items():
+            interpreter.globals.define(name, value)
+        statements = parse(source)
+        Resolver(interpreter).resolve(statements)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            interpreter.interpret(statements)
+        error = interpreter.runtime_error
+        results.append((output.getvalue(), interpreter.globals.values, None if error is None else str(error)))
+    return results
+
+
+def unbatch(result, size):
+    """Splits a BatchResult into per-record results, formatted like run_records."""
+    results = []
+    for i in range(size):
+        error = result.errors[i]
+        printed = [batch._element(values, i) for values in result.output]
+        if error is not None:
+            # values printed by the statements after the failing one are placeholders
+            printed = printed[:len([line for line in printed if line is not None])]
+            printed.append("Runtime Exception: {}".format(error))
+        output = "".join("{}\n".format(line if type(line) is str else stringify(line)) for line in printed)
+        values = {name: batch._element(array, i) for name, array in result.values.items()}
+        results.append((output, values, None if error is None else str(error)))
+    return results
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestBatch(unittest.TestCase):
+    def assertSameAsInterpreter(self, source, bindings, vectorized=True):
+        size = len(next(iter(bindings.values())))
+        records = [{name: values[i] for name, values in bindings.items()} for i in range(size)]
+        result = batch.run_batch(parse(source), bindings)
+        self.assertEqual(result.vectorized, vectorized)
+        self.assertEqual(unbatch(result, size), run_records(source, records))
+        return result
+
+    def test_arithmetic(self):
+        result = self.assertSameAsInterpreter(
+            "var score = (price * quantity - 2) / 4; print score; print -score + 1;",
+            {"price": [1.0, 2.5, -3.0], "quantity": [2.0, 4.0, 0.5]})
+        self.assertEqual(result.values["score"].dtype, numpy.float64)
+        numpy.testing.assert_array_equal(result.output[0], [0.0, 2.0, -0.875])
+
+    def test_comparisons_are_masks(self):
+        result = self.assertSameAsInterpreter(
+            "var big = price > 2; print big == (price >= 2); print !big; print price != 1; print big == nil;",
+            {"price": [1.0, 2.0, 3.0]})
+        self.assertEqual(result.values["big"].dtype, numpy.bool_)
+        numpy.testing.assert_array_equal(result.values["big"], [False, False, True])
+
+    def test_assignment_and_constants(self):
+        self.assertSameAsInterpreter('var a = "s"; var b; a = price = price * 2; print b; print "x" == "x";',
+                                     {"price": [1.0, 2.0]})
+        self.assertSameAsInterpreter('var s = "lox" + "lox"; print s + s == "loxloxloxlox"; print price;',
+                                     {"price": [1.0, 2.0]})
+
+    def test_integer_inputs_are_numbers(self):
+        result = batch.run_batch(parse("print x / 2;"), {"x": numpy.arange(4)})
+        self.assertTrue(result.vectorized)
+        numpy.testing.assert_array_equal(result.output[0], [0.0, 0.5, 1.0, 1.5])
+
+    def test_scalar_fallback(self):
+        for source, bindings in (
+                ("print name + price;", {"name": ["a", "b"], "price": [1.0, 2.0]}),
+                ("print 1 / price; print price;", {"price": [1.0, 0.0, 2.0]}),
+                ("print flag + 1;", {"flag": [True, False]}),
+                ("print -flag;", {"flag": [True, False]}),
+                ("print missing; print price;", {"price": [1.0, 2.0]}),
+                ('print "a" + 1; print price;', {"price": [1.0, 2.0]}),
+                ("print price == nil;", {"price": [1.0, None]})):
+            with self.subTest(source=source):
+                self.assertSameAsInterpreter(source, bindings, vectorized=False)
+
+    def test_integers_are_floats_on_both_paths(self):
+        source = "var a = 2 * 3; print a - count;"
+        # concatenating strings sends the same program down the scalar fallback
+        for suffix, bindings, vectorized in (("", {"count": [1, 2]}, True),
+                                             (" var s = name + name;", {"count": [1, 2], "name": ["a", "b"]}, False)):
+            with self.subTest(vectorized=vectorized):
+                result = self.assertSameAsInterpreter(source + suffix, bindings, vectorized)
+                self.assertEqual(result.values["a"].dtype, numpy.float64)
+                self.assertEqual(result.output[0].dtype, numpy.float64)
+                numpy.testing.assert_array_equal(result.values["a"], [6.0, 6.0])
+                numpy.testing.assert_array_equal(result.output[0], [5.0, 4.0])
+
+    def test_inputs_must_have_the_same_length(self):
+        with self.assertRaises(ValueError):
+            batch.BatchInterpreter({"a": [1.0, 2.0], "b": [1.0]})
@@ -0,0 +1,54 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from pylox import bench
+
+
+class TestBench(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.write("arithmetic", "var a = 1; a = a + 2 * 3; print a;")
+        self.write("functions", "fun f() {} print f();")
+        self.write("undefined", "print clock();")
+        self.write("runtime_error", "print -nil;")
+
+    def write(self, name, source):
+        with open(os.path.join(self.directory.name, name + ".lox"), "w") as f:
+            f.write(source)
+
+    def test_run_suite(self):
+        benchmarks = bench.find_benchmarks([], self.directory.name)
+        self.assertEqual(list(benchmarks), ["arithmetic", "functions", "runtime_error", "undefined"])
+        results = bench.run_suite(benchmarks, runs=2, warmup=1)
+        arithmetic = results["benchmarks"]["arithmetic"]
+        self.assertEqual(arithmetic["status"], "ok")
+        self.assertEqual(len(arithmetic["wall"]["runs"]), 2)
+        self.assertGreater(arithmetic["peak_memory"], 0)
+        for name in ("functions", "undefined", "runtime_error"):
+            self.assertEqual(results["benchmarks"][name]["status"], "unsupported")
+        self.assertIn("Operand must be a number.", results["benchmarks"]["runtime_error"]["reason"])
+        json.dumps(results)
+
+    def test_unknown_benchmark(self):
+        self.assertRaises(ValueError, lambda: bench.find_benchmarks(["nope"], self.directory.name))
+
+    def test_compare(self):
+        def results(**timings):
+            return {"benchmarks": {name: {"status": "ok", "wall": {"min": t}} if t else {"status": "unsupported"}
+                                   for name, t in timings.items()}}
+        comparisons = bench.compare(results(a=1.2, b=1.05, c=1.0, d=None), results(a=1.0, b=1.0, d=1.0), 0.1)
+        self.assertEqual([(name, regressed) for name, _, _, _, regressed in comparisons],
+                         [("a", True), ("b", False)])
+
+    def test_main_exit_status(self):
+        path = os.path.join(self.directory.name, "arithmetic.lox")
+        output = os.path.join(self.directory.name, "results.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(bench.main([path, "-n", "1", "-o", output]), 0)
+            # nothing can be 100% faster than its baseline
+            self.assertEqual(bench.main([path, "-n", "1", "-b", output, "--threshold", "-1"]), 1)
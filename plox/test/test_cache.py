@@ -0,0 +1,150 @@
+import contextlib
+import glob
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser, StacklessParser, PARSER_VERSION
+from pylox.cache import ProgramCache, MemoryCache, dumps, loads
+from pylox_cli import PyLox
+
+LOX_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "lox")
+
+SOURCE = 'var a = 1;\nvar b;\na = (a + 2.5) * -a;\nprint !(a == nil) != "s";\n'
+
+
+def parse(source):
+    return Parser(RegexScanner(source).scan_tokens()).parse()
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = ProgramCache(self.directory.name)
+
+    def test_round_trip(self):
+        statements = parse(SOURCE)
+        self.assertEqual(loads(dumps(statements)), statements)
+
+    def test_lox_corpus_round_trip(self):
+        for path in glob.glob(os.path.join(LOX_DIR, "**", "*.lox"), recursive=True):
+            with open(path) as f:
+                source = f.read()
+            with self.subTest(path=os.path.relpath(path, LOX_DIR)), contextlib.redirect_stdout(io.StringIO()):
+                statements = parse(source)
+                self.assertEqual(loads(dumps(statements)), statements)
+
+    def test_deep_nesting(self):
+        # beyond the recursion limit, but within marshal's nesting limit
+        data = dumps(parse("print " + " + ".join(["1"] * 1500) + ";"))
+        # node equality is recursive, so the round trip is compared serialized
+        self.assertEqual(dumps(loads(data)), data)
+        # nested beyond marshal's limit: not cached, but still run
+        source = "print " + "-" * 50000 + "1;"
+        statements = StacklessParser(RegexScanner(source).scan_tokens()).parse()
+        for cache in (self.cache, MemoryCache()):
+            key = cache.key(source)
+            cache.store(key, statements)
+            self.assertIsNone(cache.load(key))
+        path = os.path.join(self.directory.name, "script.lox")
+        with open(path, "w") as f:
+            f.write("print " + " + ".join(["1"] * 3000) + ";")
+        outputs = []
+        for cache in (self.cache, self.cache, None):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                PyLox(cache=cache).run_file(path)
+            outputs.append(output.getvalue())
+        self.assertEqual(outputs, ["Runtime Exception: Stack overflow.\n"] * 3)
+
+    def test_store_and_load(self):
+        key = self.cache.key(SOURCE)
+        self.assertIsNone(self.cache.load(key))
+        self.cache.store(key, parse(SOURCE))
+        self.assertEqual(self.cache.load(key), parse(SOURCE))
+        self.assertEqual(os.listdir(self.directory.name), [key + ".loxc"])
+
+    def test_memory_cache_loads_fresh_statements(self):
+        cache = MemoryCache()
+        key = cache.key(SOURCE)
+        self.assertIsNone(cache.load(key))
+        cache.store(key, parse(SOURCE))
+        self.assertEqual(cache.load(key), parse(SOURCE))
+        self.assertIsNot(cache.load(key)[0], cache.load(key)[0])
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+        # quickening rewrites the nodes it runs, which must not leak into the next run
+        outputs = []
+        for _ in range(3):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                PyLox(cache=cache, quicken=True).run_source("var x = 10; var y = 1; print x - y; print y - x;")
+            outputs.append(output.getvalue())
+        self.assertEqual(outputs, ["9\n-9\n"] * 3)
+
+    def test_keys(self):
+        self.assertEqual(self.cache.key(SOURCE), self.cache.key(SOURCE))
+        self.assertNotEqual(self.cache.key(SOURCE), self.cache.key(SOURCE + " "))
+        self.assertNotEqual(self.cache.key(SOURCE), self.cache.key(SOURCE, "optimized"))
+        # entries parsed by another version of the parser are not used
+        key = self.cache.key(SOURCE)
+        with mock.patch("pylox.cache.PARSER_VERSION", PARSER_VERSION + 1):
+            self.assertNotEqual(self.cache.key(SOURCE), key)
+
+    def test_number_literals(self):
+        path = os.path.join(self.directory.name, "script.lox")
+        with open(path, "w") as f:
+            f.write("print 9007199254740993;")
+        for _ in range(2):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                PyLox(cache=self.cache).run_file(path)
+            self.assertEqual(output.getvalue(), "9007199254740993\n")
+
+    def test_corrupt_entries_are_ignored(self):
+        key = self.cache.key(SOURCE)
+        for data in (b"", b"LOXC", b"LOXC garbage", b"something else"):
+            with open(self.cache.path(key), "wb") as f:
+                f.write(data)
+            self.assertIsNone(self.cache.load(key))
+
+    def test_eviction(self):
+        statements = parse(SOURCE)
+        for mtime, key in enumerate(("old", "used", "new")):
+            self.cache.store(key, statements)
+            os.utime(self.cache.path(key), (mtime, mtime))
+        self.cache.load("used")
+        self.cache.max_size = os.path.getsize(self.cache.path("used"))
+        self.cache.evict()
+        self.assertEqual(os.listdir(self.directory.name), ["used.loxc"])
+
+    def test_run_file_skips_parsing(self):
+        path = os.path.join(self.directory.name, "script.lox")
+        with open(path, "w") as f:
+            f.write(SOURCE)
+        outputs = []
+        for run in range(2):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                if run:
+                    with mock.patch("pylox_cli.Parser", side_effect=AssertionError("parsed")):
+                        PyLox(cache=self.cache).run_file(path)
+                else:
+                    PyLox(cache=self.cache).run_file(path)
+            outputs.append(output.getvalue())
+        self.assertEqual(outputs, ["true\n"] * 2)
+
+    def test_syntax_errors_are_not_cached(self):
+        path = os.path.join(self.directory.name, "script.lox")
+        with open(path, "w") as f:
+            f.write("print 1; print;")
+        for _ in range(2):
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                PyLox(cache=self.cache).run_file(path)
+            # reported, and nothing is run
+            self.assertEqual(output.getvalue(), "Error parsing statements: Expect expression.\n")
+        self.assertEqual([name for name in os.listdir(self.directory.name) if name.endswith(".loxc")], [])
@@ -0,0 +1,54 @@
+import contextlib
+import glob
+import io
+import os
+import unittest
+
+from pylox.scanner import Scanner
+from pylox.parser import Parser
+from pylox.interpreter import Interpreter
+from pylox.resolver import Resolver
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+
+
+def run(source, compiled, resolve=True):
+    interpreter = Interpreter(compiled=compiled)
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    if resolve:
+        Resolver(interpreter).resolve(statements)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        interpreter.interpret(statements)
+    return output.getvalue()
+
+
+class TestClosureCompiler(unittest.TestCase):
+    def assertSameOutput(self, source):
+        expected = run(source, compiled=False)
+        self.assertEqual(expected, run(source, compiled=True))
+        self.assertEqual(expected, run(source, compiled=True, resolve=False))
+
+    def test_arithmetic(self):
+        self.assertEqual(run("print (1 + 2) * 3 - 4 / 2;", compiled=True), "7\n")
+        self.assertSameOutput("print 1 < 2; print 2 <= 2; print 3 > 4; print 3 >= 4; print -5;")
+
+    def test_equality_and_truthiness(self):
+        self.assertEqual(run("print !true; print !nil; print 1 == 1; print nil != nil;", compiled=True),
+                         "false\ntrue\ntrue\nfalse\n")
+        self.assertSameOutput('print "a" == "a"; print nil == false; print !0;')
+
+    def test_variables(self):
+        self.assertEqual(run("var a = 1; var b; a = a + 2; print a; print b;", compiled=True), "3\nnil\n")
+        self.assertSameOutput("var a = 1; var b = a = 5; print a; print b;")
+
+    def test_runtime_errors(self):
+        self.assertSameOutput('print 1; print "a" - 1; print 2;')
+        self.assertSameOutput("print -nil;")
+        self.assertSameOutput("print undefined;")
+        self.assertSameOutput("undefined = 1;")
+
+    def test_scripts(self):
+        for path in glob.glob(os.path.join(SCRIPTS_DIR, "*.lox")):
+            with open(path) as f:
+                self.assertSameOutput(f.read())
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+from pylox import conformance
+
+
+class TestConformance(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, source):
+        path = os.path.join(self.directory.name, name + ".lox")
+        with open(path, "w") as f:
+            f.write(source)
+        return path
+
+    def test_parse_expectations(self):
+        expected = conformance.parse_expectations(
+            'print 1; // expect: 1\nprint ""; // expect: \n'
+            "a = 1; // expect runtime error: Undefined variable 'a'.\n"
+            "(a) = 1; // Error at '=': Invalid assignment target.\n"
+            "// [line 2] Error at end: Expect ';' after value.\n"
+            "// [c line 2] Error: Unexpected character.\n")
+        self.assertEqual(expected.output, ["1", ""])
+        self.assertEqual(expected.runtime_error, "Undefined variable 'a'.")
+        self.assertEqual(expected.errors, ["Invalid assignment target.", "Expect ';' after value."])
+
+    def test_check(self):
+        self.assertEqual(conformance.check('print "a"; // expect: a'), (conformance.PASS, None))
+        self.assertEqual(conformance.check('print "a"; // expect: b')[0], conformance.FAIL)
+        self.assertEqual(conformance.check('print "a";')[0], conformance.FAIL)
+        self.assertEqual(conformance.check('print "a"; // expect: a\nprint -nil; // expect runtime error: '
+                                           'Operand must be a number.'), (conformance.PASS, None))
+        self.assertEqual(conformance.check("print -nil;")[0], conformance.FAIL)
+        self.assertEqual(conformance.check("print; // Error at ';': Expect expression."), (conformance.PASS, None))
+        self.assertEqual(conformance.check("fun f() {}")[0], conformance.UNSUPPORTED)
+
+    def test_engines(self):
+        source = 'var a = "x"; a = "y"; print a; // expect: y\nprint -a; // expect runtime error: ' \
+                 'Operand must be a number.'
+        for engine in sorted(conformance.ENGINES):
+            with self.subTest(engine=engine):
+                self.assertEqual(conformance.check(source, engine), (conformance.PASS, None))
+
+    def test_undefined_assignment(self):
+        # assigning reports the same error as reading, for undeclared names and ones declared later
+        for source in ("unknown = 1; // expect runtime error: Undefined variable 'unknown'.",
+                       "a = 1; // expect runtime error: Undefined variable 'a'.\nvar a;",
+                       "var b = 1; b = a = 1; // expect runtime error: Undefined variable 'a'.\nvar a;"):
+            for engine in sorted(conformance.ENGINES):
+                with self.subTest(source=source, engine=engine):
+                    self.assertEqual(conformance.check(source, engine), (conformance.PASS, None))
+
+    def test_timeout(self):
+        source = "var a = 1;\n" + "a = a - 1;\n" * 200000
+        result = conformance.run_script(self.write("slow", source), timeout=0.01)
+        self.assertEqual(result.status, conformance.FAIL)
+        self.assertIn("timed out", result.reason)
+
+    def test_run_suite(self):
+        self.write("pass", 'print "ok"; // expect: ok')
+        self.write("fail", 'print "no"; // expect: ok')
+        self.write("unsupported", "while (true) {}")
+        os.mkdir(os.path.join(self.directory.name, "benchmark"))
+        self.write(os.path.join("benchmark", "skipped"), "")
+        scripts = conformance.find_scripts([self.directory.name])
+        self.assertEqual([os.path.basename(p) for p in scripts], ["fail.lox", "pass.lox", "unsupported.lox"])
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                results = conformance.run_suite(scripts, jobs=jobs)
+                self.assertEqual([r.status for r in results],
+                                 [conformance.FAIL, conformance.PASS, conformance.UNSUPPORTED])
+                self.assertIn("1 passed, 1 failed, 1 unsupported", conformance.format_report(results))
@@ -23,7 +23,9 @@ class TestEnvironment(unittest.TestCase):
         self.assertRaises(RuntimeException, lambda: self.env.get(self.undefined_var))
 
     def test_assign_undefined_var(self):
-        self.assertRaises(RuntimeError, lambda: self.env.assign(self.undefined_var, 10))
+        with self.assertRaises(RuntimeException) as context:
+            self.env.assign(self.undefined_var, 10)
+        self.assertEqual((str(context.exception), context.exception.line), ("Undefined variable 'undefined_var'.", 1))
 
     def test_assign(self):
         self.env.define(self.x.lexeme, 10)
@@ -0,0 +1,81 @@
+import contextlib
+import glob
+import io
+import os
+import unittest
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.output import CaptureSink
+from pylox.flat import FlatParser, FlatProgram, NONE
+from pylox.expressions import Assign, Var
+
+LOX_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "lox")
+
+
+def parse_flat(source):
+    return FlatParser(RegexScanner(source).scan_tokens()).parse()
+
+
+def run(source, flat):
+    interpreter = Interpreter(output=CaptureSink())
+    if flat:
+        interpreter.interpret_flat(parse_flat(source))
+    else:
+        interpreter.interpret(Resolver(interpreter).resolve(Parser(RegexScanner(source).scan_tokens()).parse()))
+    error = interpreter.runtime_error
+    return interpreter.output.getvalue(), None if error is None else str(error), interpreter.globals.values
+
+
+class TestFlat(unittest.TestCase):
+    def test_columns(self):
+        program = parse_flat("var a; a = 1 + 2;")
+        self.assertEqual(type(program), FlatProgram)
+        self.assertEqual(program.node_count, 6)
+        self.assertEqual(list(program.statements), [0, 5])
+        var, assign = program.statements[0], program.left[program.statements[1]]
+        self.assertEqual((program.kinds[var], program.left[var]), (Var.kind, NONE))
+        # the assignment target's node is reused for the assignment
+        self.assertEqual(program.kinds[assign], Assign.kind)
+        self.assertEqual(program.token(program.tokens[assign]).lexeme, "a")
+        self.assertEqual(program.values, [1, 2])
+
+    def test_constants_are_shared_by_type(self):
+        program = parse_flat('print 1; print 1; print 1.0; print true; print "1";')
+        self.assertEqual([(type(v), v) for v in program.values], [(int, 1), (float, 1.0), (bool, True), (str, "1")])
+
+    def test_errors(self):
+        parser = FlatParser(RegexScanner("print 1; 1 = 2; print (2;\nprint 3;").scan_tokens())
+        program = parser.parse()
+        self.assertEqual([str(e) for e in parser.errors], ["Invalid assignment target.",
+                                                           "Expect ')' after expression."])
+        self.assertEqual(len(program), 2)
+
+    def test_runtime_errors(self):
+        for source in ("print -nil;", 'print 1 + "a";', "print a;", "a = 1;", "a = 1; var a;",
+                       "print 1 / 0;"):
+            with self.subTest(source=source):
+                self.assertEqual(run(source, flat=True), run(source, flat=False))
+
+    def test_undefined_names_get_no_slot(self):
+        interpreter = Interpreter(output=CaptureSink())
+        interpreter.interpret_flat(parse_flat("var a = 1; print a;"))
+        interpreter.interpret_flat(parse_flat("print b;"))
+        interpreter.interpret_flat(parse_flat("c = a;"))
+        self.assertEqual(interpreter.globals.names, {"a": 0})
+
+    def test_lox_corpus(self):
+        """The lazy view equals the object AST, and walking the columns gives the same results."""
+        for path in sorted(glob.glob(os.path.join(LOX_DIR, "**", "*.lox"), recursive=True)):
+            with open(path) as f:
+                source = f.read()
+            parser = Parser(RegexScanner(source).scan_tokens())
+            with contextlib.redirect_stdout(io.StringIO()):
+                statements = parser.parse()
+            if parser.errors:
+                continue
+            with self.subTest(path=os.path.relpath(path, LOX_DIR)):
+                self.assertEqual(list(parse_flat(source)), statements)
+                self.assertEqual(run(source, flat=True), run(source, flat=False))
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.vm import VM
+from pylox.transpile import TranspilingInterpreter
+from pylox.flat import FlatParser
+from pylox.output import CaptureSink
+from pylox.cache import dumps, loads
+from pylox.program import Program
+from pylox.module import Importer, ModuleCache
+
+ENGINES = {
+    "tree": lambda output, importer: Interpreter(output=output, importer=importer),
+    "closures": lambda output, importer: Interpreter(compiled=True, output=output, importer=importer),
+    "vm": lambda output, importer: VM(output=output, importer=importer),
+    "python": lambda output, importer: TranspilingInterpreter(output=output, importer=importer),
+}
+
+
+class TestModule(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cache = ModuleCache()
+        self.write("constants.lox", 'var pi = 3.5; var name = "lox"; print "loading constants";')
+        self.write("lib/area.lox", 'import "square.lox"; import "../constants.lox"; var area = square * pi;')
+        self.write("lib/square.lox", "var square = 4;")
+
+    def write(self, name, source):
+        path = os.path.join(self.directory.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(source)
+        return path
+
+    def importer(self):
+        return Importer(search_path=[self.directory.name], module_cache=self.cache)
+
+    def run_source(self, source, engine="tree", importer=None):
+        sink = CaptureSink()
+        interpreter = ENGINES[engine](sink, importer or self.importer())
+        statements = Resolver(interpreter).resolve(Parser(RegexScanner(source).scan_tokens()).parse())
+        interpreter.interpret(statements)
+        return sink.getvalue(), interpreter.globals.values
+
+    def test_engines(self):
+        source = 'var pi = 1; import "lib/area.lox"; import "constants.lox"; print area;'
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                output, values = self.run_source(source, engine)
+                # modules run once, and the modules imported by lib/area.lox are found relative to it
+                self.assertEqual(output, "loading constants\n14\n")
+                self.assertEqual(values, {"pi": 3.5, "name": "lox", "square": 4, "area": 14.0})
+
+    def test_flat(self):
+        interpreter = Interpreter(output=CaptureSink(), importer=self.importer())
+        source = 'import "lib/area.lox"; print area;'
+        program = FlatParser(RegexScanner(source).scan_tokens()).parse()
+        self.assertEqual(list(program), Parser(RegexScanner(source).scan_tokens()).parse())
+        interpreter.interpret_flat(program)
+        self.assertEqual(interpreter.output.getvalue(), "loading constants\n14\n")
+
+    def test_namespaces(self):
+        importer = self.importer()
+        self.run_source('import "lib/area.lox";', importer=importer)
+        namespace = importer.modules[os.path.join(self.directory.name, "lib", "area.lox")]
+        self.assertEqual(namespace.values, {"square": 4, "pi": 3.5, "name": "lox", "area": 14.0})
+        self.assertEqual(len(importer.modules), 3)
+
+    def test_errors(self):
+        self.write("a.lox", 'import "b.lox";')
+        self.write("b.lox", 'import "a.lox";')
+        self.write("broken.lox", "var = 1;")
+        self.write("failing.lox", "print -nil;")
+        for source, error in (('import "a.lox";', "Import cycle: a.lox -> b.lox -> a.lox."),
+                              ('import "missing.lox";', "Could not find module 'missing.lox'."),
+                              ('import "broken.lox";', "Error in module 'broken.lox': Expected variable name."),
+                              ('import "failing.lox";', "Operand must be a number.")):
+            for engine in ENGINES:
+                with self.subTest(source=source, engine=engine):
+                    self.assertEqual(self.run_source(source, engine)[0], "Runtime Exception: {}\n".format(error))
+
+    def test_parse_errors(self):
+        for source, error in (("import constants;", "Expect module path after 'import'."),
+                              ('import "a.lox"', "Expect ';' after module path.")):
+            with self.subTest(source=source):
+                parser = Parser(RegexScanner(source).scan_tokens())
+                self.assertEqual(parser.parse(), [None])
+                self.assertEqual(str(parser.errors[0]), error)
+
+    def test_cache(self):
+        for _ in range(3):
+            self.run_source('import "constants.lox";')
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+
+        # a changed module is parsed again
+        path = self.write("constants.lox", "var pi = 3;")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.run_source('import "constants.lox";')[1], {"pi": 3})
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 2))
+
+    def test_serialized(self):
+        statements = Parser(RegexScanner('import "constants.lox";').scan_tokens()).parse()
+        self.assertEqual(loads(dumps(statements)), statements)
+        self.assertEqual(loads(dumps(statements))[0].path.literal, "constants.lox")
+
+    def test_program_runs_modules_every_run(self):
+        program = Program('import "{}"; print pi;'.format(os.path.join(self.directory.name, "constants.lox")))
+        for _ in range(2):
+            self.assertEqual(program.run().output, "loading constants\n3.5\n")
@@ -0,0 +1,57 @@
+import unittest
+
+from pylox.regex_scanner import RegexScanner
+from pylox.scanner import Scanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.vm import VM
+from pylox.transpile import TranspilingInterpreter
+from pylox.output import CaptureSink
+from pylox import number
+
+ENGINES = {
+    "tree": lambda output: Interpreter(output=output),
+    "closures": lambda output: Interpreter(compiled=True, output=output),
+    "quickened": lambda output: Interpreter(quicken=True, output=output),
+    "vm": lambda output: VM(output=output),
+    "python": lambda output: TranspilingInterpreter(output=output),
+}
+
+
+def run(source, engine):
+    sink = CaptureSink()
+    interpreter = ENGINES[engine](sink)
+    statements = Resolver(interpreter).resolve(Parser(RegexScanner(source).scan_tokens()).parse())
+    interpreter.interpret(statements)
+    return sink.getvalue(), interpreter.globals.values
+
+
+class TestNumber(unittest.TestCase):
+    def test_literals(self):
+        for scanner in (Scanner, RegexScanner):
+            with self.subTest(scanner=scanner.__name__):
+                values = [token.literal for token in scanner("12 1.5 9007199254740993").scan_tokens()[:3]]
+                self.assertEqual([(type(v), v) for v in values], [(int, 12), (float, 1.5), (int, 2 ** 53 + 1)])
+
+    def test_negate(self):
+        self.assertEqual(number.negate(2), -2)
+        self.assertEqual(repr(number.negate(0)), "-0.0")
+        self.assertEqual(repr(number.negate(-0.0)), "0.0")
+
+    def test_engines(self):
+        source = "var big = 9007199254740993 * 3 + 1; var half = 1 / 2; var mixed = 2 * 0.5; var i = 3 - 4;" \
+                 "print big; print half; print 4 / 2; print mixed; print -0; print 3 == 3.0; print 2 < 2.5; print -i;"
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                output, values = run(source, engine)
+                self.assertEqual(output, "27021597764222980\n0.5\n2\n1\n-0\ntrue\ntrue\n1\n")
+                self.assertEqual([(type(values[name]), values[name]) for name in ("big", "half", "mixed", "i")],
+                                 [(int, 27021597764222980), (float, 0.5), (float, 1.0), (int, -1)])
+
+    def test_booleans_are_not_numbers(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(run("print true + 1;", engine)[0],
+                                 "Runtime Exception: Operands must be two numbers or two strings.\n")
+                self.assertEqual(run("print -false;", engine)[0], "Runtime Exception: Operand must be a number.\n")
@@ -0,0 +1,89 @@
+import contextlib
+import glob
+import io
+import os
+import unittest
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.optimizer import Optimizer
+from pylox.vm import VM
+from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr, Variable
+from pylox.tokens import TokenType
+
+LOX_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "lox")
+
+
+def parse(source):
+    return Parser(RegexScanner(source).scan_tokens()).parse()
+
+
+def run(statements, engine):
+    output = io.StringIO()
+    Resolver(engine).resolve(statements)
+    with contextlib.redirect_stdout(output):
+        engine.interpret(statements)
+    return output.getvalue(), engine.runtime_error
+
+
+class TestOptimizer(unittest.TestCase):
+    def setUp(self):
+        self.optimizer = Optimizer()
+
+    def optimize(self, source):
+        return [stmt.expression for stmt in self.optimizer.optimize(parse(source))]
+
+    def test_folds_constants(self):
+        self.assertEqual(self.optimize("(1 + 2) * 3; !true; -(4); 1 < 2 == !nil; \"a\" == \"a\";"),
+                         [LiteralExpr(9.0), LiteralExpr(False), LiteralExpr(-4.0), LiteralExpr(True),
+                          LiteralExpr(True)])
+        self.assertEqual(self.optimizer.eliminated, 15)
+        self.assertEqual(self.optimizer.visited, 25)
+
+    def test_keeps_variables(self):
+        expr, = self.optimize("a * (2 + 3);")
+        self.assertEqual(type(expr), BinaryExpr)
+        self.assertEqual(type(expr.left), Variable)
+        self.assertEqual(expr.right, LiteralExpr(5.0))
+
+    def test_keeps_raising_operations(self):
+        negate, add, divide = self.optimize('-"a"; 1 + (true + 2); 1 / 0;')
+        self.assertEqual(type(negate), UnaryExpr)
+        self.assertEqual(type(add.right), BinaryExpr)
+        self.assertEqual(type(divide), BinaryExpr)
+
+    def test_simplifies_negations(self):
+        not_equal, equal, less, negated = self.optimize("!(a == b); !(a != b); !!(a < b); !!a;")
+        self.assertEqual(not_equal.operator.token_type, TokenType.BANG_EQUAL)
+        self.assertEqual(equal.operator.token_type, TokenType.EQUAL_EQUAL)
+        self.assertEqual(less.operator.token_type, TokenType.LESS)
+        # !!a converts a to a boolean, so it has to stay
+        self.assertEqual(type(negated), UnaryExpr)
+
+    def test_runtime_errors_keep_their_token(self):
+        source = "var a = 1;\nprint (2 * 3) + -(\"a\" + 1);"
+        expected = run(parse(source), Interpreter())[1]
+        error = run(self.optimizer.optimize(parse(source)), Interpreter())[1]
+        self.assertEqual(str(error), "Operands must be two numbers or two strings.")
+        self.assertEqual(error.token, expected.token)
+        self.assertEqual(error.token.line, 2)
+
+    def test_lox_corpus(self):
+        """Optimized programs behave exactly like the originals, on every engine."""
+        engines = {"tree": Interpreter, "closures": lambda: Interpreter(compiled=True), "vm": VM}
+        for path in sorted(glob.glob(os.path.join(LOX_DIR, "**", "*.lox"), recursive=True)):
+            with open(path) as f:
+                source = f.read()
+            parser = Parser(RegexScanner(source).scan_tokens())
+            with contextlib.redirect_stdout(io.StringIO()):
+                parser.parse()
+            if parser.errors:
+                continue
+            for name, engine in engines.items():
+                with self.subTest(path=os.path.relpath(path, LOX_DIR), engine=name):
+                    expected_output, expected_error = run(parse(source), engine())
+                    output, error = run(Optimizer().optimize(parse(source)), engine())
+                    self.assertEqual(output, expected_output)
+                    self.assertEqual(str(error), str(expected_error))
@@ -0,0 +1,112 @@
+import contextlib
+import io
+import unittest
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.vm import VM
+from pylox.transpile import TranspilingInterpreter
+from pylox.output import stringify, BufferedSink, CaptureSink, NullSink, FLUSH_ON_LINE
+from pylox.expressions import Print
+
+
+class Stream(io.StringIO):
+    """Text stream counting the calls to write."""
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def run(source, engine):
+    statements = Resolver(engine).resolve(Parser(RegexScanner(source).scan_tokens()).parse())
+    engine.interpret(statements)
+
+
+class TestStringify(unittest.TestCase):
+    def test_values(self):
+        for value, text in ((None, "nil"), (True, "true"), (False, "false"), (3.0, "3"), (-0.0, "-0"),
+                            (2.5, "2.5"), (1e21, "1e+21"), (float("inf"), "Infinity"), (float("-inf"), "-Infinity"),
+                            (float("nan"), "NaN"), ("a.0", "a.0")):
+            with self.subTest(value=value):
+                self.assertEqual(stringify(value), text)
+
+
+class TestSinks(unittest.TestCase):
+    def test_buffered_sink_writes_once_per_flush(self):
+        stream = Stream()
+        sink = BufferedSink(stream, buffer_size=10)
+        for value in (1.0, 2.0, "abcdefgh"):
+            sink.print(value)
+        # the third line fills the buffer
+        self.assertEqual((stream.getvalue(), stream.writes), ("1\n2\nabcdefgh\n", 1))
+        sink.print(None)
+        self.assertEqual(stream.writes, 1)
+        sink.flush()
+        self.assertEqual((stream.getvalue(), stream.writes), ("1\n2\nabcdefgh\nnil\n", 2))
+
+    def test_line_policy(self):
+        stream = Stream()
+        sink = BufferedSink(stream, policy=FLUSH_ON_LINE)
+        sink.print(1.0)
+        sink.print(True)
+        self.assertEqual((stream.getvalue(), stream.writes), ("1\ntrue\n", 2))
+        with self.assertRaises(ValueError):
+            BufferedSink(stream, policy="never")
+
+    def test_default_stream_is_looked_up_on_flush(self):
+        sink = BufferedSink()
+        sink.print(1.0)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            sink.flush()
+        self.assertEqual(output.getvalue(), "1\n")
+
+    def test_capture_and_null_sinks(self):
+        capture = CaptureSink()
+        run("print 1; print nil;", Interpreter(output=capture))
+        self.assertEqual(capture.lines(), ["1", "nil"])
+        run("print 1;", Interpreter(output=NullSink()))
+
+
+class TestFlushGuarantees(unittest.TestCase):
+    def test_engines_flush_when_interpret_returns(self):
+        for make_engine in (Interpreter, lambda output: Interpreter(compiled=True, output=output), VM,
+                            TranspilingInterpreter):
+            with self.subTest(engine=make_engine):
+                stream = Stream()
+                run("print 1; print 2;", make_engine(output=BufferedSink(stream)))
+                self.assertEqual((stream.getvalue(), stream.writes), ("1\n2\n", 1))
+
+    def test_runtime_errors_are_written_after_earlier_output(self):
+        for make_engine in (Interpreter, VM, TranspilingInterpreter):
+            with self.subTest(engine=make_engine):
+                stream = Stream()
+                run("print 1; print -nil; print 2;", make_engine(output=BufferedSink(stream)))
+                self.assertEqual(stream.getvalue(), "1\nRuntime Exception: Operand must be a number.\n")
+
+    def test_output_is_flushed_on_exit(self):
+        for exception in (KeyboardInterrupt, SystemExit):
+            with self.subTest(exception=exception):
+                stream = Stream()
+                interpreter = Interpreter(output=BufferedSink(stream))
+                prints = []
+
+                def wrapper(visitor):
+                    def interrupted(node):
+                        # the second print statement is interrupted
+                        if type(node) is Print:
+                            prints.append(node)
+                            if len(prints) == 2:
+                                raise exception()
+                        return visitor(node)
+                    return interrupted
+                interpreter.instrument(wrapper)
+                with self.assertRaises(exception):
+                    run("print 1; print 2;", interpreter)
+                self.assertEqual(stream.getvalue(), "1\n")
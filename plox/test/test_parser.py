@@ -1,9 +1,24 @@
+import contextlib
+import glob
+import io
+import os
 import unittest
 
-from pylox.parser import Parser
+from pylox.parser import Parser, RecursiveDescentParser, StacklessParser
+from pylox.scanner import Scanner
+from pylox.regex_scanner import RegexScanner
 from pylox.tokens import Token, TokenType
 from pylox.expressions import Expression, LiteralExpr, BinaryExpr, Print
 
+LOX_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "lox")
+
+
+def parse(parser_class, source):
+    parser = parser_class(RegexScanner(source).scan_tokens())
+    with contextlib.redirect_stdout(io.StringIO()):
+        statements = parser.parse()
+    return statements, [str(e) for e in parser.errors]
+
 
 class TestParser(unittest.TestCase):
     def test_literal_expression(self):
@@ -55,3 +70,40 @@ class TestParser(unittest.TestCase):
         expression = statements[0].expression
         self.assertTrue(isinstance(expression, LiteralExpr))
         self.assertEqual(expression.value, 20)
+
+    def test_error_recovery(self):
+        # fun f() {} print 1;
+        tokens = Scanner("fun f() {} print 1;").scan_tokens()
+        parser = Parser(tokens)
+        statements = parser.parse()
+        self.assertEqual(len(parser.errors), 1)
+        self.assertIsNone(statements[0])
+        self.assertTrue(isinstance(statements[-1], Print))
+
+    def test_missing_expression(self):
+        # 1 + ;
+        parser = Parser(Scanner("1 + ;").scan_tokens())
+        self.assertEqual(parser.parse(), [None])
+        self.assertEqual(str(parser.errors[0]), "Expect expression.")
+
+    def test_precedence(self):
+        for source in ("print 1 - 2 - 3 * 4 / 5 < -6 == !true != 7 >= 8;", "a = b = 1 + 2;", "print (1 + 2) * 3;",
+                       "print --1 - -(2);", "var a = 1 <= 2 > 3;"):
+            with self.subTest(source=source):
+                self.assertEqual(parse(Parser, source), parse(RecursiveDescentParser, source))
+                self.assertEqual(parse(StacklessParser, source), parse(Parser, source))
+
+    def test_errors_match_recursive_descent(self):
+        for source in ("a + b = c;", "-a = 1;", "(a) = 1;", "1 + a = 2;", "print ;", "print 1 +;", "print (2;",
+                       "a = ;", "print 1 2;", "var = 1; print 1;", "+ 1; print 2;", "(a = 1) = 2;"):
+            with self.subTest(source=source):
+                self.assertEqual(parse(Parser, source), parse(RecursiveDescentParser, source))
+                self.assertEqual(parse(StacklessParser, source), parse(Parser, source))
+
+    def test_lox_corpus(self):
+        for path in sorted(glob.glob(os.path.join(LOX_DIR, "**", "*.lox"), recursive=True)):
+            with open(path) as f:
+                source = f.read()
+            with self.subTest(path=os.path.relpath(path, LOX_DIR)):
+                self.assertEqual(parse(Parser, source), parse(RecursiveDescentParser, source))
+                self.assertEqual(parse(StacklessParser, source), parse(Parser, source))
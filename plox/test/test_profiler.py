@@ -0,0 +1,68 @@
+import contextlib
+import io
+import itertools
+import unittest
+from unittest import mock
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.profiler import Profiler
+from pylox.expressions import BinaryExpr
+from pylox.tokens import first_line
+
+
+class TestProfiler(unittest.TestCase):
+    def profile(self, source):
+        # every reading of the clock advances it by one second
+        profiler = Profiler(clock=itertools.count().__next__)
+        interpreter = Interpreter()
+        interpreter.instrument(profiler.wrap)
+        statements = Resolver(interpreter).resolve(Parser(RegexScanner(source).scan_tokens()).parse())
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            interpreter.interpret(statements)
+        return profiler, output.getvalue()
+
+    def test_node_types(self):
+        profiler, output = self.profile("print 1 + 2;")
+        self.assertEqual(output, "3\n")
+        stats = {name: (s.calls, s.cumulative, s.own) for name, s in profiler.node_types.items()}
+        self.assertEqual(stats, {"Print": (1, 7, 2), "BinaryExpr": (1, 5, 3), "LiteralExpr": (2, 2, 2)})
+
+    def test_lines(self):
+        profiler, _ = self.profile("var a = 1;\nprint a +\n  -a;")
+        stats = {line: (s.calls, s.cumulative, s.own) for line, s in profiler.lines.items()}
+        # the print statement starts on line 2, its negation is on line 3
+        self.assertEqual(stats, {1: (2, 3, 3), 2: (3, 9, 6), 3: (2, 3, 3)})
+
+    def test_lines_are_not_searched_per_node(self):
+        # searching every node's subtree for its first line would make long chains quadratic
+        with mock.patch("pylox.profiler.first_line", side_effect=first_line) as search:
+            profiler, output = self.profile("var a = 1;\nprint a" + " +\n a" * 150 + ";")
+        self.assertEqual(output, "151\n")
+        # only for the print statement, which has no token of its own
+        self.assertEqual(search.call_count, 1)
+        # the statement, the outermost addition and its first operand
+        self.assertEqual(profiler.lines[2].calls, 3)
+
+    def test_report_and_collapsed_stacks(self):
+        profiler, _ = self.profile("print 1 + 2;")
+        report = profiler.report()
+        self.assertLess(report.index("BinaryExpr"), report.index("Print"))
+        self.assertEqual(profiler.collapsed().splitlines(), [
+            "Print (line 1) 2000000",
+            "Print (line 1);BinaryExpr (line 1) 3000000",
+            "Print (line 1);BinaryExpr (line 1);LiteralExpr (line 1) 2000000",
+        ])
+
+    def test_runtime_errors_are_recorded(self):
+        profiler, output = self.profile("print -nil;")
+        self.assertIn("Runtime Exception", output)
+        self.assertEqual(profiler.node_types["UnaryExpr"].calls, 1)
+        self.assertEqual(profiler._stack, [])
+
+    def test_uninstrumented_interpreter_is_unchanged(self):
+        interpreter = Interpreter()
+        self.assertEqual(interpreter._visitors[BinaryExpr.kind], interpreter._visit_binary_expr)
@@ -0,0 +1,85 @@
+import io
+import threading
+import unittest
+
+import pylox
+from pylox.program import CompileCache, Program
+from pylox.exceptions import CompileException, RuntimeException
+
+
+class TestProgram(unittest.TestCase):
+    def test_run(self):
+        program = Program("var total = price * 2; print total;")
+        result = program.run({"price": 1.5})
+        self.assertEqual(result, pylox.Result({"price": 1.5, "total": 3.0}, "3\n", None))
+
+    def test_runs_start_from_fresh_environments(self):
+        program = Program("var count = count + 1; print count;")
+        for value in (1.0, 5.0, 1.0):
+            self.assertEqual(program.run({"count": value}).values["count"], value + 1)
+        self.assertEqual(program.run({"count": 1.0, "other": "x"}).values, {"count": 2.0, "other": "x"})
+
+    def test_runtime_errors_are_returned(self):
+        result = Program("print 1; print a;").run()
+        self.assertEqual(result.output, "1\n")
+        self.assertIsInstance(result.error, RuntimeException)
+        self.assertEqual(str(result.error), "Undefined variable 'a'.")
+        self.assertIsNone(Program("print a;").run({"a": None}).error)
+
+    def test_stdout(self):
+        stdout = io.StringIO()
+        result = Program('print "a"; print 2;').run(stdout=stdout)
+        self.assertEqual(stdout.getvalue(), "a\n2\n")
+        self.assertIsNone(result.output)
+
+    def test_syntax_errors_are_raised(self):
+        with self.assertRaises(CompileException) as context:
+            Program("print (1;\nvar = 2;\nprint @;")
+        self.assertEqual(context.exception.errors, ["Unexpected character.", "Expect ')' after expression.",
+                                                    "Expected variable name.", "Expect expression."])
+
+    def test_runs_in_threads(self):
+        program = Program("var b = a * 2;")
+        results = {}
+
+        def run(value):
+            for _ in range(100):
+                results[value] = program.run({"a": value}).values["b"]
+        threads = [threading.Thread(target=run, args=(float(i),)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {float(i): i * 2.0 for i in range(4)})
+
+
+class TestCompileCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = CompileCache(maxsize=2)
+        first = cache.compile("print 1;")
+        self.assertIs(cache.compile("print 1;"), first)
+        cache.compile("print 2;")
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 2, 2))
+
+    def test_evicts_least_recently_used(self):
+        cache = CompileCache(maxsize=2)
+        first = cache.compile("print 1;")
+        second = cache.compile("print 2;")
+        cache.compile("print 1;")
+        cache.compile("print 3;")
+        self.assertIs(cache.compile("print 1;"), first)
+        self.assertIsNot(cache.compile("print 2;"), second)
+        cache.resize(1)
+        self.assertEqual(len(cache), 1)
+
+    def test_syntax_errors_are_not_cached(self):
+        cache = CompileCache()
+        for _ in range(2):
+            with self.assertRaises(CompileException):
+                cache.compile("print;")
+        self.assertEqual((cache.misses, len(cache)), (2, 0))
+
+    def test_module_compile(self):
+        pylox.program.cache.clear()
+        self.assertIs(pylox.compile("var a = 1;"), pylox.compile("var a = 1;"))
+        self.assertEqual(pylox.program.cache.hits, 1)
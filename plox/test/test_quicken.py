@@ -0,0 +1,116 @@
+import contextlib
+import glob
+import io
+import os
+import unittest
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.vm import VM
+from pylox.transpile import TranspilingInterpreter
+from pylox.optimizer import Optimizer
+from pylox.cache import dumps, loads
+from pylox import quicken
+from pylox.expressions import BinaryExpr, UnaryExpr, LiteralExpr
+
+LOX_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "lox")
+
+
+class TestQuicken(unittest.TestCase):
+    def setUp(self):
+        self.interpreter = Interpreter(quicken=True)
+        self.resolver = Resolver(self.interpreter)
+
+    def parse(self, source):
+        return self.resolver.resolve(Parser(RegexScanner(source).scan_tokens()).parse())
+
+    def run_statements(self, statements, interpreter=None):
+        interpreter = interpreter or self.interpreter
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            interpreter.interpret(statements)
+        return output.getvalue()
+
+    def test_nodes_specialize_after_first_evaluation(self):
+        statements = self.parse('var a = 1; print a + 2 < 4; print -a; print !a; print "a" == "b"; print a == nil;')
+        self.assertEqual(self.run_statements(statements), "true\n-1\nfalse\nfalse\nfalse\n")
+        self.assertEqual(type(statements[1].expression), quicken.IntLess)
+        self.assertEqual(type(statements[1].expression.left), quicken.IntAdd)
+        self.assertEqual(type(statements[2].expression), quicken.NumberNegate)
+        self.assertEqual(type(statements[3].expression), quicken.Not)
+        self.assertEqual(type(statements[4].expression), quicken.StringEqual)
+        self.assertEqual(type(statements[5].expression), quicken.PolymorphicBinaryExpr)
+        self.assertEqual(self.interpreter.specializations["IntAdd"], 1)
+        hits = quicken.count_hits(self.interpreter)
+        self.assertEqual(self.run_statements(statements), "true\n-1\nfalse\nfalse\nfalse\n")
+        self.assertEqual(hits["IntAdd"], 1)
+        self.assertEqual(hits["Not"], 1)
+
+    def test_guard_failure_deoptimizes(self):
+        statements = self.parse("var a = 1; print a + 1;")
+        self.run_statements(statements)
+        self.run_statements(self.parse('a = "s";'))
+        output = self.run_statements(statements[1:])
+        self.assertEqual(output, "Runtime Exception: Operands must be two numbers or two strings.\n")
+        self.assertEqual(self.interpreter.runtime_error.token, statements[1].expression.operator)
+        self.assertEqual(type(statements[1].expression), quicken.PolymorphicBinaryExpr)
+        self.assertEqual(self.interpreter.deoptimizations["IntAdd"], 1)
+        self.run_statements(self.parse("a = 2;"))
+        self.assertEqual(self.run_statements(statements[1:]), "3\n")
+        self.assertEqual(type(statements[1].expression), quicken.PolymorphicBinaryExpr)
+
+    def test_floats_specialize_to_number_variants(self):
+        statements = self.parse("var a = 1; var b = 0.5; print a + b; print a * 2; print -b;")
+        self.assertEqual(self.run_statements(statements), "1.5\n2\n-0.5\n")
+        self.assertEqual(type(statements[2].expression), quicken.NumberAdd)
+        self.assertEqual(type(statements[3].expression), quicken.IntMultiply)
+        self.assertEqual(type(statements[4].expression), quicken.NumberNegate)
+        self.run_statements(self.parse("a = 2.5;"))
+        self.assertEqual(self.run_statements(statements[2:4]), "3\n5\n")
+        self.assertEqual(type(statements[2].expression), quicken.NumberAdd)
+        self.assertEqual(type(statements[3].expression), quicken.PolymorphicBinaryExpr)
+
+    def test_errors_do_not_specialize(self):
+        statements = self.parse("print -nil;")
+        self.run_statements(statements)
+        self.assertEqual(type(statements[0].expression), UnaryExpr)
+
+    def test_quickened_trees_can_be_reused(self):
+        statements = self.parse("var x = 10; var y = 1; print x - y; print -x;")
+        self.assertEqual(self.run_statements(statements), "9\n-10\n")
+        self.assertEqual(type(statements[2].expression), quicken.IntSubtract)
+        for make_runtime in (lambda: Interpreter(quicken=True), lambda: Interpreter(compiled=True), VM,
+                             TranspilingInterpreter):
+            with self.subTest(runtime=make_runtime):
+                runtime = make_runtime()
+                # other slots than those the tree was quickened with
+                runtime.globals.slot("y")
+                Resolver(runtime).resolve(statements)
+                self.assertEqual(self.run_statements(statements, runtime), "9\n-10\n")
+
+        decoded = loads(dumps(statements))
+        self.assertEqual(decoded, statements)
+        self.assertEqual((type(decoded[2].expression), type(decoded[3].expression)), (BinaryExpr, UnaryExpr))
+
+        statements = self.parse("print 1 + 2;")
+        self.run_statements(statements)
+        self.assertEqual(type(statements[0].expression), quicken.IntAdd)
+        self.assertEqual(Optimizer().optimize(statements)[0].expression, LiteralExpr(3))
+
+    def test_lox_corpus(self):
+        """Quickened programs give the same results as generic ones, also when they are run again."""
+        for path in sorted(glob.glob(os.path.join(LOX_DIR, "**", "*.lox"), recursive=True)):
+            with open(path) as f:
+                source = f.read()
+            with self.subTest(path=os.path.relpath(path, LOX_DIR)):
+                results = []
+                for interpreter in (Interpreter(), Interpreter(quicken=True)):
+                    parser = Parser(RegexScanner(source).scan_tokens())
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        statements = parser.parse()
+                    Resolver(interpreter).resolve(statements)
+                    runs = [self.run_statements(statements, interpreter) for _ in range(2)]
+                    results.append((runs, str(interpreter.runtime_error)))
+                self.assertEqual(results[0], results[1])
@@ -0,0 +1,66 @@
+import contextlib
+import glob
+import io
+import logging
+import os
+import unittest
+
+from pylox.scanner import Scanner
+from pylox.regex_scanner import RegexScanner
+
+LOX_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "lox")
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def scan(scanner_class, source):
+    """Returns the scanned tokens as tuples, along with everything the scanner reported."""
+    output = io.StringIO()
+    handler = RecordingHandler()
+    logger = logging.getLogger("pylox.scanner")
+    logger.addHandler(handler)
+    try:
+        with contextlib.redirect_stdout(output):
+            tokens = scanner_class(source).scan_tokens()
+    finally:
+        logger.removeHandler(handler)
+    tokens = [(t.token_type, t.lexeme, t.literal, t.line) for t in tokens]
+    return tokens, output.getvalue(), handler.messages
+
+
+class TestRegexScanner(unittest.TestCase):
+    def assertSameScan(self, source):
+        self.assertEqual(scan(Scanner, source), scan(RegexScanner, source))
+
+    def test_tokens(self):
+        self.assertSameScan("var a = (1 + 2.5) * 3 / 4 - -5; print a >= 1 != a <= 2 == !true;")
+        self.assertSameScan("{ fun f(x, y) { return x.y; } } class A < B {}")
+
+    def test_numbers(self):
+        self.assertSameScan("123 123.456 123. .5 1.2.3")
+
+    def test_comments_and_lines(self):
+        self.assertSameScan("// comment\n1 // trailing / comment\n/ 2 //\n\n3")
+
+    def test_strings(self):
+        self.assertSameScan('"" "a b" "multi\nline\nstring" after')
+        self.assertSameScan('1 "unterminated\nstring')
+
+    def test_unexpected_characters(self):
+        self.assertSameScan("a | b & c # é \f @")
+
+    def test_lox_corpus(self):
+        paths = glob.glob(os.path.join(LOX_DIR, "**", "*.lox"), recursive=True)
+        self.assertEqual(len(paths), 263)
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                source = f.read()
+            with self.subTest(path=path):
+                self.assertSameScan(source)
@@ -0,0 +1,73 @@
+import unittest
+
+from pylox.scanner import Scanner
+from pylox.parser import Parser
+from pylox.interpreter import Interpreter
+from pylox.resolver import Resolver
+from pylox.tokens import Token, TokenType
+from pylox.expressions import Variable
+
+
+class TestResolver(unittest.TestCase):
+    def setUp(self):
+        self.interpreter = Interpreter()
+        self.resolver = Resolver(self.interpreter)
+
+    def resolve(self, source):
+        return self.resolver.resolve(Parser(Scanner(source).scan_tokens()).parse())
+
+    def test_globals_get_stable_slots(self):
+        statements = self.resolve("var a = 1; var b = a; a = b;")
+        self.assertEqual(statements[0].slot, 0)
+        self.assertEqual(statements[1].slot, 1)
+        self.assertEqual((statements[1].initializer.depth, statements[1].initializer.slot), (0, 0))
+        assign = statements[2].expression
+        self.assertEqual((assign.depth, assign.slot), (0, 0))
+        self.assertEqual((assign.value.depth, assign.value.slot), (0, 1))
+
+    def test_slots_persist_across_runs(self):
+        first = self.resolve("var a = 1;")
+        second = self.resolve("var b = 2; var a = 3;")
+        self.assertEqual(first[0].slot, second[1].slot)
+        self.assertEqual(second[0].slot, 1)
+
+    def test_undeclared_names_are_unresolved(self):
+        statements = self.resolve("print a; var b = c; c = b; var a = 1; print a;")
+        for expr in (statements[0].expression, statements[1].initializer, statements[2].expression):
+            self.assertEqual((expr.depth, expr.slot), (None, None))
+        self.assertEqual((statements[4].expression.depth, statements[4].expression.slot), (0, statements[3].slot))
+        # only declared names get a slot, however many undefined names are used
+        self.assertEqual(self.interpreter.globals.names, {"b": 0, "a": 1})
+
+    def test_local_scopes(self):
+        self.resolver.begin_scope()
+        statements = self.resolve("var a = 1; var b = 2; var a = 3; print b;")
+        self.assertEqual([s.slot for s in statements[:3]], [0, 1, 0])
+        self.resolver.begin_scope()
+        inner = self.resolve("print b; print c;")
+        self.assertEqual((inner[0].expression.depth, inner[0].expression.slot), (1, 1))
+        self.assertEqual((inner[1].expression.depth, inner[1].expression.slot), (None, None))
+        self.assertEqual(self.resolver.end_scope(), 0)
+        self.assertEqual(self.resolver.end_scope(), 2)
+
+    def test_interpret_resolved(self):
+        statements = self.resolve("var a = 1; var b; a = a + 1;")
+        self.interpreter.interpret(statements)
+        self.assertEqual(self.interpreter.globals.values, {"a": 2.0, "b": None})
+        name = Token(TokenType.IDENTIFIER, "a", None, 1)
+        self.assertEqual(self.interpreter.globals.get(name), 2.0)
+
+    def test_undefined_resolved_variable(self):
+        variable = Variable(Token(TokenType.IDENTIFIER, "x", None, 1))
+        self.resolver.resolve([variable])
+        self.assertIsNone(variable.slot)
+        self.assertRaises(Exception, lambda: self.interpreter.evaluate(variable))
+        self.assertEqual(self.interpreter.globals.slots, [])
+
+    def test_names_defined_later(self):
+        # resolved before 'a' is declared, the reference looks it up by name once it is defined
+        statements = self.resolve("a = a + 1;")
+        self.interpreter.interpret(self.resolve("var a = 1;"))
+        self.interpreter.interpret(statements)
+        self.assertIsNone(self.interpreter.runtime_error)
+        self.assertEqual(self.interpreter.globals.values, {"a": 2})
@@ -0,0 +1,109 @@
+import unittest
+
+from pylox.regex_scanner import RegexScanner
+from pylox.scanner import Scanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.optimizer import Optimizer
+from pylox.vm import VM
+from pylox.transpile import TranspilingInterpreter
+from pylox.output import CaptureSink, stringify
+from pylox.rope import Rope, concat, FLATTEN_LENGTH
+from pylox import quicken
+
+ENGINES = {
+    "tree": lambda output: Interpreter(output=output),
+    "closures": lambda output: Interpreter(compiled=True, output=output),
+    "quickened": lambda output: Interpreter(quicken=True, output=output),
+    "vm": lambda output: VM(output=output),
+    "python": lambda output: TranspilingInterpreter(output=output),
+}
+
+
+def run(source, engine):
+    sink = CaptureSink()
+    interpreter = ENGINES[engine](sink)
+    statements = Resolver(interpreter).resolve(Parser(RegexScanner(source).scan_tokens()).parse())
+    interpreter.interpret(statements)
+    return sink.getvalue()
+
+
+class TestRope(unittest.TestCase):
+    def test_short_concatenations_are_copied(self):
+        self.assertEqual(type(concat("a", "b")), str)
+        self.assertEqual(type(concat("a" * FLATTEN_LENGTH, "b")), Rope)
+
+    def test_flatten(self):
+        value = ""
+        for i in range(10000):
+            value = concat(value, "abcdefgh")
+        self.assertEqual(len(value), 80000)
+        self.assertEqual(str(value), "abcdefgh" * 10000)
+        self.assertEqual(concat(value, "!").flatten(), "abcdefgh" * 10000 + "!")
+
+    def test_shared_pieces(self):
+        base = concat("a" * FLATTEN_LENGTH, "b")
+        extended = concat(base, "c")
+        # base's pieces were extended by the first concatenation, so the second one copies
+        branch = concat(base, "d")
+        self.assertEqual((str(base), str(extended), str(branch)),
+                         ("a" * FLATTEN_LENGTH + "b", "a" * FLATTEN_LENGTH + "bc", "a" * FLATTEN_LENGTH + "bd"))
+        doubled = concat(extended, extended)
+        self.assertEqual(doubled, ("a" * FLATTEN_LENGTH + "bc") * 2)
+
+    def test_equality_and_hashing(self):
+        left = concat("a" * FLATTEN_LENGTH, "b")
+        right = concat("a", "a" * (FLATTEN_LENGTH - 1) + "b")
+        text = "a" * FLATTEN_LENGTH + "b"
+        self.assertEqual(left, right)
+        self.assertEqual(left, text)
+        self.assertEqual(text, left)
+        self.assertFalse(left != text)
+        self.assertNotEqual(left, concat(left, "c"))
+        self.assertNotEqual(left, 1.0)
+        self.assertNotEqual(left, None)
+        self.assertEqual({left: 1}[text], 1)
+        self.assertEqual(stringify(left), text)
+        self.assertEqual(repr(left), repr(text))
+
+    def test_literals_are_interned(self):
+        for scanner in (Scanner, RegexScanner):
+            with self.subTest(scanner=scanner.__name__):
+                a, b = [token.literal for token in scanner('"a long string" "a long string"').scan_tokens()[:2]]
+                self.assertIs(a, b)
+
+    def test_folded_concatenation_is_a_literal(self):
+        source = 'print "{0}" + "{0}";'.format("a" * FLATTEN_LENGTH)
+        statements = Optimizer().optimize(Parser(RegexScanner(source).scan_tokens()).parse())
+        self.assertEqual(type(statements[0].expression.value), str)
+
+
+class TestStringEngines(unittest.TestCase):
+    def assertSameOnAllEngines(self, source, expected):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(run(source, engine), expected)
+
+    def test_concatenation(self):
+        self.assertSameOnAllEngines('var a = "lox"; print a + "y"; print "" + a + a == "loxlox";',
+                                    "loxy\ntrue\n")
+
+    def test_long_concatenation(self):
+        source = 'var s = "";\n' + 's = s + "lox";\n' * 500 + 'print s; print s == s + ""; print s + s == s;'
+        self.assertSameOnAllEngines(source, "lox" * 500 + "\ntrue\nfalse\n")
+
+    def test_operand_errors(self):
+        for source in ('print "a" + 1;', 'print 1 + "a";', "print nil + nil;", 'var a = true; print a + "s";'):
+            with self.subTest(source=source):
+                self.assertSameOnAllEngines(
+                    source, "Runtime Exception: Operands must be two numbers or two strings.\n")
+
+    def test_quickened_concatenation(self):
+        interpreter = Interpreter(quicken=True, output=CaptureSink())
+        statements = Resolver(interpreter).resolve(Parser(RegexScanner(
+            'var s = "{}"; s = s + "a"; s = s + s;'.format("a" * FLATTEN_LENGTH)).scan_tokens()).parse())
+        interpreter.interpret(statements)
+        self.assertEqual(type(statements[1].expression.value), quicken.StringAdd)
+        self.assertEqual(type(statements[2].expression.value), quicken.StringAdd)
+        self.assertEqual(str(interpreter.globals.values["s"]), "a" * (FLATTEN_LENGTH + 1) * 2)
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+
+from pylox.scheduler import Scheduler
+from pylox.output import CaptureSink
+from pylox.exceptions import CompileException, RuntimeException
+
+
+class Sink(object):
+    """Output sink shared by several programs, recording which program printed each value."""
+    def __init__(self, lines, name):
+        self.lines = lines
+        self.name = name
+
+    def print(self, value):
+        self.lines.append((self.name, value))
+
+    def write(self, text):
+        self.lines.append((self.name, text))
+
+    def flush(self):
+        pass
+
+
+class TestScheduler(unittest.TestCase):
+    def test_programs_interleave(self):
+        async def main():
+            lines = []
+            scheduler = Scheduler(quantum=2)
+            for name in "ab":
+                scheduler.spawn("print 1; print 2; print 3; print 4;", output=Sink(lines, name))
+            await scheduler.gather()
+            return lines
+        self.assertEqual(asyncio.run(main()), [("a", 1.0), ("a", 2.0), ("b", 1.0), ("b", 2.0),
+                                               ("a", 3.0), ("a", 4.0), ("b", 3.0), ("b", 4.0)])
+
+    def test_separate_environments(self):
+        async def main():
+            scheduler = Scheduler(quantum=1)
+            tasks = [scheduler.spawn("var b = a * 2; a = b; print a;", globals={"a": float(i)}) for i in range(3)]
+            return await scheduler.gather(*tasks)
+        interpreters = asyncio.run(main())
+        self.assertEqual([i.output.getvalue() for i in interpreters], ["0\n", "2\n", "4\n"])
+        self.assertEqual(interpreters[2].globals.values, {"a": 4.0, "b": 4.0})
+
+    def test_runtime_errors(self):
+        async def main():
+            scheduler = Scheduler()
+            failing = scheduler.spawn("print 1; print -nil; print 2;")
+            passing = scheduler.spawn("print 1;", output=CaptureSink())
+            return await scheduler.gather(failing, passing)
+        failing, passing = asyncio.run(main())
+        self.assertIsInstance(failing.runtime_error, RuntimeException)
+        self.assertEqual(failing.output.getvalue(), "1\nRuntime Exception: Operand must be a number.\n")
+        self.assertIsNone(passing.runtime_error)
+
+    def test_cancel(self):
+        async def main():
+            scheduler = Scheduler(quantum=1, compiled=True)
+            sink = CaptureSink()
+            task = scheduler.spawn("print 1; print 2; print 3;", output=sink)
+            other = scheduler.spawn("print 1;")
+            await asyncio.sleep(0)
+            scheduler.cancel(task)
+            results = await scheduler.gather(task, other)
+            return sink.getvalue(), results, scheduler.tasks
+        output, (cancelled, finished), tasks = asyncio.run(main())
+        self.assertEqual(output, "1\n")
+        self.assertIsInstance(cancelled, asyncio.CancelledError)
+        self.assertEqual(finished.output.getvalue(), "1\n")
+        self.assertEqual(tasks, set())
+
+    def test_syntax_errors(self):
+        async def main():
+            Scheduler().spawn("print;")
+        with self.assertRaises(CompileException):
+            asyncio.run(main())
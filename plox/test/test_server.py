@@ -0,0 +1,125 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pylox_cli
+import pylox_client
+from pylox import server
+
+
+def fake_run(argv, source=None, cache=None):
+    command = argv[0]
+    if command == "sleep":
+        time.sleep(float(argv[1]))
+    elif command == "pid":
+        print(os.getpid())
+    elif command == "exit":
+        sys.exit(int(argv[1]))
+    elif command == "fail":
+        raise ValueError("failed")
+    print("out", command)
+    print("err", command, file=sys.stderr)
+    return 0
+
+
+def execute(pool, argv):
+    messages = []
+    code = pool.execute({"argv": argv}, lambda name, value: messages.append((name, value)))
+    output = {"stdout": "", "stderr": ""}
+    for name, value in messages:
+        output[name] += value
+    return code, output["stdout"], output["stderr"]
+
+
+class TestPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = server.Pool(fake_run, workers=1, max_requests=3, timeout=1)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_output_and_exit_codes(self):
+        self.assertEqual(execute(self.pool, ["a"]), (0, "out a\n", "err a\n"))
+        self.assertEqual(execute(self.pool, ["exit", "3"]), (3, "", ""))
+        code, _, stderr = execute(self.pool, ["fail"])
+        self.assertEqual(code, 1)
+        self.assertIn("ValueError: failed", stderr)
+
+    def test_timeout(self):
+        code, _, stderr = execute(self.pool, ["sleep", "5"])
+        self.assertEqual((code, stderr), (server.TIMEOUT_EXIT_CODE, "Timed out after 1s.\n"))
+        self.assertEqual(execute(self.pool, ["a"])[0], 0)
+        self.assertEqual(self.pool.stats()["timeouts"], 1)
+
+    def test_workers_are_recycled(self):
+        pids = [execute(self.pool, ["pid"])[1] for _ in range(4)]
+        self.assertEqual(len(set(pids[:3])), 1)
+        self.assertNotEqual(pids[3], pids[0])
+        self.assertEqual(self.pool.stats()["recycled"], 1)
+
+    def test_stats(self):
+        self.assertIsNone(self.pool.stats()["p50"])
+        for _ in range(3):
+            execute(self.pool, ["a"])
+        stats = self.pool.stats()
+        self.assertEqual(stats["requests"], 3)
+        self.assertLessEqual(stats["p50"], stats["p90"])
+        self.assertLessEqual(stats["p90"], stats["p99"])
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket = os.path.join(self.directory.name, "pylox.sock")
+        self.server = server.Server(self.socket, server.Pool(pylox_cli.main, workers=2))
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def request(self, message):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        reply = pylox_client.request(self.socket, message, stdout, stderr)
+        return reply, stdout.getvalue(), stderr.getvalue()
+
+    def test_script(self):
+        path = os.path.join(self.directory.name, "script.lox")
+        with open(path, "w") as f:
+            f.write("var a = 1;\nprint a + 1;\nprint -nil;\n")
+        message = {"argv": ["-i", "script.lox", "--cache-dir", self.directory.name], "cwd": self.directory.name}
+        for _ in range(3):
+            reply, stdout, _ = self.request(message)
+            self.assertEqual(reply, {"exit": 0})
+            self.assertEqual(stdout, "2\nRuntime Exception: Operand must be a number.\n")
+
+    def test_source(self):
+        reply, stdout, _ = self.request({"argv": ["-i", "-", "--vm"], "source": 'print "a";'})
+        self.assertEqual((reply, stdout), ({"exit": 0}, "a\n"))
+
+    def test_usage_error(self):
+        reply, _, stderr = self.request({"argv": ["--bogus"]})
+        self.assertEqual(reply, {"exit": 2})
+        self.assertIn("unrecognized arguments: --bogus", stderr)
+
+    def test_stats(self):
+        self.request({"argv": ["-i", "-"], "source": "print 1;"})
+        reply, _, _ = self.request({"stats": True})
+        self.assertEqual(reply["stats"]["requests"], 1)
+        self.assertEqual(reply["stats"]["workers"], 2)
+
+    def test_client_runs_locally_without_server(self):
+        stdout = io.StringIO()
+        with mock.patch("sys.stdin", io.StringIO("print 1 + 1;")), \
+                mock.patch("sys.stdout", stdout):
+            code = pylox_client.main(["--socket", os.path.join(self.directory.name, "missing.sock"), "-i", "-",
+                                      "--no-cache"])
+        self.assertEqual((code, stdout.getvalue()), (0, "2\n"))
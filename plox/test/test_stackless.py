@@ -0,0 +1,83 @@
+import contextlib
+import glob
+import io
+import os
+import tempfile
+import unittest
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import StacklessParser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.output import CaptureSink
+
+LOX_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "lox")
+
+DEPTH = 100000
+
+
+def parse(source):
+    parser = StacklessParser(RegexScanner(source).scan_tokens())
+    with contextlib.redirect_stdout(io.StringIO()):
+        statements = parser.parse()
+    return statements, parser.errors
+
+
+def run(source, **options):
+    interpreter = Interpreter(output=CaptureSink(), **options)
+    interpreter.interpret(Resolver(interpreter).resolve(parse(source)[0]))
+    error = interpreter.runtime_error
+    return interpreter.output.getvalue(), None if error is None else str(error), interpreter.globals.values
+
+
+class TestStackless(unittest.TestCase):
+    def test_deep_nesting(self):
+        for name, source, output in (
+                ("groupings and negations", "print " + "(-" * DEPTH + "1" + ")" * DEPTH + ";", "1\n"),
+                ("right-nested additions", "print " + "1 + (" * DEPTH + "1" + ")" * DEPTH + ";",
+                 "{}\n".format(DEPTH + 1)),
+                ("assignments", "var a; " + "a = " * DEPTH + "2; print a;", "2\n")):
+            with self.subTest(name):
+                self.assertEqual(run(source, stackless=True)[:2], (output, None))
+
+    def test_deeply_nested_modules(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "deep.lox"), "w") as f:
+                f.write("var deep = " + "-" * 50000 + "1;")
+            results = []
+            for max_depth in (50000, 49999):
+                # modules are parsed and run like the importing program, with its limit
+                interpreter = Interpreter(output=CaptureSink(), stackless=True, max_depth=max_depth)
+                interpreter.importer.search_path[:0] = [directory]
+                interpreter.interpret(Resolver(interpreter).resolve(parse('import "deep.lox"; print deep;')[0]))
+                error = interpreter.runtime_error
+                results.append((interpreter.output.getvalue(), None if error is None else str(error)))
+        self.assertEqual(results, [("1\n", None), ("Runtime Exception: Stack overflow.\n", "Stack overflow.")])
+
+    def test_stack_overflow(self):
+        source = "print 1;\nprint " + "-" * 10 + "1;"
+        self.assertEqual(run(source, stackless=True, max_depth=10)[:2], ("1\n1\n", None))
+        output, error, _ = run(source, stackless=True, max_depth=9)
+        self.assertEqual((output, error), ("1\nRuntime Exception: Stack overflow.\n", "Stack overflow."))
+
+    def test_recursion_error_is_stack_overflow(self):
+        source = "print " + "-" * DEPTH + "1;"
+        self.assertEqual(run(source)[:2], ("Runtime Exception: Stack overflow.\n", "Stack overflow."))
+
+    def test_runtime_errors(self):
+        for source in ("print -nil;", 'print 1 + "a";', "print a;", "a = 1;", "print 1 / 0;", "var a = b = 1;"):
+            with self.subTest(source=source):
+                self.assertEqual(run(source, stackless=True), run(source))
+
+    def test_lox_corpus(self):
+        for path in sorted(glob.glob(os.path.join(LOX_DIR, "**", "*.lox"), recursive=True)):
+            with open(path) as f:
+                source = f.read()
+            if parse(source)[1]:
+                continue
+            with self.subTest(path=os.path.relpath(path, LOX_DIR)):
+                self.assertEqual(run(source, stackless=True), run(source))
+
+    def test_exclusive_modes(self):
+        with self.assertRaises(ValueError):
+            Interpreter(stackless=True, compiled=True)
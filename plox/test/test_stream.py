@@ -0,0 +1,122 @@
+import contextlib
+import glob
+import io
+import os
+import tracemalloc
+import unittest
+
+from pylox.regex_scanner import RegexScanner, StreamScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.vm import VM
+from pylox.tokens import TokenType
+from pylox_cli import PyLox
+
+LOX_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "lox")
+
+
+def token_tuples(tokens):
+    return [(t.token_type, t.lexeme, t.literal, t.line) for t in tokens]
+
+
+class GeneratedSource(object):
+    """File-like object producing a long program on demand, without ever holding all of it."""
+    def __init__(self, statements):
+        self.remaining = statements
+        self.pending = "var total = 0;\n"
+
+    def read(self, size):
+        while len(self.pending) < size and self.remaining:
+            self.pending += "total = total + {} * 2 - (1 + 1);\n".format(self.remaining)
+            self.remaining -= 1
+        chunk, self.pending = self.pending[:size], self.pending[size:]
+        return chunk
+
+
+class TestStreamScanner(unittest.TestCase):
+    def assertSameTokens(self, source, chunk_size):
+        expected = token_tuples(RegexScanner(source).scan_tokens())
+        actual = token_tuples(StreamScanner(io.StringIO(source), chunk_size=chunk_size).iter_tokens())
+        self.assertEqual(expected, actual)
+
+    def test_tokens_split_across_chunks(self):
+        source = 'var abc = 12.5 >= 3; // comment\nprint "multi\nline" != abc;\n12. 1.2.3 "open'
+        for chunk_size in range(1, 12):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertSameTokens(source, chunk_size)
+
+    def test_errors(self):
+        source = 'print 1 @ 2;\nprint # "open'
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), self.assertLogs("pylox.scanner"):
+            expected = RegexScanner(source)
+            expected.scan_tokens()
+            for chunk_size in (1, 4, 1024):
+                with self.subTest(chunk_size=chunk_size):
+                    scanner = StreamScanner(io.StringIO(source), chunk_size=chunk_size)
+                    list(scanner.iter_tokens())
+                    self.assertEqual(scanner.errors, expected.errors)
+        self.assertEqual(expected.errors, ["Unexpected character.", "Unexpected character.", "Unterminated string."])
+        # errors are only collected and logged, never printed to the embedding program's stdout
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_lox_corpus(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            for path in glob.glob(os.path.join(LOX_DIR, "**", "*.lox"), recursive=True):
+                with open(path, encoding="utf-8") as f:
+                    source = f.read()
+                with self.subTest(path=path):
+                    self.assertSameTokens(source, 16)
+
+
+class TestStreamingPipeline(unittest.TestCase):
+    def test_parser_pulls_tokens_lazily(self):
+        consumed = []
+
+        def tokens():
+            for token in RegexScanner("print 1; print 2; print 3;").scan_tokens():
+                consumed.append(token)
+                yield token
+
+        statements = Parser(tokens()).parse_iter()
+        next(statements)
+        self.assertLess(len(consumed), 5)
+        self.assertEqual(len(list(statements)), 2)
+        self.assertEqual(consumed[-1].token_type, TokenType.EOF)
+
+    def test_statements_run_as_parsed(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            PyLox().run_stream(io.StringIO("print 1; print 2; print -nil; print 3;"))
+        self.assertEqual(output.getvalue(), "1\n2\nRuntime Exception: Operand must be a number.\n")
+
+    def test_syntax_error_stops_execution(self):
+        for options in ({}, {"compiled": True}, {"vm": True}, {"transpile": True}):
+            with self.subTest(**options):
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    PyLox(**options).run_stream(io.StringIO("print 1; var = 2; print 3;"))
+                self.assertEqual(output.getvalue(), "1\nError parsing statements: Expected variable name.\n")
+                # a runtime error stops execution before the syntax error is reached
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    PyLox(**options).run_stream(io.StringIO("print 1; print -nil; var = 2;"))
+                self.assertEqual(output.getvalue(), "1\nRuntime Exception: Operand must be a number.\n")
+
+    def peak_memory(self, statements, runtime):
+        resolver = Resolver(runtime)
+        tracemalloc.start()
+        try:
+            tokens = StreamScanner(GeneratedSource(statements), chunk_size=1024).iter_tokens()
+            runtime.interpret(resolver.resolve_iter(Parser(tokens).parse_iter()))
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_does_not_grow_with_script_length(self):
+        for make_runtime in (Interpreter, lambda: Interpreter(compiled=True), VM):
+            with self.subTest(runtime=make_runtime):
+                short = self.peak_memory(500, make_runtime())
+                long = self.peak_memory(2500, make_runtime())
+                self.assertLess(long, short * 1.5)
@@ -0,0 +1,51 @@
+import unittest
+
+from pylox.tokens import Token, TokenType, TOKEN_TYPE_NAMES, token_type_name, first_line
+from pylox.expressions import BinaryExpr, LiteralExpr, Variable, Assign, KIND_COUNT
+from pylox import expressions
+
+
+class TestTokens(unittest.TestCase):
+    def test_token_type_names(self):
+        self.assertEqual(token_type_name(TokenType.LESS_EQUAL), "LESS_EQUAL")
+        self.assertEqual(len(TOKEN_TYPE_NAMES), TokenType.EOF + 1)
+        self.assertEqual(repr(Token(TokenType.NUMBER, "5", 5.0, 1)), "(NUMBER 5 5.0)")
+
+    def test_token_equality(self):
+        self.assertEqual(Token(TokenType.PLUS, "+", None, 1), Token(TokenType.PLUS, "+", None, 1))
+        self.assertNotEqual(Token(TokenType.PLUS, "+", None, 1), Token(TokenType.PLUS, "+", None, 2))
+        self.assertEqual(hash(Token(TokenType.PLUS, "+", None, 1)), hash(Token(TokenType.PLUS, "+", None, 1)))
+        self.assertEqual(len({Token(TokenType.NUMBER, "1", 1, 1), Token(TokenType.NUMBER, "1", 1, 1)}), 1)
+
+    def test_first_line(self):
+        plus = Token(TokenType.PLUS, "+", None, 3)
+        a = Variable(Token(TokenType.IDENTIFIER, "a", None, 4))
+        self.assertEqual(first_line(BinaryExpr(LiteralExpr(1.0), plus, a)), 3)
+        self.assertIsNone(first_line(LiteralExpr(1.0)))
+
+    def test_tokens_have_no_dict(self):
+        self.assertFalse(hasattr(Token(TokenType.EOF, "", None, 1), "__dict__"))
+
+
+class TestNodes(unittest.TestCase):
+    def test_structural_equality(self):
+        def build(value):
+            return BinaryExpr(LiteralExpr(1.0), Token(TokenType.PLUS, "+", None, 1), LiteralExpr(value))
+        self.assertEqual(build(2.0), build(2.0))
+        self.assertNotEqual(build(2.0), build(3.0))
+        self.assertNotEqual(LiteralExpr(1.0), [1.0])
+        self.assertEqual(hash(build(2.0)), hash(build(2.0)))
+        self.assertEqual(len({build(2.0), build(2.0), build(3.0)}), 2)
+
+    def test_resolution_is_ignored_by_equality(self):
+        name = Token(TokenType.IDENTIFIER, "a", None, 1)
+        resolved = Variable(name)
+        resolved.depth, resolved.slot = 0, 3
+        self.assertEqual(resolved, Variable(name))
+        self.assertEqual(hash(resolved), hash(Variable(name)))
+
+    def test_kinds_are_unique(self):
+        kinds = [cls.kind for cls in vars(expressions).values()
+                 if isinstance(cls, type) and hasattr(cls, "kind")]
+        self.assertEqual(sorted(kinds), list(range(KIND_COUNT)))
+        self.assertFalse(hasattr(Assign(None, None), "__dict__"))
@@ -0,0 +1,61 @@
+import contextlib
+import io
+import itertools
+import unittest
+
+from pylox_cli import PyLox
+from pylox.trace import Tracer, summarize
+from pylox.expressions import Var
+
+
+class TestTrace(unittest.TestCase):
+    def trace(self, source, **options):
+        trace = io.StringIO()
+        lox = PyLox(trace=trace, **options)
+        # every reading of the clock advances it by a microsecond
+        lox.tracer.clock = (n / 1e6 for n in itertools.count(1)).__next__
+        lox.tracer.start = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            lox.run_source(source)
+        return [line.split("\t") for line in trace.getvalue().splitlines()]
+
+    def test_events(self):
+        events = self.trace("var a = 1;\nprint -a;")
+        self.assertEqual([event[0] for event in events], [str(n) for n in range(1, len(events) + 1)])
+        self.assertEqual([event[1:] for event in events if event[1] != "token"], [
+            ["node", "1", "Var"],
+            ["node", "1", "LiteralExpr"],
+            ["define", "1", "a", "1"],
+            ["node", "2", "Print"],
+            ["node", "2", "UnaryExpr"],
+            ["node", "2", "Variable"],
+        ])
+        tokens = [event[2:] for event in events if event[1] == "token"]
+        self.assertEqual(tokens[:3], [["1", "VAR", "var"], ["1", "IDENTIFIER", "a"], ["1", "EQUAL", "="]])
+        self.assertEqual(tokens[-1], ["2", "EOF", ""])
+
+    def test_runtime_errors(self):
+        events = self.trace("print 1;\nprint -nil;")
+        self.assertEqual(events[-1][1:], ["error", "2", "Operand must be a number."])
+
+    def test_fields_are_escaped(self):
+        trace = io.StringIO()
+        Tracer(trace).emit("define", 1, "s", 'a\tb\nc')
+        self.assertEqual(trace.getvalue().split("\t", 1)[1], "define\t1\ts\ta\\tb\\nc\n")
+
+    def test_summary(self):
+        trace = io.StringIO()
+        lox = PyLox(trace=trace)
+        with contextlib.redirect_stdout(io.StringIO()):
+            lox.run_source("var a = 1;\nvar b = a;\nb = nil + a;")
+        summary = summarize(io.StringIO(trace.getvalue()))
+        self.assertEqual(summary.events["define"], 2)
+        self.assertEqual(summary.definitions, {"a": 1, "b": 1})
+        self.assertEqual(summary.node_types["Var"], 2)
+        self.assertEqual(summary.errors, ["[line 3] Operands must be two numbers or two strings."])
+        self.assertIn("variables defined", summary.report())
+
+    def test_untraced_interpreter_is_unchanged(self):
+        lox = PyLox()
+        self.assertIsNone(lox.tracer)
+        self.assertEqual(lox.interpreter._visitors[Var.kind], lox.interpreter._visit_var_stmt)
@@ -0,0 +1,78 @@
+import contextlib
+import glob
+import io
+import os
+import unittest
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.transpile import TranspilingInterpreter
+from pylox import transpile
+
+LOX_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "lox")
+
+
+def run(source, engine, resolve=True):
+    parser = Parser(RegexScanner(source).scan_tokens())
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        statements = parser.parse()
+        if resolve:
+            Resolver(engine).resolve(statements)
+        engine.interpret(statements)
+    error = engine.runtime_error
+    return output.getvalue(), None if error is None else (type(error), str(error))
+
+
+class TestTranspile(unittest.TestCase):
+    def assertSameAsInterpreter(self, source, resolve=True):
+        self.assertEqual(run(source, TranspilingInterpreter(), resolve), run(source, Interpreter(), resolve))
+
+    def test_arithmetic(self):
+        self.assertSameAsInterpreter("var a = 1; var b; a = (a + 2.5) * -a / 2 - 1; print a; print b; "
+                                     "print a > 1; print a <= -3; print !(a == nil) != \"s\"; print !!b;")
+
+    def test_assignment(self):
+        self.assertSameAsInterpreter("var a; var b; print a = b = 2; print a + b; a = b = 3; print a * b;")
+
+    def test_runtime_errors(self):
+        for source in ("print -nil;", "print 1 + true;", "print nil > 1;", "print a;", "a = 1;", "print 1 / 0;",
+                       "print a = 1;"):
+            with self.subTest(source=source):
+                self.assertSameAsInterpreter(source)
+
+    def test_operands_are_evaluated_in_order(self):
+        # the assignment on the right happens before the left operand is found not to be a number
+        self.assertSameAsInterpreter('var a = 1; print "s" + (a = 2); print a;')
+        self.assertSameAsInterpreter('var a = 1; print -b + (a = 2); print a;')
+
+    def test_error_lines(self):
+        engine = TranspilingInterpreter()
+        run("var a = 1;\n\nprint a / 0;", engine)
+        self.assertEqual(engine.runtime_error.line, 3)
+        run("var a = 1;\nprint a +\n  nil;", engine)
+        self.assertEqual(engine.runtime_error.line, 2)
+        run("print\n  b;", engine)
+        self.assertEqual(engine.runtime_error.line, 2)
+
+    def test_unresolved_statements_are_interpreted(self):
+        self.assertSameAsInterpreter("var a = 1; a = a + 1; print a; print b;", resolve=False)
+
+    def test_deep_nesting(self):
+        self.assertSameAsInterpreter("print " + " + ".join(["1"] * 150) + ";")
+        self.assertSameAsInterpreter("print " + "-" * 150 + "1;")
+        # running out of Python stack is a stack overflow, as in the tree-walker
+        self.assertSameAsInterpreter("print " + " + ".join(["1"] * 3000) + ";")
+
+    def test_batches(self):
+        source = "var a = 0;\n" + "a = a + 1;\n" * (transpile.BATCH_SIZE * 2 + 10) + "print a;\nprint -a;"
+        self.assertSameAsInterpreter(source)
+
+    def test_lox_corpus(self):
+        for path in sorted(glob.glob(os.path.join(LOX_DIR, "**", "*.lox"), recursive=True)):
+            with open(path) as f:
+                source = f.read()
+            with self.subTest(path=os.path.relpath(path, LOX_DIR)):
+                self.assertSameAsInterpreter(source)
@@ -0,0 +1,106 @@
+import contextlib
+import glob
+import io
+import os
+import unittest
+
+from pylox.scanner import Scanner
+from pylox.parser import Parser
+from pylox.interpreter import Interpreter
+from pylox.resolver import Resolver
+from pylox.compiler import Compiler, OpCode
+from pylox.exceptions import CompileException
+from pylox.vm import VM
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "scripts")
+
+
+def parse(source, runtime):
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    return Resolver(runtime).resolve(statements)
+
+
+def run(source, runtime):
+    statements = parse(source, runtime)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        runtime.interpret(statements)
+    return output.getvalue()
+
+
+class TestCompiler(unittest.TestCase):
+    def test_chunk_layout(self):
+        chunk = Compiler().compile(parse("var a = 1;\nprint a + 1;", VM()))
+        self.assertEqual(list(chunk.code), [
+            OpCode.CONSTANT, 0,
+            OpCode.DEFINE_GLOBAL, 0, 0,
+            OpCode.GET_GLOBAL, 0, 0,
+            OpCode.CONSTANT, 0,
+            OpCode.ADD,
+            OpCode.PRINT,
+            OpCode.RETURN,
+        ])
+        self.assertEqual(chunk.constants, [1.0])
+        self.assertEqual(chunk.line_at(0), 1)
+        self.assertEqual(chunk.line_at(10), 2)
+
+    def test_constants_keep_types_apart(self):
+        chunk = Compiler().compile(parse('print 1; print "1"; print 1;', VM()))
+        self.assertEqual(chunk.constants, [1.0, "1"])
+
+    def test_long_constants(self):
+        source = "".join("print {};".format(i) for i in range(300))
+        self.assertEqual(run(source, VM()), run(source, Interpreter()))
+
+    def test_undeclared_globals_by_name(self):
+        vm = VM()
+        chunk = Compiler().compile(parse("a = a;", vm))
+        self.assertEqual(list(chunk.code), [
+            OpCode.GET_GLOBAL_NAMED, 0, 0, 0,
+            OpCode.SET_GLOBAL_NAMED, 0, 0, 0,
+            OpCode.POP,
+            OpCode.RETURN,
+        ])
+        self.assertEqual(chunk.constants, ["a"])
+        self.assertEqual(vm.globals.slots, [])
+        run("var a = 1;", vm)
+        vm.run(chunk)
+        self.assertEqual(vm.globals.values, {"a": 1})
+
+    def test_unparseable_statement(self):
+        self.assertRaises(CompileException, lambda: Compiler().compile([None]))
+
+
+class TestVM(unittest.TestCase):
+    def assertSameOutput(self, source):
+        self.assertEqual(run(source, Interpreter()), run(source, VM()))
+
+    def test_arithmetic(self):
+        self.assertEqual(run("print (1 + 2) * 3 - 4 / 2;", VM()), "7\n")
+        self.assertSameOutput("print 1 < 2; print 2 <= 2; print 3 > 4; print 3 >= 4; print -5;")
+
+    def test_equality_and_truthiness(self):
+        self.assertSameOutput("print !true; print !nil; print !0; print 1 == 1; print nil != nil;")
+        self.assertSameOutput('print "a" == "a"; print nil == false; print "a" != 1;')
+
+    def test_variables(self):
+        self.assertSameOutput("var a = 1; var b; a = a + 2; print a; print b;")
+        self.assertSameOutput("var a = 1; var b = a = 5; print a; print b;")
+
+    def test_runtime_errors(self):
+        self.assertSameOutput('print 1; print "a" - 1; print 2;')
+        self.assertSameOutput("print -nil;")
+        self.assertSameOutput("print undefined;")
+        self.assertSameOutput("undefined = 1;")
+
+    def test_stack_overflow(self):
+        # the recursive compiler running out of Python stack is reported like the tree-walker does
+        vm = VM()
+        self.assertEqual(run("var x = 1; print " + " + ".join(["x"] * 3000) + ";", vm),
+                         "Runtime Exception: Stack overflow.\n")
+        self.assertEqual(str(vm.runtime_error), "Stack overflow.")
+
+    def test_scripts(self):
+        for path in glob.glob(os.path.join(SCRIPTS_DIR, "*.lox")):
+            with open(path) as f:
+                self.assertSameOutput(f.read())
@@ -0,0 +1,74 @@
+"""
+Compares running many Lox programs concurrently on the asyncio Scheduler with running each on its
+own thread.
+
+    python tools/bench_async.py [-p PROGRAMS] [-s STATEMENTS] [-q QUANTUM] [-n REPEAT]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+PLOX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, PLOX_DIR)
+
+import pylox
+from pylox.interpreter import Interpreter
+from pylox.scheduler import Scheduler
+from pylox.output import CaptureSink
+
+
+def source(statements):
+    return "var a = 1;\nvar b = 2;\n" + "a = (a + b * 2 - 1) / 2 + b;\nb = -b * -1;\n" * (statements // 2)
+
+
+def run_threads(text, programs):
+    program = pylox.compile(text)
+
+    def run():
+        interpreter = Interpreter(output=CaptureSink())
+        interpreter.globals = interpreter.environment = program.environment()
+        interpreter.interpret(program.statements)
+    threads = [threading.Thread(target=run) for _ in range(programs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_scheduler(text, programs, quantum):
+    async def main():
+        scheduler = Scheduler(quantum=quantum)
+        for _ in range(programs):
+            scheduler.spawn(text)
+        await scheduler.gather()
+    asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the asyncio scheduler")
+    parser.add_argument("-p", dest="programs", type=int, default=1000)
+    parser.add_argument("-s", dest="statements", type=int, default=200)
+    parser.add_argument("-q", dest="quantum", type=int, default=100)
+    parser.add_argument("-n", dest="repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = source(args.statements)
+    total = args.programs * args.statements
+    baseline = None
+    for name, run in (("threads", lambda: run_threads(text, args.programs)),
+                      ("asyncio", lambda: run_scheduler(text, args.programs, args.quantum))):
+        elapsed = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            elapsed = min(elapsed or float("inf"), time.perf_counter() - start)
+        baseline = baseline or elapsed
+        print("{:<8} {:.3f}s {:>10.0f} statements/s ({:.2f}x)".format(name, elapsed, total / elapsed,
+                                                                      baseline / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Compares evaluating the same snippets repeatedly through PyLox.try_read_and_evaluate, which scans,
+parses and resolves on every call, with pylox.compile and Program.run.
+
+    python tools/bench_embed.py [-n CALLS]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+PLOX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, PLOX_DIR)
+
+import pylox
+from pylox_cli import PyLox
+
+SNIPPETS = [
+    "var score = (price * quantity - discount) / 2; print score > 10;",
+    "var total = price * quantity; print total;",
+    'var label = "item"; print label == "item";',
+]
+
+
+def per_call(calls):
+    for i in range(calls):
+        lox = PyLox()
+        lox.interpreter.globals.define("price", 2.5)
+        lox.interpreter.globals.define("quantity", float(i))
+        lox.interpreter.globals.define("discount", 1.0)
+        lox.try_read_and_evaluate(SNIPPETS[i % len(SNIPPETS)])
+
+
+def compiled(calls):
+    output = io.StringIO()
+    for i in range(calls):
+        pylox.compile(SNIPPETS[i % len(SNIPPETS)]).run(
+            {"price": 2.5, "quantity": float(i), "discount": 1.0}, stdout=output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embedding API")
+    parser.add_argument("-n", dest="calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    baseline = None
+    for name, run in (("per call", per_call), ("compiled", compiled)):
+        pylox.program.cache.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            run(args.calls)
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print("{:<10} {:.3f}s {:>8.1f}us/call ({:.2f}x)".format(
+            name, elapsed, elapsed / args.calls * 1e6, baseline / elapsed))
+    print(pylox.program.cache)
+
+
+if __name__ == "__main__":
+    main()
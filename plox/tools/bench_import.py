@@ -0,0 +1,75 @@
+"""
+Compares running many small scripts which share helper code: pasted into every script, imported
+with the module cache cleared before each script, and imported through the module cache.
+
+    python tools/bench_import.py [-n SCRIPTS] [--definitions N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+PLOX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, PLOX_DIR)
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser
+from pylox.resolver import Resolver
+from pylox.interpreter import Interpreter
+from pylox.output import NullSink
+from pylox.module import Importer
+from pylox import module
+
+SCRIPT = "print h0 * 2 + h1;"
+
+
+def helpers_source(definitions):
+    return "".join("var h{0} = ({0} + 1) * 2 - {0} / 4;\n".format(i) for i in range(definitions))
+
+
+def run(source, directory):
+    interpreter = Interpreter(output=NullSink(), importer=Importer(search_path=[directory]))
+    interpreter.interpret(Resolver(interpreter).resolve(Parser(RegexScanner(source).scan_tokens()).parse()))
+
+
+def pasted(scripts, directory, helpers):
+    for _ in range(scripts):
+        run(helpers + SCRIPT, directory)
+
+
+def imported_cold(scripts, directory, helpers):
+    for _ in range(scripts):
+        module.cache.clear()
+        run('import "helpers.lox";' + SCRIPT, directory)
+
+
+def imported(scripts, directory, helpers):
+    for _ in range(scripts):
+        run('import "helpers.lox";' + SCRIPT, directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark module imports")
+    parser.add_argument("-n", dest="scripts", type=int, default=500)
+    parser.add_argument("--definitions", dest="definitions", type=int, default=200)
+    args = parser.parse_args()
+
+    helpers = helpers_source(args.definitions)
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "helpers.lox"), "w") as f:
+            f.write(helpers)
+        module.cache.clear()
+        baseline = None
+        for name, bench in (("pasted", pasted), ("imported, cold", imported_cold), ("imported", imported)):
+            start = time.perf_counter()
+            bench(args.scripts, directory, helpers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print("{:<16} {:.3f}s {:>8.1f}us/script ({:.2f}x)".format(
+                name, elapsed, elapsed / args.scripts * 1e6, baseline / elapsed))
+    print(module.cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Reports parser throughput of the Pratt Parser against the RecursiveDescentParser it replaced.
+
+    python tools/bench_parser.py [-n REPEAT] [--lines N] [file.lox ...]
+
+Without files, two generated expression-heavy programs and the lox/ test corpus are parsed.
+Tokens are scanned once up front, so only parsing is timed.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import logging
+import os
+import random
+import sys
+import time
+
+PLOX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, PLOX_DIR)
+
+from pylox.regex_scanner import RegexScanner
+from pylox.parser import Parser, RecursiveDescentParser
+
+PARSERS = [("recursive descent", RecursiveDescentParser), ("pratt", Parser)]
+
+OPERATORS = ["+", "-", "*", "/", "<", "<=", ">", ">=", "==", "!="]
+
+
+def expression(rng, depth):
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(["1", "2.5", "x", "true", "nil", '"s"'])
+    if rng.random() < 0.1:
+        return "-" + expression(rng, depth - 1)
+    if rng.random() < 0.1:
+        return "(" + expression(rng, depth - 1) + ")"
+    return "{} {} {}".format(expression(rng, depth - 1), rng.choice(OPERATORS), expression(rng, depth - 1))
+
+
+def expressions_source(lines):
+    """Statements mixing every operator and nesting."""
+    rng = random.Random(0)
+    return "var x = 1;\n" + "".join("x = {};\n".format(expression(rng, 5)) for _ in range(lines))
+
+
+def literals_source(lines):
+    """Long flat sums of literals, where every operand used to walk the whole precedence ladder."""
+    return "".join("print {};\n".format(" + ".join(str(i + n) for n in range(20))) for i in range(lines))
+
+
+def corpus_source():
+    sources = []
+    for path in sorted(glob.glob(os.path.join(PLOX_DIR, "..", "lox", "**", "*.lox"), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            sources.append(f.read())
+    return "\n".join(sources)
+
+
+def bench(name, source, repeat):
+    tokens = RegexScanner(source).scan_tokens()
+    print("{} ({} tokens)".format(name, len(tokens)))
+    baseline = None
+    for parser_name, parser_class in PARSERS:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            # the corpus contains deliberate parse errors; keep any report of them out of the results
+            with contextlib.redirect_stdout(io.StringIO()):
+                parser_class(tokens).parse()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        baseline = baseline or best
+        print("    {:<18} {:8.3f} s  {:10.0f} tokens/s  ({:.2f}x)".format(
+            parser_name, best, len(tokens) / best, baseline / best))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark plox parsers")
+    parser.add_argument("-n", dest="repeat", type=int, default=3)
+    parser.add_argument("--lines", dest="lines", type=int, default=20000, help="statements per generated program")
+    parser.add_argument("files", nargs="*")
+    args = parser.parse_args()
+
+    logging.getLogger("pylox.scanner").disabled = True
+    if args.files:
+        for path in args.files:
+            with open(path, encoding="utf-8") as f:
+                bench(path, f.read(), args.repeat)
+    else:
+        bench("expressions", expressions_source(args.lines), args.repeat)
+        bench("literal sums", literals_source(args.lines), args.repeat)
+        bench("lox/ corpus x20", corpus_source() * 20, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
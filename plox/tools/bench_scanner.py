@@ -0,0 +1,71 @@
+"""
+Reports Scanner and RegexScanner throughput in MB/s.
+
+    python tools/bench_scanner.py [-n REPEAT] [--size MB] [file.lox ...]
+
+Without files, the lox/ test corpus is concatenated and repeated up to the requested size.
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+PLOX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, PLOX_DIR)
+
+from pylox.scanner import Scanner
+from pylox.regex_scanner import RegexScanner
+
+SCANNERS = [("Scanner", Scanner), ("RegexScanner", RegexScanner)]
+
+
+def corpus_source(size):
+    sources = []
+    for path in sorted(glob.glob(os.path.join(PLOX_DIR, "..", "lox", "**", "*.lox"), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        # unterminated strings would swallow the rest of the generated file
+        if source.count('"') % 2 == 0:
+            sources.append(source)
+    corpus = "\n".join(sources)
+    return corpus * max(1, int(size * 1024 * 1024 / len(corpus)))
+
+
+def bench(source, repeat):
+    megabytes = len(source.encode("utf-8")) / (1024 * 1024)
+    print("{:.2f} MB of source".format(megabytes))
+    baseline = None
+    for name, scanner_class in SCANNERS:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            tokens = scanner_class(source).scan_tokens()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        baseline = baseline or best
+        print("    {:<14} {:8.2f} MB/s  {:8.0f} tokens/s  ({:.2f}x)".format(
+            name, megabytes / best, len(tokens) / best, baseline / best))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark plox scanners")
+    parser.add_argument("-n", dest="repeat", type=int, default=3)
+    parser.add_argument("--size", dest="size", type=float, default=2.0, help="corpus size in MB")
+    parser.add_argument("files", nargs="*")
+    args = parser.parse_args()
+
+    # the corpus contains deliberately invalid characters
+    logging.getLogger("pylox.scanner").disabled = True
+    if args.files:
+        for path in args.files:
+            with open(path, encoding="utf-8") as f:
+                print(path)
+                bench(f.read(), args.repeat)
+    else:
+        bench(corpus_source(args.size), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Compares the tree-walking Interpreter (recursive and stackless), the closure compiler, the bytecode VM
+and the Python transpiler.
+
+    python tools/bench_vm.py [-n REPEAT] [file.lox ...]
+
+Without arguments the lox/benchmark suite, plox/scripts and synthetic arithmetic, counting,
+string equality and string concatenation programs are timed. Programs which plox cannot parse are
+reported as unsupported.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import re
+import sys
+import time
+
+PLOX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BENCHMARK_DIR = os.path.join(PLOX_DIR, "..", "lox", "benchmark")
+sys.path.insert(0, PLOX_DIR)
+
+from pylox.scanner import Scanner
+from pylox.parser import Parser
+from pylox.interpreter import Interpreter
+from pylox.resolver import Resolver
+from pylox.vm import VM
+from pylox.transpile import TranspilingInterpreter
+
+
+def run_tree(engine, statements):
+    for stmt in statements:
+        engine._execute(stmt)
+
+
+def run_stackless(engine, statements):
+    for stmt in statements:
+        engine._execute_stackless(stmt)
+
+
+def run_closures(engine, compiled):
+    for stmt in compiled:
+        stmt()
+
+
+# (name, engine factory, compile step, execute step)
+ENGINES = [
+    ("tree", Interpreter, lambda engine, statements: statements, run_tree),
+    ("stackless", lambda: Interpreter(stackless=True), lambda engine, statements: statements, run_stackless),
+    ("closures", lambda: Interpreter(compiled=True), lambda engine, statements: engine.compiler.compile(statements),
+     run_closures),
+    ("vm", VM, lambda engine, statements: engine.compiler.compile(statements), lambda engine, chunk: engine.run(chunk)),
+    ("python", TranspilingInterpreter, lambda engine, statements: list(engine.compile_iter(statements)),
+     lambda engine, translations: [engine.run(translation) for translation in translations]),
+]
+
+
+def synthetic_source(lines=20000):
+    body = "a = (a + b * 2 - 1) / 2 + b;\nb = -b * -1;\nprint a == b;\n"
+    return "var a = 1;\nvar b = 2;\n" + body * (lines // 3)
+
+
+def counting_source(lines=20000):
+    """Integer increments and comparisons, as in the counting loops plox cannot express."""
+    body = "i = i + 1;\nbelow = i < 100000;\n"
+    return "var i = 0;\nvar below = true;\n" + body * (lines // 2)
+
+
+def string_equality_source(repeat=100):
+    """The comparisons of lox/benchmark/string_equality.lox, unrolled, since plox has no loops."""
+    with open(os.path.join(BENCHMARK_DIR, "string_equality.lox")) as f:
+        lines = f.read().splitlines()
+    declarations = [line for line in lines if line.startswith("var a")]
+    comparisons = [line.strip() for line in lines if re.match(r"\s*a\d == a\d;", line)]
+    return "\n".join(declarations + comparisons * repeat) + "\n"
+
+
+def concatenation_source(lines=20000):
+    return 'var s = "";\n' + 's = s + "lox";\n' * lines + "print s;\n"
+
+
+def time_engine(source, make_engine, compile_step, run_step, repeat):
+    """Returns the best (compile, run) times in seconds over the given number of repeats."""
+    best = None
+    for _ in range(repeat):
+        engine = make_engine()
+        parser = Parser(Scanner(source).scan_tokens())
+        statements = Resolver(engine).resolve(parser.parse())
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            compiled = compile_step(engine, statements)
+            compiled_at = time.perf_counter()
+            run_step(engine, compiled)
+            finished = time.perf_counter()
+        timing = (compiled_at - start, finished - compiled_at)
+        best = timing if best is None or sum(timing) < sum(best) else best
+    return best
+
+
+def bench(name, source, repeat):
+    parser = Parser(Scanner(source).scan_tokens())
+    parser.parse()
+    if parser.errors:
+        print("{:<24} unsupported ({})".format(name, parser.errors[0]))
+        return
+    print(name)
+    baseline = None
+    for engine, make_engine, compile_step, run_step in ENGINES:
+        compile_time, run_time = time_engine(source, make_engine, compile_step, run_step, repeat)
+        baseline = baseline or run_time
+        print("    {:<10} compile={:.4f}s run={:.4f}s ({:.2f}x)".format(
+            engine, compile_time, run_time, baseline / run_time if run_time else 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark plox execution engines")
+    parser.add_argument("-n", dest="repeat", type=int, default=3)
+    parser.add_argument("files", nargs="*")
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob(os.path.join(BENCHMARK_DIR, "*.lox"))) + \
+        sorted(glob.glob(os.path.join(PLOX_DIR, "scripts", "*.lox")))
+    for path in files:
+        with open(path) as f:
+            bench(os.path.basename(path), f.read(), args.repeat)
+    if not args.files:
+        bench("synthetic arithmetic", synthetic_source(), args.repeat)
+        bench("counting", counting_source(), args.repeat)
+        bench("string equality", string_equality_source(), args.repeat)
+        bench("string concatenation", concatenation_source(), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,23 @@
-def generate_class(name, super_class, props):
+def generate_class(name, super_class, kind, props, resolved=()):
     print("class {}({}):".format(name, super_class))
+    slots = ['"{}"'.format(p) for p in list(props) + list(resolved)]
+    print("    __slots__ = ({}{})".format(", ".join(slots), "," if len(slots) == 1 else ""))
+    print("    kind = {}".format(kind))
+    print("")
     print("    def __init__(self, {}):".format(', '.join(props)))
     for prop in props:
         print("        self.{} = {}".format(prop, prop))
+    for prop in resolved:
+        # filled in by the Resolver
+        print("        self.{} = None".format(prop))
+    print("")
+    print("    def __eq__(self, other):")
+    comparisons = ["isinstance(other, {})".format(name)] + ["self.{0} == other.{0}".format(p) for p in props]
+    print("        return ({})".format(" and\n                ".join(comparisons)))
+    print("")
+    # consistent with __eq__, which specialized subclasses (see pylox.quicken) inherit
+    print("    def __hash__(self):")
+    print("        return hash(({}))".format(", ".join([name] + ["self.{}".format(p) for p in props])))
     print("")
     print("    def __repr__(self):")
     prop_list = ", ".join(["self.{}".format(i) for i in props])
@@ -15,23 +30,35 @@ def generate_class(name, super_class, props):
 
 expression_template = """
 class Expr(object):
+    __slots__ = ()
+
     def accept(self, visitor):
         return visitor.visit(self)
 
 
 class Stmt(object):
+    __slots__ = ()
+
     def accept(self, visitor):
         return visitor.visit(self)
 
 """
 
+NODES = [
+    ("Assign", "Expr", ["name", "value"], ["depth", "slot"]),
+    ("BinaryExpr", "Expr", ["left", "operator", "right"], []),
+    ("UnaryExpr", "Expr", ["operator", "right"], []),
+    ("LiteralExpr", "Expr", ["value"], []),
+    ("GroupingExpr", "Expr", ["expression"], []),
+    ("Variable", "Expr", ["name"], ["depth", "slot"]),
+    ("Expression", "Stmt", ["expression"], []),
+    ("Print", "Stmt", ["expression"], []),
+    ("Var", "Stmt", ["name", "initializer"], ["slot"]),
+    ("Import", "Stmt", ["path"], []),
+]
+
 print(expression_template)
-generate_class("Assign", "Expr", ["name", "value"])
-generate_class("BinaryExpr", "Expr", ["left", "operator", "right"])
-generate_class("UnaryExpr", "Expr", ["operator", "right"])
-generate_class("LiteralExpr", "Expr", ["value"])
-generate_class("GroupingExpr", "Expr", ["expression"])
-generate_class("Variable", "Expr", ["name"])
-generate_class("Expression", "Stmt", ["expression"])
-generate_class("Print", "Stmt", ["expression"])
-generate_class("Var", "Stmt", ["name", "initializer"])
+for kind, (name, super_class, props, resolved) in enumerate(NODES):
+    generate_class(name, super_class, kind, props, resolved=resolved)
+print("# number of node kinds, for tables indexed by kind")
+print("KIND_COUNT = {}".format(len(NODES)))